@@ -47,6 +47,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "haystack",
     "rest_framework",
     "crispy_forms",
@@ -214,6 +215,53 @@ CELERY_TIMEZONE = "UTC"
 # Set this here in order to build uris relative to wherever it's hosted
 IPIF_BASE_URI = "http://localhost:8000"
 
+# Maximum number of ids that can be resolved in one batch retrieve request
+IPIF_BATCH_MAX_IDS = 100
+
+# Maximum number of entries returned in one page of the changes feed
+IPIF_CHANGES_MAX_SIZE = 1000
+
+# Maximum number of values returned for each facet by the statement facets view
+IPIF_FACET_MAX_LIMIT = 1000
+
+# Maximum number of suggestions returned by the suggest (typeahead) views
+IPIF_SUGGEST_MAX_SIZE = 50
+
+# Per-process cache of resolved identifiers: maximum entries, and seconds
+# before an entry expires (identifiers are mostly written by Celery workers,
+# whose changes other processes only see once their cached entries expire)
+IPIF_IDENTIFIER_CACHE_SIZE = 10000
+IPIF_IDENTIFIER_CACHE_TTL = 60
+
+# Maximum number of related documents embedded in one response by `include`
+IPIF_INCLUDE_MAX_DOCUMENTS = 200
+
+# Limits on the person graph view: maximum hops, and persons returned
+IPIF_GRAPH_MAX_HOPS = 3
+IPIF_GRAPH_MAX_NODES = 500
+
+# Parallel ingestion pipeline: worker threads, and items per chunk (each chunk
+# is ingested in its own transaction)
+IPIF_INGEST_WORKERS = 4
+IPIF_INGEST_CHUNK_SIZE = 500
+
+# Attempts at a pipeline chunk failing with an integrity error or deadlock, and
+# the base of the (jittered, exponential) delay in seconds before each retry
+IPIF_INGEST_CHUNK_ATTEMPTS = 5
+IPIF_INGEST_RETRY_DELAY = 0.1
+
+# Ingestion event log: errors (and notes) kept as samples, beyond which they
+# are only counted, and seconds between saves of a running job's progress
+IPIF_INGEST_EVENT_SAMPLES = 20
+IPIF_INGEST_PROGRESS_INTERVAL = 5
+
+# POST bodies larger than this (in bytes) are spooled and ingested as a job on
+# Celery, unless the request sets `async=false`
+IPIF_POST_ASYNC_THRESHOLD = 1024 * 1024
+
+# Seconds for which a POST's response is kept, to answer replays of it
+IPIF_INGEST_RECEIPT_TTL = 24 * 60 * 60
+
 REST_FRAMEWORK = {
     "DEFAULT_PARSER_CLASSES": [
         "rest_framework.parsers.JSONParser",
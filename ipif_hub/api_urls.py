@@ -1,23 +1,43 @@
 from django.urls import path
 
 from ipif_hub.api_views import (
+    ChangesView,
+    ExportView,
     FactoidViewSet,
+    PersonGraphView,
     PersonViewSet,
     SourceViewSet,
+    StatementFacetsView,
     StatementViewSet,
+    URILookupView,
 )
 
 urlpatterns = [
+    path("export/", ExportView.as_view()),
+    path("changes/", ChangesView.as_view()),
+    path("uris/", URILookupView.as_view()),
     path("persons/", PersonViewSet.as_view({"get": "list"})),
     path("persons/", PersonViewSet.as_view({"post": "post"})),
+    path("persons/batch/", PersonViewSet.as_view({"get": "batch", "post": "batch"})),
+    path("persons/suggest/", PersonViewSet.as_view({"get": "suggest"})),
+    path("persons/graph/", PersonGraphView.as_view()),
     path("persons/<path:pk>", PersonViewSet.as_view({"get": "retrieve"})),
     path("sources/", SourceViewSet.as_view({"get": "list"})),
     path("sources/", SourceViewSet.as_view({"post": "post"})),
+    path("sources/batch/", SourceViewSet.as_view({"get": "batch", "post": "batch"})),
+    path("sources/suggest/", SourceViewSet.as_view({"get": "suggest"})),
     path("sources/<path:pk>", SourceViewSet.as_view({"get": "retrieve"})),
     path("factoids/", FactoidViewSet.as_view({"get": "list"})),
     path("factoids/", FactoidViewSet.as_view({"post": "post"})),
+    path("factoids/batch/", FactoidViewSet.as_view({"get": "batch", "post": "batch"})),
+    path("factoids/suggest/", FactoidViewSet.as_view({"get": "suggest"})),
     path("factoids/<path:pk>", FactoidViewSet.as_view({"get": "retrieve"})),
     path("statements/", StatementViewSet.as_view({"get": "list"})),
     path("statements/", StatementViewSet.as_view({"post": "post"})),
+    path(
+        "statements/batch/", StatementViewSet.as_view({"get": "batch", "post": "batch"})
+    ),
+    path("statements/facets/", StatementFacetsView.as_view()),
+    path("statements/suggest/", StatementViewSet.as_view({"get": "suggest"})),
     path("statements/<path:pk>", StatementViewSet.as_view({"get": "retrieve"})),
 ]
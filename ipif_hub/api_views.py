@@ -1,38 +1,44 @@
 import datetime
-import json
-from itertools import islice
+import math
+import operator
+from functools import reduce
 from typing import Callable, List, Type
+from uuid import UUID
 
 from dateutil.parser import parse as parse_date
 from django.conf import settings
+from django.contrib.sites.shortcuts import get_current_site
 from django.core.validators import URLValidator
 from django.db.models import Q
 from django.forms import ValidationError
+from django.http import StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from haystack.query import SQ, SearchQuerySet
-from jsonschema import ValidationError as JSONValidationError
-from jsonschema import validate
 from rest_framework import viewsets
 from rest_framework.authentication import BasicAuthentication
 from rest_framework.decorators import action
 from rest_framework.parsers import JSONParser
 from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from ipif_hub.changes import InvalidChangeToken, decode_change_token, get_changes
+from ipif_hub.documents import decode_document
+from ipif_hub.export import EXPORT_SOURCES, gzip_stream, iter_export_lines
+from ipif_hub.graph import EDGE_TYPES, get_neighbourhood
+from ipif_hub.includes import InvalidInclude, include_related, parse_include
 from ipif_hub.management.utils.ingest_data import (
+    LIST_INGESTERS,
     DataFormatError,
-    ingest_factoids,
-    ingest_persons,
-    ingest_sources,
-    ingest_statements,
+    DataIntegrityError,
 )
-from ipif_hub.management.utils.ingest_schemas import (
-    FACTOID_LIST,
-    PERSON_SOURCE_LIST,
-    STATEMENT_LIST,
+from ipif_hub.management.utils.validation import (
+    SchemaValidationError,
+    validate_payload,
 )
 from ipif_hub.models import (
     Factoid,
+    IngestionJob,
     IpifEntityAbstractBase,
     IpifRepo,
     MergePerson,
@@ -40,6 +46,14 @@ from ipif_hub.models import (
     Source,
     Statement,
 )
+from ipif_hub.receipts import find_receipt, payload_digest, record_receipt
+from ipif_hub.renderers import IPIF_RENDERERS
+from ipif_hub.resolution import (
+    get_entity_id,
+    lookup_uris,
+    resolve_document_ids,
+    resolve_documents,
+)
 from ipif_hub.search_indexes import (
     FactoidIndex,
     MergePersonIndex,
@@ -48,6 +62,8 @@ from ipif_hub.search_indexes import (
     SourceIndex,
     StatementIndex,
 )
+from ipif_hub.serializers import choose_merge_uri
+from ipif_hub.tasks import ingest_posted_data_task, spool_post_data
 
 url_validate = URLValidator()
 
@@ -61,6 +77,16 @@ def get_index_from_model(index):
     }[index]
 
 
+def get_index_and_ipif_type(object_class, repo=None):
+    """Returns the search index and ipif_type to query for a model: with no repo,
+    Persons and Sources are looked up as MergePersons and MergeSources"""
+    if not repo and object_class is Person:
+        return MergePersonIndex, "mergeperson"
+    if not repo and object_class is Source:
+        return MergeSourceIndex, "mergesource"
+    return get_index_from_model(object_class), object_class.__name__.lower()
+
+
 def is_uri(s: str):
     try:
         url_validate(s)
@@ -84,7 +110,9 @@ def build_statement_filters(request: Request) -> List[Q]:
     """
 
     # Make a list of Q objects, which can be combined with AND/OR later
-    # depending on `independentStatements` flag
+    # depending on `independentStatements` flag.
+    # statementText is matched as a substring, using its trigram index; labels
+    # are matched case-insensitively, using their UPPER() indexes (see models)
     statement_filters = []
 
     if p := request.query_params.get("statementText"):
@@ -108,7 +136,7 @@ def build_statement_filters(request: Request) -> List[Q]:
                 | (Q(role_label__isnull=False) & ~Q(role_label__exact=""))
             )
         else:
-            statement_filters.append(Q(role_uri=p) | Q(role_label=p))
+            statement_filters.append(Q(role_uri=p) | Q(role_label__iexact=p))
 
     if p := request.query_params.get("memberOf"):
         if p == "*":
@@ -117,7 +145,7 @@ def build_statement_filters(request: Request) -> List[Q]:
                 | (Q(memberOf_label__isnull=False) & ~Q(memberOf_label__exact=""))
             )
         else:
-            statement_filters.append(Q(memberOf_uri=p) | Q(memberOf_label=p))
+            statement_filters.append(Q(memberOf_uri=p) | Q(memberOf_label__iexact=p))
 
     if p := request.query_params.get("place"):
         if p == "*":
@@ -126,7 +154,7 @@ def build_statement_filters(request: Request) -> List[Q]:
                 | (Q(places__label__isnull=False) & ~Q(places__label__exact=""))
             )
         else:
-            statement_filters.append(Q(places__uri=p) | Q(places__label=p))
+            statement_filters.append(Q(places__uri=p) | Q(places__label__iexact=p))
 
     if p := request.query_params.get("relatesToPerson"):
         if p == "*":
@@ -173,6 +201,98 @@ def query_dict(path: str) -> Callable:
     return inner
 
 
+def is_truthy(param) -> bool:
+    """Query params arrive as strings; treat the usual spellings of 'yes' as True"""
+    return str(param).lower() in {"true", "1", "yes", "on"}
+
+
+class InvalidSizeParam(ValueError):
+    pass
+
+
+def get_size_param(request: Request, name: str, default: int, maximum: int) -> int:
+    """Reads a size-like query param, clamped to between 1 and `maximum`;
+    raises InvalidSizeParam if it is given but is not an integer"""
+    param = request.query_params.get(name)
+    if not param:
+        return default
+    try:
+        return min(max(int(param), 1), maximum)
+    except ValueError:
+        raise InvalidSizeParam(f"`{name}` must be an integer, not {param!r}")
+
+
+def build_page_link(request: Request, page: int) -> str:
+    """Rebuilds the current request URL, swapping in a different page number"""
+    params = request.query_params.copy()
+    params["page"] = str(page)
+    return f"{request.build_absolute_uri(request.path)}?{params.urlencode()}"
+
+
+def run_search_queryset_without_documents(search_queryset: SearchQuerySet):
+    """Runs the query behind a SearchQuerySet asking Solr for zero rows, so only
+    the hit count (and any facet counts) come back. Returns the run query.
+
+    Haystack's own `count()` asks Solr for one row; setting the limits to
+    zero rows beforehand means no documents are fetched at all."""
+    query = search_queryset.query
+    query.set_limits(0, 0)
+    query.run()
+    return query
+
+
+def count_search_queryset(search_queryset: SearchQuerySet) -> int:
+    """Gets the number of hits (Solr's `numFound`) without fetching any documents."""
+    return run_search_queryset_without_documents(search_queryset).get_count()
+
+
+def paginated_response(
+    request: Request,
+    search_queryset: SearchQuerySet,
+    page: int,
+    size: int,
+    envelope: bool = False,
+    count_only: bool = False,
+    include: List[str] = None,
+    repo: str = None,
+) -> Response:
+    """Returns a page of pre-serialized results from a SearchQuerySet.
+
+    By default the page is returned as a bare list (per the IPIF spec);
+    `envelope` wraps it with the total number of hits and next/prev links,
+    and `count_only` returns just the total. `include` embeds the documents
+    each result refers to (see ipif_hub.includes).
+
+    Slicing the SearchQuerySet (rather than iterating it with `islice`) sends a
+    single query with the right `start`/`rows` to Solr, and caches `numFound`,
+    so the total comes for free."""
+
+    if count_only:
+        return Response({"count": count_search_queryset(search_queryset)})
+
+    page_start = (page - 1) * size
+    result = search_queryset[page_start : page_start + size]
+    documents = [decode_document(r.pre_serialized) for r in result]
+    include_related(documents, include, repo)
+
+    if not envelope:
+        return Response(documents)
+
+    count = search_queryset.count()
+    pages = math.ceil(count / size) if size else 0
+    return Response(
+        {
+            "count": count,
+            "page": page,
+            "size": size,
+            "pages": pages,
+            "next": build_page_link(request, page + 1) if page < pages else None,
+            "prev": build_page_link(request, page - 1) if page > 1 else None,
+            "results": documents,
+        }
+    )
+
+
 NOT_URI_RESPONSE = Response(
     status=400,
     data={
@@ -197,7 +317,13 @@ def list_view(object_class: Type[IpifEntityAbstractBase]) -> Callable:
     ✅ statementId
     ✅ st
     ✅ sourceId
-    ✅ s"""
+    ✅ s
+
+    Non-IPIF extras:
+
+    envelope=true — wrap results with count/page/size/next/prev
+    count=true — return only the number of matching results
+    include=factoids,statements,sources,persons — embed referenced documents"""
 
     def inner(self, request, repo=None):
 
@@ -205,16 +331,27 @@ def list_view(object_class: Type[IpifEntityAbstractBase]) -> Callable:
         # check whether there are any fields afterwards
         request_params = request.query_params.copy()
 
-        # Get the size and page params, to pass to islice (hopefully this works?)
+        # Get the size and page params, used to slice the search queryset
         size = 30
         if s := request_params.pop("size", None):
             size = int(s[0])
-        page_start = 0
 
         # Get the page number
+        page = 1
         if p := request_params.pop("page", None):
-            page_start = (int(p[0]) - 1) * size
-        page_end = page_start + size
+            page = max(int(p[0]), 1)
+
+        # Get the response-shape flags
+        envelope = is_truthy(request_params.pop("envelope", ["false"])[0])
+        count_only = is_truthy(request_params.pop("count", ["false"])[0])
+
+        try:
+            include = parse_include(request_params.pop("include", [""])[0])
+        except InvalidInclude as e:
+            return Response(status=400, data={"detail": str(e)})
+
+        # The response format (e.g. format=msgpack) is picked by DRF, not a filter
+        request_params.pop("format", None)
 
         # Build sortBy and sort_order param by stripping "ASC"/"DESC"
         sortBy = ""
@@ -266,14 +403,17 @@ def list_view(object_class: Type[IpifEntityAbstractBase]) -> Callable:
             if sortBy:
                 search_queryset = search_queryset.order_by(sort_string)
 
-            result = islice(
+            return paginated_response(
+                request,
                 search_queryset,
-                page_start,
-                page_end,
+                page,
+                size,
+                envelope,
+                count_only,
+                include=include,
+                repo=repo,
             )
 
-            return Response([json.loads(r.pre_serialized) for r in result])
-
         # Otherwise, we need to create a query using the Django ORM...
 
         # Start by setting the correct queryset, and the qd function
@@ -387,15 +527,18 @@ def list_view(object_class: Type[IpifEntityAbstractBase]) -> Callable:
         if sortBy:
             search_queryset = search_queryset.order_by(sort_string)
 
-        # Get the sliced result using page_start,end
-        result = islice(
+        # Get the requested page (or count) from Solr
+        return paginated_response(
+            request,
             search_queryset,
-            page_start,
-            page_end,
+            page,
+            size,
+            envelope,
+            count_only,
+            include=include,
+            repo=repo,
         )
 
-        return Response([json.loads(r.pre_serialized) for r in result])
-
     return inner
 
 
@@ -411,46 +554,153 @@ def retrieve_view(object_class):
         serializer = globals()[f"{object_class.__name__}Serializer"]
         return Response(serializer(queryset).data)
     """
-    # New version hitting SOLR
+    # New version resolving the pk via the EntityIdentifier table, then
+    # fetching the document from Solr by its unique key
 
     def inner(self, request, pk, repo=None):
 
         # If no repository is specified, the pk needs to be a URI
         if repo == None and not is_uri(pk):
+            return NOT_URI_RESPONSE
+
+        try:
+            include = parse_include(request.query_params.get("include"))
+        except InvalidInclude as e:
+            return Response(status=400, data={"detail": str(e)})
+
+        _, ipif_type = get_index_and_ipif_type(object_class, repo)
+
+        documents = resolve_documents([pk], ipif_type, repo)
+        try:
+            document = decode_document(documents[pk])
+        except KeyError:
+            return Response(status=404)
+
+        include_related([document], include, repo)
+        return Response(document)
+
+    return inner
+
+
+def batch_retrieve_view(object_class):
+    """Resolves many identifiers (URIs, or local ids with a repo) at once.
+
+    Takes repeated `id` query params (GET) or a JSON list of ids (POST),
+    resolves them all exactly against the EntityIdentifier table (as
+    retrieve_view does for one pk), and fetches the documents from Solr in
+    a single query. Returns the found documents in request order, and the ids
+    that matched nothing under `missing`."""
+
+    def inner(self, request, repo=None):
+        if request.method == "POST":
+            ids = request.data
+            if not isinstance(ids, list) or not all(isinstance(pk, str) for pk in ids):
+                return Response(
+                    status=400,
+                    data={"detail": "Request body must be a JSON list of ids"},
+                )
+        else:
+            ids = request.query_params.getlist("id")
+
+        # Drop duplicates, keeping the requested order
+        ids = list(dict.fromkeys(ids))
+
+        if not ids:
+            return Response(
+                status=400, data={"detail": "Provide at least one id to look up"}
+            )
+
+        if len(ids) > settings.IPIF_BATCH_MAX_IDS:
             return Response(
                 status=400,
                 data={
                     "detail": (
-                        "Either query a specific dataset using"
-                        " the dataset-specific route, or provide a full URI as identifier"
+                        f"Too many ids: at most {settings.IPIF_BATCH_MAX_IDS}"
+                        " can be looked up in one request"
                     )
                 },
             )
 
-        ipif_type = object_class.__name__.lower()
-        index = get_index_from_model(object_class)
-        if not repo and object_class.__name__ == "Person":
-            index = MergePersonIndex
-            ipif_type = "mergeperson"
-        elif not repo and object_class.__name__ == "Source":
-            index = MergeSourceIndex
-            ipif_type = "mergesource"
+        # If no repository is specified, the ids need to be URIs
+        if repo == None and not all(is_uri(pk) for pk in ids):
+            return NOT_URI_RESPONSE
+
+        _, ipif_type = get_index_and_ipif_type(object_class, repo)
+        documents = resolve_documents(ids, ipif_type, repo)
+
+        found = []
+        missing = []
+        for pk in ids:
+            if pk in documents:
+                found.append(decode_document(documents[pk]))
+            else:
+                missing.append(pk)
+
+        return Response({"results": found, "missing": missing})
+
+    return inner
 
-        sq = SQ(ipif_type=ipif_type) & (
-            SQ(identifier=pk) | SQ(uris=pk) | (SQ(local_id=pk))
-        )
 
+def suggest_view(object_class):
+    """Typeahead lookup: returns the `@id` and label of entities whose label,
+    name or URIs start with the words in `q`.
+
+    Matches against the edge-ngrammed `suggest` field, and only fetches the
+    fields needed for the response, so no documents are deserialized.
+
+    ✅ q
+    ✅ size
+    """
+
+    def inner(self, request, repo=None):
+        q = request.query_params.get("q", "").strip()
+        if not q:
+            return Response(status=400, data={"detail": "Provide some text as `q`"})
+
+        try:
+            size = get_size_param(request, "size", 10, settings.IPIF_SUGGEST_MAX_SIZE)
+        except InvalidSizeParam as e:
+            return Response(status=400, data={"detail": str(e)})
+
+        index, ipif_type = get_index_and_ipif_type(object_class, repo)
+
+        sq = SQ(ipif_type=ipif_type)
         if repo:
             sq &= SQ(ipif_repo_slug=repo)
-        result = index.objects.filter(sq).values("pre_serialized")
-        try:
-            return Response(json.loads(result[0]["pre_serialized"]))
-        except IndexError:
-            return Response(status=404)
+
+        results = (
+            index.objects.filter(sq)
+            .exclude(ipif_repo_slug="IPIFHUB_AUTOCREATED")
+            .autocomplete(suggest=q)
+            .values("identifier", "label", "uris")[:size]
+        )
+
+        return Response(
+            [
+                {
+                    "@id": (
+                        choose_merge_uri(result.get("uris") or [])
+                        if ipif_type in {"mergeperson", "mergesource"}
+                        else result["identifier"]
+                    ),
+                    "label": result.get("label") or "",
+                }
+                for result in results
+            ]
+        )
 
     return inner
 
 
+def run_post_as_job(request: Request) -> bool:
+    """Whether to ingest a POST as a job: if the request asks, with `async`, or
+    else if the body is over the threshold"""
+    if (param := request.query_params.get("async")) is not None:
+        return is_truthy(param)
+    content_length = int(request.META.get("CONTENT_LENGTH") or 0)
+    return content_length > settings.IPIF_POST_ASYNC_THRESHOLD
+
+
 def post_view(object_class):
     @action(
         detail=True,
@@ -475,51 +725,55 @@ def post_view(object_class):
                 data={"detail": (f"Repository '{repo}' does not exist.")},
             )
 
-        if object_class is Person:
-            try:
-                validate(request.data, PERSON_SOURCE_LIST)
-            except JSONValidationError as e:
-                return Response({"detail": e.message}, status=400)
-            try:
-                resp = ingest_persons(request.data, ipif_repo=ipif_repo)
-            except DataFormatError as e:
-                return Response({"detail": e.message}, status=400)
-            return Response({"detail": resp})
+        entity_type = object_class.__name__.lower()
+        schema_name, ingest = LIST_INGESTERS[entity_type]
 
-        elif object_class is Factoid:
-            try:
-                validate(request.data, FACTOID_LIST)
-            except JSONValidationError as e:
-                return Response({"detail": e.message}, status=400)
-            try:
-                resp = ingest_factoids(request.data, ipif_repo=ipif_repo)
-            except DataFormatError as e:
-                print(e)
-                return Response({"detail": e.message}, status=400)
-            return Response({"detail": resp})
-
-        elif object_class is Statement:
-            try:
-                validate(request.data, STATEMENT_LIST)
-            except JSONValidationError as e:
-                return Response({"detail": e.message}, status=400)
-            try:
-                resp = ingest_statements(self.request.data, ipif_repo=ipif_repo)
-            except DataFormatError as e:
-                return Response({"detail": e.message}, status=400)
-            return Response({"detail": resp})
-
-        elif object_class is Source:
-            try:
-                validate(request.data, PERSON_SOURCE_LIST)
-            except JSONValidationError as e:
-                return Response({"detail": e.message}, status=400)
-            try:
-                resp = ingest_sources(self.request.data, ipif_repo=ipif_repo)
-            except DataFormatError as e:
-                return Response({"detail": e.message}, status=400)
-
-            return Response({"detail": resp})
+        # A replay of a POST already ingested gets the same response again
+        key = request.headers.get("Idempotency-Key")
+        if key and len(key) > 255:
+            return Response(
+                {"detail": "Idempotency-Key must be at most 255 characters"},
+                status=400,
+            )
+        digest = payload_digest(request.body)
+        if receipt := find_receipt(ipif_repo, entity_type, key, digest):
+            if receipt.digest != digest:
+                return Response(
+                    {
+                        "detail": (
+                            f"Idempotency-Key '{key}' was already used "
+                            "for a different payload"
+                        )
+                    },
+                    status=422,
+                )
+            return Response(receipt.response, status=receipt.status)
+
+        if run_post_as_job(request):
+            # Validation is left to the job, as it is much of the work
+            job = IngestionJob(ipif_repo=ipif_repo, job_type="rest_post")
+            job.save()
+            spool_name = spool_post_data(job, request.body)
+            job_uri = f"{request.scheme}://{get_current_site(request)}/job/{job.id}/"
+            data = {
+                "detail": f"Ingesting data. Track job at {job_uri}",
+                "job_uri": job_uri,
+            }
+            record_receipt(ipif_repo, entity_type, key, digest, 202, data, job=job)
+            ingest_posted_data_task.delay(repo, entity_type, spool_name, job.id)
+            return Response(data, status=202)
+
+        try:
+            validate_payload(schema_name, request.data)
+        except SchemaValidationError as e:
+            return Response({"detail": e.errors}, status=400)
+        try:
+            events = ingest(request.data, ipif_repo=ipif_repo, validated=True)
+        except (DataFormatError, DataIntegrityError) as e:
+            return Response({"detail": str(e)}, status=400)
+        data = {"detail": events.as_dict()}
+        record_receipt(ipif_repo, entity_type, key, digest, 200, data)
+        return Response(data)
 
     return csrf_exempt(inner)
 
@@ -528,6 +782,8 @@ class BaseViewSet(viewsets.ViewSet):
     retrieve: Callable
     list: Callable
     post: Callable
+    batch: Callable
+    suggest: Callable
 
 
 def build_viewset(object_class: Type[IpifEntityAbstractBase]) -> Type[BaseViewSet]:
@@ -538,11 +794,14 @@ def build_viewset(object_class: Type[IpifEntityAbstractBase]) -> Type[BaseViewSe
         (viewsets.ViewSet,),
         {
             "parser_classes": [JSONParser],
+            "renderer_classes": IPIF_RENDERERS,
             # "authentication_classes": [BasicAuthentication],
             # "permission_classes": [IsAuthenticated],
             "post": post_view(object_class),
             "list": list_view(object_class),
             "retrieve": retrieve_view(object_class),
+            "batch": batch_retrieve_view(object_class),
+            "suggest": suggest_view(object_class),
         },
     )
     return vs
@@ -553,3 +812,296 @@ PersonViewSet: Type[BaseViewSet] = build_viewset(Person)
 SourceViewSet: Type[BaseViewSet] = build_viewset(Source)
 FactoidViewSet: Type[BaseViewSet] = build_viewset(Factoid)
 StatementViewSet: Type[BaseViewSet] = build_viewset(Statement)
+
+
+class ExportView(APIView):
+    """Streams every entity of a repository (or, with no repository, the merged
+    hub view) as newline-delimited IPIF JSON, optionally gzipped.
+
+    ✅ source (solr|db)
+    ✅ gzip
+    """
+
+    def get(self, request, repo=None):
+        if repo and not IpifRepo.objects.filter(pk=repo).exists():
+            return Response(
+                status=404,
+                data={"detail": (f"Repository '{repo}' does not exist.")},
+            )
+
+        source = request.query_params.get("source", "solr")
+        if source not in EXPORT_SOURCES:
+            return Response(
+                status=400,
+                data={"detail": f"source must be one of {', '.join(EXPORT_SOURCES)}"},
+            )
+
+        lines = iter_export_lines(repo, source=source)
+        file_name = f"{repo or 'ipif-hub'}.ndjson"
+
+        if is_truthy(request.query_params.get("gzip", "false")):
+            response = StreamingHttpResponse(
+                gzip_stream(lines), content_type="application/gzip"
+            )
+            file_name += ".gz"
+        else:
+            response = StreamingHttpResponse(lines, content_type="application/x-ndjson")
+
+        response["Content-Disposition"] = f'attachment; filename="{file_name}"'
+        return response
+
+
+class URILookupView(APIView):
+    """Reverse lookup of external (e.g. GND or VIAF) URIs: every Person and Source
+    carrying each URI, grouped by repository, with its merge cluster.
+
+    Takes repeated `uri` query params (GET) or a JSON list of URIs (POST).
+    On a repository route, only that repository's entities are included.
+
+    ✅ uri
+    """
+
+    renderer_classes = IPIF_RENDERERS
+
+    def get(self, request, repo=None):
+        return self.lookup(request.query_params.getlist("uri"), repo)
+
+    def post(self, request, repo=None):
+        uris = request.data
+        if not isinstance(uris, list) or not all(isinstance(u, str) for u in uris):
+            return Response(
+                status=400, data={"detail": "Request body must be a JSON list of URIs"}
+            )
+        return self.lookup(uris, repo)
+
+    def lookup(self, uris: List[str], repo=None) -> Response:
+        # Drop duplicates, keeping the requested order
+        uris = list(dict.fromkeys(uris))
+
+        if not uris:
+            return Response(
+                status=400, data={"detail": "Provide at least one URI to look up"}
+            )
+
+        if len(uris) > settings.IPIF_BATCH_MAX_IDS:
+            return Response(
+                status=400,
+                data={
+                    "detail": (
+                        f"Too many URIs: at most {settings.IPIF_BATCH_MAX_IDS}"
+                        " can be looked up in one request"
+                    )
+                },
+            )
+
+        if not_uris := [u for u in uris if not is_uri(u)]:
+            return Response(
+                status=400, data={"detail": f"Not URIs: {', '.join(not_uris)}"}
+            )
+
+        found = lookup_uris(uris, repo=repo)
+        return Response(
+            {
+                "results": [{"uri": u, **found[u]} for u in uris if u in found],
+                "missing": [u for u in uris if u not in found],
+            }
+        )
+
+
+class PersonGraphView(APIView):
+    """The neighbourhood of a person: the persons within `hops` links of it,
+    and the links between them (see ipif_hub.graph).
+
+    With no repository, `id` is resolved to a MergePerson, and each hop also
+    takes in the other persons of the same MergePersons.
+
+    ✅ id
+    ✅ hops
+    ✅ types (comma-separated edge types)
+    """
+
+    renderer_classes = IPIF_RENDERERS
+
+    def get(self, request, repo=None):
+        pk = request.query_params.get("id", "")
+        if not pk:
+            return Response(status=400, data={"detail": "Provide a person `id`"})
+
+        if repo == None and not is_uri(pk):
+            return NOT_URI_RESPONSE
+
+        try:
+            hops = get_size_param(request, "hops", 1, settings.IPIF_GRAPH_MAX_HOPS)
+        except InvalidSizeParam as e:
+            return Response(status=400, data={"detail": str(e)})
+
+        edge_types = None
+        if t := request.query_params.get("types"):
+            edge_types = [e.strip() for e in t.split(",")]
+            if unknown := [e for e in edge_types if e not in EDGE_TYPES]:
+                return Response(
+                    status=400,
+                    data={
+                        "detail": (
+                            f"Unknown edge type(s): {', '.join(unknown)}. "
+                            f"Edge types available: {', '.join(EDGE_TYPES)}"
+                        )
+                    },
+                )
+
+        _, ipif_type = get_index_and_ipif_type(Person, repo)
+        try:
+            entity_id = get_entity_id(resolve_document_ids([pk], ipif_type, repo)[pk])
+        except KeyError:
+            return Response(status=404)
+
+        if repo:
+            start_person_ids = [UUID(entity_id)]
+        else:
+            start_person_ids = list(
+                MergePerson.persons.through.objects.filter(
+                    mergeperson_id=entity_id
+                ).values_list("person_id", flat=True)
+            )
+
+        graph = get_neighbourhood(
+            start_person_ids,
+            hops=hops,
+            edge_types=edge_types,
+            max_nodes=settings.IPIF_GRAPH_MAX_NODES,
+            merge=not repo,
+        )
+        return Response({"@id": pk, "hops": hops, **graph})
+
+
+class ChangesView(APIView):
+    """Feed of entities created, updated or deleted since a token.
+
+    Each response includes a `next` token to pass as `since` on the following
+    request, and `more` to say whether there are further changes waiting.
+
+    ✅ since
+    ✅ size
+    """
+
+    renderer_classes = IPIF_RENDERERS
+
+    def get(self, request, repo=None):
+        try:
+            since = decode_change_token(request.query_params.get("since"))
+        except InvalidChangeToken as e:
+            return Response(status=400, data={"detail": str(e)})
+
+        try:
+            size = get_size_param(request, "size", 100, settings.IPIF_CHANGES_MAX_SIZE)
+        except InvalidSizeParam as e:
+            return Response(status=400, data={"detail": str(e)})
+
+        return Response(get_changes(since, repo=repo, size=size))
+
+
+# Facet name (as used in the `facet` query param) -> Solr field faceted on
+STATEMENT_FACET_FIELDS = {
+    "statementType": "statementType_facet",
+    "role": "role_facet",
+    "memberOf": "memberOf_facet",
+    "place": "place_facet",
+    "decade": "date_decade",
+}
+
+
+class StatementFacetsView(APIView):
+    """Counts of statements per statementType, role, memberOf, place and decade
+    (of `date_sortdate`), for the statements matching the given filters.
+
+    Takes the same statement filters as the statements list view, plus the
+    fulltext params; Solr does the counting, and no documents are returned.
+
+    ✅ facet (repeatable; defaults to all facets)
+    ✅ limit (number of values per facet)
+
+    ✅ statementText
+    ✅ relatesToPerson
+    ✅ memberOf
+    ✅ role
+    ✅ name
+    ✅ from
+    ✅ to
+    ✅ place
+
+    ✅ p
+    ✅ f
+    ✅ st
+    ✅ s
+    """
+
+    renderer_classes = IPIF_RENDERERS
+
+    def get(self, request, repo=None):
+        facets = request.query_params.getlist("facet") or list(STATEMENT_FACET_FIELDS)
+        if unknown := [f for f in facets if f not in STATEMENT_FACET_FIELDS]:
+            return Response(
+                status=400,
+                data={
+                    "detail": (
+                        f"Unknown facet(s): {', '.join(unknown)}. Facets available: "
+                        f"{', '.join(STATEMENT_FACET_FIELDS)}"
+                    )
+                },
+            )
+
+        try:
+            limit = get_size_param(request, "limit", 100, settings.IPIF_FACET_MAX_LIMIT)
+        except InvalidSizeParam as e:
+            return Response(status=400, data={"detail": str(e)})
+
+        search_queryset = (
+            SearchQuerySet()
+            .exclude(ipif_repo_slug="IPIFHUB_AUTOCREATED")
+            .filter(ipif_type="statement")
+        )
+
+        if repo:
+            search_queryset = search_queryset.filter(ipif_repo_slug=repo)
+
+        for p in ["st", "s", "f", "p"]:
+            if param := request.query_params.get(p):
+                search_queryset = search_queryset.filter(**{f"{p}__contains": param})
+
+        # As with the list view, the statement filters are resolved by the ORM,
+        # and the matching pks handed to Solr
+        if statement_filters := build_statement_filters(request):
+            queryset = Statement.objects.filter(
+                reduce(operator.and_, statement_filters)
+            )
+            if repo:
+                queryset = queryset.filter(ipif_repo__endpoint_slug=repo)
+            pks_for_solr_lookup = [r.id for r in queryset.distinct().only("id")]
+
+            if not pks_for_solr_lookup:
+                return Response({"count": 0, "facets": {f: [] for f in facets}})
+
+            search_queryset = search_queryset.filter(django_id__in=pks_for_solr_lookup)
+
+        for f in facets:
+            search_queryset = search_queryset.facet(
+                STATEMENT_FACET_FIELDS[f], mincount=1, limit=limit
+            )
+
+        query = run_search_queryset_without_documents(search_queryset)
+        field_counts = query.get_facet_counts().get("fields", {})
+
+        return Response(
+            {
+                "count": query.get_count(),
+                "facets": {
+                    f: [
+                        {"value": value, "count": count}
+                        for value, count in field_counts.get(
+                            STATEMENT_FACET_FIELDS[f], []
+                        )
+                    ]
+                    for f in facets
+                },
+            }
+        )
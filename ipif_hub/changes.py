@@ -0,0 +1,183 @@
+import base64
+import binascii
+import threading
+import zlib
+from typing import List, Optional
+
+from django.db import connection, transaction
+from haystack.query import SearchQuerySet
+
+from ipif_hub.documents import decode_document
+from ipif_hub.models import (
+    ChangeLogEntry,
+    Factoid,
+    MergePerson,
+    MergeSource,
+    Person,
+    Source,
+    Statement,
+)
+from ipif_hub.serializers import choose_merge_uri
+
+TRACKED_MODELS = (Person, Source, Statement, Factoid, MergePerson, MergeSource)
+
+REPO_FEED_TYPES = ["person", "source", "statement", "factoid"]
+HUB_FEED_TYPES = ["mergeperson", "mergesource", "statement", "factoid"]
+
+# Class id for pg_advisory_xact_lock(classid, objid), taken to number
+# committed entries
+NUMBERING_LOCK_CLASS = zlib.crc32(b"ipif_hub.changes.numbering") - 2**31
+
+
+class PendingNumbering(threading.local):
+    def __init__(self) -> None:
+        self.pending = False
+
+
+pending_numbering = PendingNumbering()
+
+
+class InvalidChangeToken(Exception):
+    pass
+
+
+def encode_change_token(seq: int) -> str:
+    return base64.urlsafe_b64encode(f"seq:{seq}".encode()).decode()
+
+
+def decode_change_token(token: Optional[str]) -> int:
+    """Returns the sequence number wrapped in a token (no token means from the start)"""
+    if not token:
+        return 0
+    try:
+        prefix, seq = base64.urlsafe_b64decode(token.encode()).decode().split(":")
+        if prefix != "seq":
+            raise ValueError
+        return int(seq)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidChangeToken(f"'{token}' is not a valid change token")
+
+
+def record_change(instance, deleted: bool = False) -> None:
+    """Logs that an entity's document has been (re)indexed or deleted,
+    replacing any earlier log entry for the same entity (in one upsert, so
+    concurrent reindexes of an entity can't leave two entries)"""
+    if not isinstance(instance, TRACKED_MODELS):
+        return
+
+    if isinstance(instance, (MergePerson, MergeSource)):
+        ipif_repo_slug = ""
+        # Merge entities lose their persons/sources before they are deleted,
+        # so a deleted one keeps the @id that was last logged (see below)
+        identifier = "" if deleted else choose_merge_uri(sorted(instance.uri_set))
+    else:
+        ipif_repo_slug = instance.ipif_repo_id
+        identifier = instance.identifier
+
+    table = connection.ops.quote_name(ChangeLogEntry._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {table} AS e
+                (entity_type, entity_id, identifier, ipif_repo_slug, action,
+                 changed_when)
+            VALUES (%s, %s, %s, %s, %s, now())
+            ON CONFLICT (entity_id) DO UPDATE SET
+                entity_type = EXCLUDED.entity_type,
+                identifier = COALESCE(NULLIF(EXCLUDED.identifier, ''), e.identifier),
+                ipif_repo_slug = EXCLUDED.ipif_repo_slug,
+                action = %s,
+                changed_when = EXCLUDED.changed_when,
+                commit_seq = NULL
+            """,
+            [
+                type(instance).__name__.lower(),
+                instance.pk,
+                identifier,
+                ipif_repo_slug,
+                "deleted" if deleted else "created",
+                "deleted" if deleted else "updated",
+            ],
+        )
+
+    # Numbered once the transaction commits: however many entries it wrote,
+    # only the first of these callbacks numbers them
+    pending_numbering.pending = True
+    transaction.on_commit(number_pending_changes)
+
+
+def number_pending_changes() -> None:
+    if pending_numbering.pending:
+        pending_numbering.pending = False
+        assign_commit_seqs()
+
+
+def assign_commit_seqs() -> None:
+    """Numbers the committed entries that have no commit_seq yet. Run after
+    each transaction that logs changes commits (and so also numbers anything
+    left unnumbered by a process that died before it could).
+
+    One transaction numbers at a time, and it only sees committed entries, so
+    numbers become visible in increasing order: once a reader has seen
+    commit_seq N, no entry will later appear below N (as could happen with
+    `seq`, when a long transaction commits)."""
+    table = connection.ops.quote_name(ChangeLogEntry._meta.db_table)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s, 0)", [NUMBERING_LOCK_CLASS])
+        cursor.execute(
+            f"""
+            UPDATE {table} SET commit_seq = nextval('ipif_hub_changelogentry_commit_seq')
+            WHERE seq IN (
+                SELECT seq FROM {table} WHERE commit_seq IS NULL ORDER BY seq
+            )
+            """
+        )
+
+
+def get_changes(since: int, repo: Optional[str] = None, size: int = 100) -> dict:
+    """Returns the changes logged after the `since` sequence number (a
+    commit_seq), oldest first, with the current document embedded for anything
+    not deleted. Entries only appear once numbered, after they commit."""
+    entries = ChangeLogEntry.objects.filter(commit_seq__gt=since).order_by("commit_seq")
+    if repo:
+        entries = entries.filter(ipif_repo_slug=repo, entity_type__in=REPO_FEED_TYPES)
+    else:
+        entries = entries.filter(entity_type__in=HUB_FEED_TYPES).exclude(
+            ipif_repo_slug="IPIFHUB_AUTOCREATED"
+        )
+
+    # Fetch one extra row to find out whether there's another page
+    page: List[ChangeLogEntry] = list(entries[: size + 1])
+    has_more = len(page) > size
+    page = page[:size]
+
+    # Get the current documents for everything not deleted in one Solr query
+    live_pks = [str(e.entity_id) for e in page if e.action != "deleted"]
+    documents = {}
+    if live_pks:
+        results = (
+            SearchQuerySet()
+            .filter(django_id__in=live_pks)
+            .values("pk", "pre_serialized")[: len(live_pks)]
+        )
+        documents = {r["pk"]: r["pre_serialized"] for r in results}
+
+    changes = []
+    for entry in page:
+        change = {
+            "seq": entry.commit_seq,
+            "action": entry.action,
+            "ipif_type": entry.entity_type,
+            "@id": entry.identifier,
+            "changed": entry.changed_when,
+        }
+        if entry.action != "deleted":
+            document = documents.get(str(entry.entity_id))
+            change["document"] = decode_document(document) if document else None
+        changes.append(change)
+
+    return {
+        "changes": changes,
+        "next": encode_change_token(page[-1].commit_seq if page else since),
+        "more": has_more,
+    }
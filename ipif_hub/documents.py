@@ -0,0 +1,193 @@
+"""Fast serialization of the IPIF documents stored in the index.
+
+The DRF serializers in serializers.py define the IPIF output of each entity,
+but going through them for every document indexed is slow: fields are
+introspected, nested serializers are built for every ref, and statements are
+serialized to depth 2 (each related person with its URIs and repository) only
+to keep the `@id` and label of each. The serializers here build the same
+documents, key for key and in the same order, as plain dicts straight from the
+(prefetched) instances, and `encode_document` encodes them with orjson.
+
+They are used in the same way as the DRF serializers
+(`Serializer(instance).data`, with the same `prefetch_instances` and
+`setup_queryset`). A test checks that each document, re-encoded with
+json.dumps, is byte for byte what the index stored before (json.dumps of the
+DRF serializer's output): the same keys, in the same order, with the same
+values.
+"""
+import orjson
+
+from ipif_hub.models import (
+    Factoid,
+    MergePerson,
+    MergeSource,
+    Person,
+    Source,
+    Statement,
+)
+from ipif_hub.serializers import (
+    MergePersonSerializer,
+    MergeSourceSerializer,
+    PrefetchProfileMixin,
+    choose_merge_uri,
+    factoid_refs_prefetch,
+)
+
+
+def encode_document(data) -> str:
+    """Encodes a document as compact JSON"""
+    return orjson.dumps(data).decode()
+
+
+def decode_document(serialized_document: str):
+    """Decodes a stored document (e.g. `pre_serialized`)"""
+    return orjson.loads(serialized_document)
+
+
+def date_representation(value):
+    """As DRF's DateField: dates as ISO strings, strings and None as they are"""
+    if not value:
+        return None
+    if isinstance(value, str):
+        return value
+    return value.isoformat()
+
+
+def created_modified(instance) -> dict:
+    return {
+        "createdBy": instance.createdBy,
+        "createdWhen": date_representation(instance.createdWhen),
+        "modifiedBy": instance.modifiedBy,
+        "modifiedWhen": date_representation(instance.modifiedWhen),
+    }
+
+
+def ref(instance) -> dict:
+    return {"@id": instance.identifier, "label": instance.label}
+
+
+def factoid_ref(factoid: Factoid) -> dict:
+    return {
+        **ref(factoid),
+        "person-ref": ref(factoid.person),
+        "source-ref": ref(factoid.source),
+        "statement-refs": [ref(s) for s in factoid.statements.all()],
+    }
+
+
+class DocumentSerializer(PrefetchProfileMixin):
+    def __init__(self, instance):
+        self.instance = instance
+
+    @property
+    def data(self) -> dict:
+        return self.to_representation(self.instance)
+
+    def to_representation(self, instance) -> dict:
+        raise NotImplementedError
+
+
+class FactoidDocumentSerializer(DocumentSerializer):
+    select_related = ["person", "source"]
+    prefetch_related = ["statements"]
+
+    def to_representation(self, instance: Factoid) -> dict:
+        refs = factoid_ref(instance)
+        return {
+            "@id": refs.pop("@id"),
+            "id": str(instance.id),
+            "label": refs.pop("label"),
+            **created_modified(instance),
+            **refs,
+        }
+
+
+class EntityDocumentSerializer(DocumentSerializer):
+    """Base for persons and sources"""
+
+    prefetch_related = ["uris", *factoid_refs_prefetch()]
+
+    def to_representation(self, instance) -> dict:
+        return {
+            **ref(instance),
+            "uris": [uri.uri for uri in instance.uris.all()],
+            "id": str(instance.id),
+            **created_modified(instance),
+            "factoid-refs": [factoid_ref(f) for f in instance.factoids.all()],
+        }
+
+
+class PersonDocumentSerializer(EntityDocumentSerializer):
+    pass
+
+
+class SourceDocumentSerializer(EntityDocumentSerializer):
+    pass
+
+
+class StatementDocumentSerializer(DocumentSerializer):
+    prefetch_related = ["places", "relatesToPerson", *factoid_refs_prefetch()]
+
+    def to_representation(self, instance: Statement) -> dict:
+        return {
+            "@id": instance.identifier,
+            "places": [
+                {"label": place.label, "uri": place.uri}
+                for place in instance.places.all()
+            ],
+            "label": instance.label,
+            **created_modified(instance),
+            "statementType": {
+                "uri": instance.statementType_uri,
+                "label": instance.statementType_label,
+            },
+            "name": instance.name,
+            "role": {"uri": instance.role_uri, "label": instance.role_label},
+            "date": {
+                "sortdate": date_representation(instance.date_sortdate),
+                "label": instance.date_label,
+            },
+            "memberOf": {
+                "uri": instance.memberOf_uri,
+                "label": instance.memberOf_label,
+            },
+            "statementText": instance.statementText,
+            "relatesToPerson": [
+                {"uri": person.identifier, "label": person.label}
+                for person in instance.relatesToPerson.all()
+            ],
+            "factoid-refs": [factoid_ref(f) for f in instance.factoids.all()],
+        }
+
+
+class MergeEntityDocumentSerializer(DocumentSerializer):
+    """Base for merge persons and merge sources, using the queries of their DRF
+    serializer"""
+
+    def to_representation(self, instance) -> dict:
+        uris = self.merge_serializer.get_uris(instance)
+        return {
+            "@id": choose_merge_uri(uris),
+            **created_modified(instance),
+            "uris": uris,
+            "factoid-refs": self.merge_serializer.get_factoid_refs(instance),
+        }
+
+
+class MergePersonDocumentSerializer(MergeEntityDocumentSerializer):
+    merge_serializer = MergePersonSerializer
+
+
+class MergeSourceDocumentSerializer(MergeEntityDocumentSerializer):
+    merge_serializer = MergeSourceSerializer
+
+
+def get_document_serializer_from_model(model):
+    return {
+        Factoid: FactoidDocumentSerializer,
+        Person: PersonDocumentSerializer,
+        Source: SourceDocumentSerializer,
+        Statement: StatementDocumentSerializer,
+        MergePerson: MergePersonDocumentSerializer,
+        MergeSource: MergeSourceDocumentSerializer,
+    }[model]
@@ -0,0 +1,99 @@
+"""Bulk export of a repository (or the merged hub view) as newline-delimited JSON.
+
+Each line is a small JSON object wrapping one IPIF document:
+
+    {"ipif_type": "person", "document": {...IPIF JSON...}}
+
+Documents come either from Solr (the default: `pre_serialized` is already JSON,
+so it is spliced in without decoding) or from the database, serializing each
+entity as the index would. Both sources page through their results — Solr with
+cursorMark, the database with server-side cursors — so memory use stays the same
+however large the repository.
+"""
+import zlib
+from typing import Iterable, Iterator, Optional
+
+from ipif_hub.documents import encode_document, get_document_serializer_from_model
+from ipif_hub.models import (
+    Factoid,
+    MergePerson,
+    MergeSource,
+    Person,
+    Source,
+    Statement,
+)
+from ipif_hub.search import iter_solr_documents
+
+REPO_EXPORT_MODELS = [Person, Source, Statement, Factoid]
+HUB_EXPORT_MODELS = [MergePerson, MergeSource, Statement, Factoid]
+
+EXPORT_SOURCES = ("solr", "db")
+
+# Number of documents/rows fetched per round trip
+EXPORT_CHUNK_SIZE = 500
+
+
+def build_ndjson_line(ipif_type: str, serialized_document: str) -> str:
+    return f'{{"ipif_type": "{ipif_type}", "document": {serialized_document}}}\n'
+
+
+def iter_solr_export(model, repo: Optional[str] = None) -> Iterator[str]:
+    ipif_type = model.__name__.lower()
+    fq = [f"django_ct:ipif_hub.{ipif_type}"]
+    if repo:
+        fq.append(f'ipif_repo_slug:"{repo}"')
+    elif model not in {MergePerson, MergeSource}:
+        fq.append('-ipif_repo_slug:"IPIFHUB_AUTOCREATED"')
+
+    for doc in iter_solr_documents(fq, rows=EXPORT_CHUNK_SIZE):
+        yield build_ndjson_line(ipif_type, doc["pre_serialized"])
+
+
+def iter_db_export(model, repo: Optional[str] = None) -> Iterator[str]:
+    ipif_type = model.__name__.lower()
+    serializer = get_document_serializer_from_model(model)
+
+    if repo:
+        queryset = model.objects.filter(ipif_repo__pk=repo)
+    elif model in {MergePerson, MergeSource}:
+        queryset = model.objects.all()
+    else:
+        queryset = model.objects.exclude(ipif_repo__pk="IPIFHUB_AUTOCREATED")
+
+    # iterator() skips prefetch_related, so prefetch for each chunk as we go
+    chunk = []
+    for instance in queryset.order_by("pk").iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        chunk.append(instance)
+        if len(chunk) == EXPORT_CHUNK_SIZE:
+            yield from serialize_chunk(ipif_type, serializer, chunk)
+            chunk = []
+    yield from serialize_chunk(ipif_type, serializer, chunk)
+
+
+def serialize_chunk(ipif_type: str, serializer, instances) -> Iterator[str]:
+    serializer.prefetch_instances(instances)
+    for instance in instances:
+        yield build_ndjson_line(ipif_type, encode_document(serializer(instance).data))
+
+
+def iter_export_lines(
+    repo: Optional[str] = None, source: str = "solr"
+) -> Iterator[str]:
+    """Yields one NDJSON line per entity: a repo's persons, sources, statements
+    and factoids, or, with no repo, the hub's merge persons and merge sources plus
+    all statements and factoids"""
+    if source not in EXPORT_SOURCES:
+        raise ValueError(f"Export source must be one of {', '.join(EXPORT_SOURCES)}")
+
+    iter_export = iter_solr_export if source == "solr" else iter_db_export
+    for model in REPO_EXPORT_MODELS if repo else HUB_EXPORT_MODELS:
+        yield from iter_export(model, repo)
+
+
+def gzip_stream(lines: Iterable[str]) -> Iterator[bytes]:
+    """Gzips a stream of lines as it goes"""
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for line in lines:
+        if chunk := compressor.compress(line.encode()):
+            yield chunk
+    yield compressor.flush()
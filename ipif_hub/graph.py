@@ -0,0 +1,174 @@
+"""The person graph: persons linked by their factoids' statements.
+
+Edges are kept in the PersonEdge table, rebuilt for a factoid each time it is
+(re)indexed, so walking the graph is one query per hop on that table, rather
+than the factoid/statement joins of the list views:
+
+- `relatesToPerson`: the factoid's person -> a person the statement relates to,
+  with the statement's role
+- `sharedStatement`: the factoid's person <-> the person of another factoid
+  with the same statement
+
+Edges are walked in both directions. On the hub (no repo), each hop also
+crosses to the other persons in the same MergePerson.
+"""
+from typing import Dict, Iterable, List, Optional, Set
+
+from django.db import transaction
+from django.db.models import Q
+
+from ipif_hub.models import Factoid, MergePerson, Person, PersonEdge
+
+EDGE_TYPES = ("relatesToPerson", "sharedStatement")
+
+
+def record_edges(instance) -> None:
+    """Replaces the edges derived from a factoid with its current ones"""
+    if not isinstance(instance, Factoid):
+        return
+
+    edges = []
+    for statement in instance.statements.prefetch_related(
+        "relatesToPerson", "factoids"
+    ):
+        role = statement.role_label or statement.role_uri or ""
+        for related in statement.relatesToPerson.all():
+            if related.pk != instance.person_id:
+                edges.append(
+                    PersonEdge(
+                        source_person_id=instance.person_id,
+                        target_person_id=related.pk,
+                        edge_type="relatesToPerson",
+                        role=role,
+                        statement=statement,
+                        factoid=instance,
+                    )
+                )
+        for other in statement.factoids.all():
+            if other.pk != instance.pk and other.person_id != instance.person_id:
+                edges.append(
+                    PersonEdge(
+                        source_person_id=instance.person_id,
+                        target_person_id=other.person_id,
+                        edge_type="sharedStatement",
+                        statement=statement,
+                        factoid=instance,
+                        other_factoid=other,
+                    )
+                )
+
+    with transaction.atomic():
+        # A sharedStatement edge is only kept once, from whichever of the two
+        # factoids was indexed last
+        PersonEdge.objects.filter(
+            Q(factoid=instance) | Q(other_factoid=instance)
+        ).delete()
+        PersonEdge.objects.bulk_create(edges)
+
+
+def get_merge_clusters(person_ids: Iterable) -> Dict:
+    """Maps each person in the MergePersons of the given persons to its
+    MergePerson's pk"""
+    through = MergePerson.persons.through
+    return dict(
+        through.objects.filter(
+            mergeperson_id__in=through.objects.filter(
+                person_id__in=list(person_ids)
+            ).values("mergeperson_id")
+        ).values_list("person_id", "mergeperson_id")
+    )
+
+
+def get_neighbourhood(
+    start_person_ids: Iterable,
+    hops: int = 1,
+    edge_types: Optional[List[str]] = None,
+    max_nodes: int = 500,
+    merge: bool = False,
+) -> dict:
+    """Walks the graph out from the given persons, returning the persons within
+    `hops` edges (with the hop each was first reached at) and the edges
+    between them. Stops adding persons at `max_nodes`, marking the result
+    as truncated."""
+    hop_reached: Dict = {pk: 0 for pk in start_person_ids}
+    merge_ids: Dict = {}
+    if merge:
+        merge_ids = get_merge_clusters(hop_reached)
+        for pk in merge_ids:
+            hop_reached.setdefault(pk, 0)
+
+    frontier: Set = set(hop_reached)
+    edges: Dict = {}
+    truncated = False
+
+    for hop in range(1, hops + 1):
+        if not frontier:
+            break
+
+        rows = PersonEdge.objects.filter(
+            Q(source_person_id__in=frontier) | Q(target_person_id__in=frontier)
+        )
+        if edge_types:
+            rows = rows.filter(edge_type__in=edge_types)
+
+        next_frontier = set()
+        for row in rows.values_list(
+            "pk",
+            "source_person_id",
+            "target_person_id",
+            "edge_type",
+            "role",
+            "statement__identifier",
+        ):
+            edges[row[0]] = row
+            for pk in row[1:3]:
+                if pk in hop_reached:
+                    continue
+                if len(hop_reached) >= max_nodes:
+                    truncated = True
+                    continue
+                hop_reached[pk] = hop
+                next_frontier.add(pk)
+
+        if merge and next_frontier:
+            clusters = get_merge_clusters(next_frontier)
+            merge_ids.update(clusters)
+            for pk in clusters:
+                if pk not in hop_reached and len(hop_reached) < max_nodes:
+                    hop_reached[pk] = hop
+                    next_frontier.add(pk)
+
+        frontier = next_frontier
+
+    persons = {
+        pk: (identifier, label, repo)
+        for pk, identifier, label, repo in Person.objects.filter(
+            pk__in=list(hop_reached)
+        ).values_list("pk", "identifier", "label", "ipif_repo_id")
+    }
+
+    nodes = []
+    for pk, hop in hop_reached.items():
+        if pk not in persons:
+            continue
+        identifier, label, repo = persons[pk]
+        node = {"@id": identifier, "label": label, "repo": repo, "hop": hop}
+        if merge:
+            node["mergePerson"] = str(merge_ids[pk]) if pk in merge_ids else None
+        nodes.append(node)
+
+    return {
+        "nodes": sorted(nodes, key=lambda n: (n["hop"], n["@id"])),
+        "edges": [
+            {
+                "source": persons[source][0],
+                "target": persons[target][0],
+                "type": edge_type,
+                "role": role,
+                "statement": statement,
+            }
+            for _, source, target, edge_type, role, statement in edges.values()
+            if source in persons and target in persons
+        ],
+        "truncated": truncated,
+    }
@@ -0,0 +1,116 @@
+"""Expansion of the `include` param: embedding the documents a response refers to.
+
+Documents only carry refs (`@id` and label) to their related entities: a person
+has `factoid-refs`, each with a `person-ref`, `source-ref` and `statement-refs`,
+and a factoid has the same refs at the top level. Given e.g.
+`include=factoids,statements`, the referenced documents are resolved with the
+identifier table and fetched from Solr in one go, and added to each document
+under `included`:
+
+    {"@id": ..., "factoid-refs": [...], "included": {"factoids": [...], "statements": [...]}}
+
+Only the refs of the returned documents themselves are followed (one level
+deep), and at most `settings.IPIF_INCLUDE_MAX_DOCUMENTS` documents are
+included per response; a document missing some of its includes because of
+that is marked with `"included-truncated": true`.
+"""
+from typing import Dict, List, Optional
+
+from django.conf import settings
+
+from ipif_hub.documents import decode_document
+from ipif_hub.resolution import resolve_documents_by_type
+
+# Name used in the `include` param -> ipif_type of the included documents
+INCLUDE_TYPES = {
+    "factoids": "factoid",
+    "statements": "statement",
+    "sources": "source",
+    "persons": "person",
+}
+
+
+class InvalidInclude(Exception):
+    pass
+
+
+def parse_include(param: Optional[str]) -> List[str]:
+    """Splits a comma-separated `include` param, checking each name"""
+    if not param:
+        return []
+    include = list(dict.fromkeys(i.strip() for i in param.split(",") if i.strip()))
+    if unknown := [i for i in include if i not in INCLUDE_TYPES]:
+        raise InvalidInclude(
+            f"Cannot include {', '.join(unknown)}: "
+            f"include must be a comma-separated list of {', '.join(INCLUDE_TYPES)}"
+        )
+    return include
+
+
+def collect_refs(document: dict, include: List[str]) -> Dict[str, List[str]]:
+    """Returns the ids a document refers to, for each of the included types"""
+    if "person-ref" in document:
+        # A factoid: its refs are at the top level
+        factoid_refs = [document]
+        factoid_ids = []
+    else:
+        factoid_refs = document.get("factoid-refs", [])
+        factoid_ids = [f["@id"] for f in factoid_refs]
+
+    refs = {
+        "factoids": factoid_ids,
+        "persons": [f["person-ref"]["@id"] for f in factoid_refs],
+        "sources": [f["source-ref"]["@id"] for f in factoid_refs],
+        "statements": [s["@id"] for f in factoid_refs for s in f["statement-refs"]],
+    }
+    return {
+        name: [
+            ref_id
+            for ref_id in dict.fromkeys(refs[name])
+            if ref_id and ref_id != document.get("@id")
+        ]
+        for name in include
+    }
+
+
+def include_related(
+    documents: List[dict], include: List[str], repo: Optional[str] = None
+) -> None:
+    """Adds the documents referred to by each document, of the included types,
+    under `included` (in place)"""
+    if not include:
+        return
+
+    budget = settings.IPIF_INCLUDE_MAX_DOCUMENTS
+    wanted: Dict[str, Dict[str, None]] = {name: {} for name in include}
+    refs_per_document = []
+
+    for document in documents:
+        refs = collect_refs(document, include)
+        for name, ref_ids in refs.items():
+            for ref_id in ref_ids:
+                if ref_id in wanted[name]:
+                    continue
+                if budget <= 0:
+                    document["included-truncated"] = True
+                    continue
+                wanted[name][ref_id] = None
+                budget -= 1
+        refs_per_document.append(refs)
+
+    resolved = {
+        ipif_type: {key: decode_document(doc) for key, doc in docs.items()}
+        for ipif_type, docs in resolve_documents_by_type(
+            {INCLUDE_TYPES[name]: list(ids) for name, ids in wanted.items()}, repo
+        ).items()
+    }
+
+    for document, refs in zip(documents, refs_per_document):
+        document["included"] = {
+            name: [
+                resolved[INCLUDE_TYPES[name]][ref_id]
+                for ref_id in ref_ids
+                if ref_id in resolved[INCLUDE_TYPES[name]]
+            ]
+            for name, ref_ids in refs.items()
+        }
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from ipif_hub.management.utils.dedupe_uris import dedupe_uris
+from ipif_hub.models import URI, Person, Source
+
+
+class Command(BaseCommand):
+    help = (
+        "Merges duplicate URI rows into one, keeping their persons and sources "
+        "(migration 0006 does the same, before URI.uri is made unique)"
+    )
+
+    def handle(self, *args, **options) -> None:
+        removed = dedupe_uris(URI, [Person, Source])
+        self.stdout.write(f"Removed {removed} duplicate URI rows")
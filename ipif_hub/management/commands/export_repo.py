@@ -0,0 +1,56 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from ipif_hub.export import EXPORT_SOURCES, gzip_stream, iter_export_lines
+from ipif_hub.models import IpifRepo
+
+
+class Command(BaseCommand):
+    help = "Exports a repository (or the merged hub view) as IPIF NDJSON"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "endpoint_id",
+            type=str,
+            nargs="?",
+            default=None,
+            help="Repository to export; omit to export the merged hub view",
+        )
+        parser.add_argument(
+            "--output",
+            type=str,
+            default=None,
+            help="File to write to (default: stdout)",
+        )
+        parser.add_argument("--gzip", action="store_true", help="Gzip the output")
+        parser.add_argument(
+            "--source",
+            type=str,
+            choices=EXPORT_SOURCES,
+            default="solr",
+            help="Read documents from the Solr index or the database",
+        )
+
+    def handle(
+        self,
+        *args,
+        endpoint_id: str = None,
+        output: str = None,
+        gzip: bool = False,
+        source: str = "solr",
+        **options,
+    ) -> None:
+        if endpoint_id and not IpifRepo.objects.filter(pk=endpoint_id).exists():
+            raise CommandError(f"Repository '{endpoint_id}' does not exist")
+
+        lines = iter_export_lines(endpoint_id, source=source)
+        chunks = gzip_stream(lines) if gzip else (line.encode() for line in lines)
+
+        f = open(output, "wb") if output else sys.stdout.buffer
+        try:
+            for chunk in chunks:
+                f.write(chunk)
+        finally:
+            if output:
+                f.close()
@@ -2,11 +2,14 @@ import json
 
 from django.core.management.base import BaseCommand, CommandError, CommandParser
 
+from ipif_hub.management.utils.copy_ingest import copy_ingest_data
 from ipif_hub.management.utils.ingest_data import (
     DataFormatError,
     DataIntegrityError,
     ingest_data,
 )
+from ipif_hub.management.utils.ingest_events import collect_events
+from ipif_hub.management.utils.pipeline import ingest_data_in_parallel
 
 
 class Command(BaseCommand):
@@ -15,12 +18,29 @@ class Command(BaseCommand):
     def add_arguments(self, parser: CommandParser) -> None:
         parser.add_argument("endpoint_id", type=str)
         parser.add_argument("file_path", type=str)
+        mode = parser.add_mutually_exclusive_group()
+        mode.add_argument(
+            "--copy",
+            action="store_true",
+            help="Load through PostgreSQL COPY and staging tables (for large files)",
+        )
+        mode.add_argument(
+            "--parallel",
+            action="store_true",
+            help="Ingest in chunks on a pool of worker threads",
+        )
+        parser.add_argument(
+            "--workers", type=int, default=None, help="Worker threads for --parallel"
+        )
 
     def handle(
         self,
         *args,
         endpoint_id: str = None,
         file_path: str = None,
+        copy: bool = False,
+        parallel: bool = False,
+        workers: int = None,
         **options,
     ) -> None:
         try:
@@ -32,8 +52,15 @@ class Command(BaseCommand):
             raise CommandError(f"'{str(file_path)}' does not exist")
 
         try:
-            ingest_data(endpoint_id, data)
+            with collect_events() as events:
+                if copy:
+                    copy_ingest_data(endpoint_id, data)
+                elif parallel:
+                    ingest_data_in_parallel(endpoint_id, data, workers=workers)
+                else:
+                    ingest_data(endpoint_id, data)
         except DataFormatError as e:
             raise CommandError(f"DataFormatError: {e.args[0]}")
         except DataIntegrityError as e:
             raise CommandError(f"DataIntegrity Error: {e.args[0]}")
+        self.stdout.write(str(events))
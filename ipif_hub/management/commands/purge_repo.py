@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from ipif_hub.models import IngestionJob, IpifRepo
+from ipif_hub.tasks import purge_repo_task
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes all persons, sources, statements and factoids of a repository "
+        "(and their documents) as a background job"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("endpoint_id", type=str)
+        parser.add_argument(
+            "--wait",
+            action="store_true",
+            help="Run the job here rather than in a Celery worker",
+        )
+
+    def handle(
+        self, *args, endpoint_id: str = None, wait: bool = False, **options
+    ) -> None:
+        try:
+            repo = IpifRepo.objects.get(pk=endpoint_id)
+        except IpifRepo.DoesNotExist:
+            raise CommandError(f"Repository '{endpoint_id}' does not exist")
+
+        job = IngestionJob(ipif_repo=repo, job_type="repo_purge")
+        job.save()
+
+        if wait:
+            purge_repo_task(repo.pk, job.id)
+            job.refresh_from_db()
+            self.stdout.write(job.job_output)
+        else:
+            purge_repo_task.delay(repo.pk, job.id)
+            self.stdout.write(f"Purging '{repo.pk}'. Track job at /job/{job.id}/")
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from ipif_hub.changes import TRACKED_MODELS
+from ipif_hub.models import EntityIdentifier, IpifRepo, MergePerson, MergeSource
+from ipif_hub.resolution import identifier_cache, record_identifiers
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the identifier resolution table from the database"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "endpoint_id",
+            type=str,
+            nargs="?",
+            default=None,
+            help="Repository to rebuild; omit to rebuild everything",
+        )
+
+    def handle(self, *args, endpoint_id: str = None, **options) -> None:
+        if endpoint_id and not IpifRepo.objects.filter(pk=endpoint_id).exists():
+            raise CommandError(f"Repository '{endpoint_id}' does not exist")
+
+        if endpoint_id:
+            EntityIdentifier.objects.filter(ipif_repo_slug=endpoint_id).delete()
+        else:
+            EntityIdentifier.objects.all().delete()
+
+        for model in TRACKED_MODELS:
+            if model in {MergePerson, MergeSource}:
+                if endpoint_id:
+                    continue
+                queryset = model.objects.all()
+            elif endpoint_id:
+                queryset = model.objects.filter(ipif_repo__pk=endpoint_id)
+            else:
+                queryset = model.objects.all()
+
+            count = 0
+            for instance in queryset.iterator(chunk_size=500):
+                record_identifiers(instance)
+                count += 1
+            self.stdout.write(f"{model.__name__}: {count}")
+
+        identifier_cache.clear()
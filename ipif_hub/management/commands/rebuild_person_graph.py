@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from ipif_hub.graph import record_edges
+from ipif_hub.models import Factoid, PersonEdge
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the person graph edges from the database"
+
+    def handle(self, *args, **options) -> None:
+        PersonEdge.objects.all().delete()
+
+        count = 0
+        for factoid in Factoid.objects.iterator(chunk_size=500):
+            record_edges(factoid)
+            count += 1
+        self.stdout.write(f"{PersonEdge.objects.count()} edges from {count} factoids")
@@ -0,0 +1,96 @@
+from typing import Dict, Iterator, List, Set
+
+from django.db import connection, transaction
+
+from ipif_hub.management.utils.ingest_events import note_event
+from ipif_hub.models import Factoid, IpifRepo, Person, Source, Statement
+from ipif_hub.signals.deletion_batch import batch_deletes
+
+# Deleted in this order, so the factoids referring to a person, source or
+# statement are gone (and known about) before it is
+SYNC_ORDER = [
+    (Factoid, "factoids"),
+    (Statement, "statements"),
+    (Person, "persons"),
+    (Source, "sources"),
+]
+
+# Entities are deleted (and their reindexing queued) this many pks at a time
+DELETE_BATCH_SIZE = 1000
+
+
+def collect_local_ids(data) -> Dict[str, Set[str]]:
+    """The `@id`s in an upload, by type. Needs calling before ingesting, which
+    replaces each item's `@id` with a `local_id`"""
+    return {
+        key: {
+            item.get("@id", item.get("local_id"))
+            for item in data[key]
+            if isinstance(item, dict)
+        }
+        for _, key in SYNC_ORDER
+        if key in data
+    }
+
+
+def batched(pks: List) -> Iterator[List]:
+    for start in range(0, len(pks), DELETE_BATCH_SIZE):
+        yield pks[start : start + DELETE_BATCH_SIZE]
+
+
+@transaction.atomic
+def remove_missing_entities(ipif_repo: IpifRepo, local_ids: Dict[str, Set[str]]):
+    """Deletes the repo's entities (of the types present in the upload) that are
+    not in `local_ids`, as for a canonical batch, and queues reindexing of
+    the remaining entities that referred to them"""
+    # The stored local_ids are compared with the upload's in the database, so
+    # only the pks of the entities to delete come back
+    missing = {}
+    with connection.cursor() as cursor:
+        for entity_class, key in SYNC_ORDER:
+            if key not in local_ids:
+                continue
+            cursor.execute(
+                f"""
+                SELECT id FROM {connection.ops.quote_name(entity_class._meta.db_table)}
+                WHERE ipif_repo_id = %s AND NOT (local_id = ANY(%s))
+                """,
+                [ipif_repo.pk, list(local_ids[key])],
+            )
+            missing[entity_class] = [row[0] for row in cursor.fetchall()]
+    delete_entities(missing)
+
+
+@transaction.atomic
+def delete_entities(missing: Dict[type, List]):
+    """Deletes the entities with the given pks, by class, and queues reindexing
+    of the remaining entities that referred to them"""
+
+    # Imported here as the handlers module imports the tasks, which import this
+    from ipif_hub.signals.handlers import celeryCallBundle
+
+    # Persons, sources and statements keep references to deleted factoids in
+    # their documents
+    affected = {Person: set(), Source: set(), Statement: set()}
+    for pks in batched(missing.get(Factoid, [])):
+        factoids = Factoid.objects.filter(pk__in=pks)
+        affected[Person].update(factoids.values_list("person_id", flat=True))
+        affected[Source].update(factoids.values_list("source_id", flat=True))
+        affected[Statement].update(factoids.values_list("statements", flat=True))
+    affected[Statement].discard(None)
+
+    with batch_deletes():
+        for entity_class, _ in SYNC_ORDER:
+            pks = missing.get(entity_class)
+            if pks:
+                note_event(f"Deleting {len(pks)} {entity_class.__name__.lower()}s")
+            for batch in batched(pks or []):
+                entity_class.objects.filter(pk__in=batch).delete()
+
+    for person in Person.objects.filter(pk__in=affected[Person]):
+        celeryCallBundle.add_person(person)
+    for source in Source.objects.filter(pk__in=affected[Source]):
+        celeryCallBundle.add_source(source)
+    for statement in Statement.objects.filter(pk__in=affected[Statement]):
+        celeryCallBundle.add_statement(statement)
+    transaction.on_commit(celeryCallBundle.call)
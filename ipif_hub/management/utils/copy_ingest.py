@@ -0,0 +1,778 @@
+"""Bulk ingestion through PostgreSQL COPY, for very large repositories.
+
+ingest_data() goes through the ORM one entity (and one m2m link) at a time.
+copy_ingest_data() takes the same IPIF JSON, but:
+
+1. validates every item, as ingest_data does, then turns each into rows,
+   streaming them with COPY into staging tables
+2. applies the staged rows with set-based SQL: an INSERT ... ON CONFLICT per
+   entity type, which leaves alone any row whose inputContentHash hasn't
+   changed, then a DELETE/INSERT of the m2m links of the rows that did change
+3. if the batch is canonical, deletes the stored entities (of the types in
+   the batch) that no staged row matches, through the ORM, so their signals
+   run as they would for ingest_data
+4. does for the changed rows what the model signals would have done (merge
+   person/source grouping, queueing reindexing)
+
+The staging tables are TEMPORARY ... ON COMMIT DROP: like UNLOGGED tables they
+are not written to the WAL, and as they are private to the session, two ingests
+can run at once.
+
+Unlike ingest_data, a changed entity is replaced outright: all its fields and
+links are set from the input.
+"""
+import uuid
+from io import StringIO
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from django.core.exceptions import ValidationError
+from django.db import connection, models, transaction
+
+from ipif_hub.management.utils.canonical_sync import SYNC_ORDER, delete_entities
+from ipif_hub.management.utils.ingest_data import (
+    DataFormatError,
+    DataIntegrityError,
+    dangling_reference_error,
+    hash_content,
+)
+from ipif_hub.management.utils.ingest_events import IngestEvents, current_events
+from ipif_hub.management.utils.validation import (
+    SchemaValidationError,
+    validate_batch,
+)
+from ipif_hub.models import (
+    URI,
+    Factoid,
+    IpifRepo,
+    Person,
+    Place,
+    Source,
+    Statement,
+    get_ipif_hub_repo_AUTOCREATED_instance,
+)
+from ipif_hub.receipts import forget_digest_receipts
+from ipif_hub.signals.handler_utils import (
+    build_repo_uris,
+    handle_merge_person_from_person_update,
+    handle_merge_source_from_source_update,
+    split_merge_person_on_uri_delete,
+    split_merge_source_on_uri_delete,
+)
+
+COPY_CHUNK_SIZE = 10000
+
+AUTOCREATED_BY = "IPIFHUB_AUTOCREATED"
+
+ENTITY_COLUMNS = [
+    ("seq", "bigint"),
+    ("id", "uuid"),
+    ("local_id", "text"),
+    ("identifier", "text"),
+    ("label", "text"),
+    ("createdBy", "text"),
+    ("createdWhen", "date"),
+    ("modifiedBy", "text"),
+    ("modifiedWhen", "date"),
+    ("inputContentHash", "text"),
+]
+
+STATEMENT_COLUMNS = ENTITY_COLUMNS + [
+    ("statementType_uri", "text"),
+    ("statementType_label", "text"),
+    ("name", "text"),
+    ("role_uri", "text"),
+    ("role_label", "text"),
+    ("date_sortdate", "date"),
+    ("date_label", "text"),
+    ("memberOf_uri", "text"),
+    ("memberOf_label", "text"),
+    ("statementText", "text"),
+]
+
+FACTOID_COLUMNS = ENTITY_COLUMNS + [
+    ("person_ref", "text"),
+    ("person_identifier", "text"),
+    ("source_ref", "text"),
+    ("source_identifier", "text"),
+]
+
+# The links of a staged entity (by identifier) to what `key` identifies;
+# `label`, `content_hash` and `new_id` are only needed by some link types
+LINK_COLUMNS = [
+    ("identifier", "text"),
+    ("key", "text"),
+    ("label", "text"),
+    ("content_hash", "text"),
+    ("new_id", "uuid"),
+]
+
+
+def qn(name: str) -> str:
+    return connection.ops.quote_name(name)
+
+
+def table(model) -> str:
+    return qn(model._meta.db_table)
+
+
+def copy_value(value) -> str:
+    """A value in COPY's text format"""
+    if value is None:
+        return "\\N"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def create_staging_table(cursor, name: str, columns: List[Tuple[str, str]]) -> None:
+    column_defs = ", ".join(f"{qn(column)} {type_}" for column, type_ in columns)
+    # Left over if an earlier ingest ran in the same (outer) transaction
+    cursor.execute(f"DROP TABLE IF EXISTS {qn(name)}")
+    cursor.execute(f"CREATE TEMPORARY TABLE {qn(name)} ({column_defs}) ON COMMIT DROP")
+
+
+def copy_rows(cursor, name: str, columns: List[Tuple[str, str]], rows) -> int:
+    """Streams rows (tuples in the order of `columns`) into a staging table,
+    with one COPY per COPY_CHUNK_SIZE rows. Returns the number of rows."""
+    sql = f"COPY {qn(name)} ({', '.join(qn(c) for c, _ in columns)}) FROM STDIN"
+    buffer = StringIO()
+    count = 0
+    for row in rows:
+        buffer.write("\t".join(copy_value(value) for value in row))
+        buffer.write("\n")
+        count += 1
+        if count % COPY_CHUNK_SIZE == 0:
+            buffer.seek(0)
+            cursor.copy_expert(sql, buffer)
+            buffer = StringIO()
+    if buffer.tell():
+        buffer.seek(0)
+        cursor.copy_expert(sql, buffer)
+    return count
+
+
+def clean_date(value, entity_name: str):
+    if value is None:
+        return None
+    try:
+        return models.DateField().to_python(value)
+    except ValidationError as e:
+        raise DataFormatError(f"IPIF JSON '{entity_name}' error: {e}")
+
+
+def build_identifier(entity_class, ipif_repo: IpifRepo, local_id: str) -> str:
+    return entity_class(ipif_repo=ipif_repo).build_uri_id_from_slug(local_id)
+
+
+def with_local_id(data: Dict) -> Dict:
+    data = dict(data)
+    data["local_id"] = data.pop("@id")
+    return data
+
+
+def entity_row(seq: int, identifier: str, data: Dict, input_content_hash, name):
+    return (
+        seq,
+        uuid.uuid4(),
+        data["local_id"],
+        identifier,
+        data.get("label", ""),
+        data["createdBy"],
+        clean_date(data["createdWhen"], name),
+        data["modifiedBy"],
+        clean_date(data["modifiedWhen"], name),
+        input_content_hash,
+    )
+
+
+def stage_persons_or_sources(entity_class, items: Iterable, ipif_repo, links: List):
+    """Yields the staging rows for persons or sources, adding their URIs (those
+    given and those the hub adds) to `links`"""
+    for seq, data in enumerate(items):
+        data = with_local_id(data)
+        uris = data.pop("uris", [])
+        input_content_hash = hash_content(data)
+
+        entity = entity_class(local_id=data["local_id"], ipif_repo=ipif_repo)
+        entity.identifier = build_identifier(entity_class, ipif_repo, entity.local_id)
+        for uri in dict.fromkeys([*uris, *build_repo_uris(entity)]):
+            links.append((entity.identifier, uri, None, None, None))
+
+        yield entity_row(
+            seq, entity.identifier, data, input_content_hash, entity_class.__name__
+        )
+
+
+def stage_statements(items: Iterable, ipif_repo, places: List, persons: List):
+    """Yields the staging rows for statements, adding their places and related
+    persons to `places` and `persons`"""
+    for seq, data in enumerate(items):
+        data = with_local_id(data)
+        input_content_hash = hash_content(data)
+        identifier = build_identifier(Statement, ipif_repo, data["local_id"])
+
+        for place in data.pop("places", []):
+            places.append((identifier, place["uri"], place.get("label"), None, None))
+        for person in data.pop("relatesToPerson", []):
+            persons.append(
+                (
+                    identifier,
+                    person["uri"],
+                    person["label"],
+                    hash_content(person),
+                    uuid.uuid4(),
+                )
+            )
+
+        statement_type = data.get("statementType") or {}
+        role = data.get("role") or {}
+        date = data.get("date") or {}
+        member_of = data.get("memberOf") or {}
+        yield entity_row(seq, identifier, data, input_content_hash, "statement") + (
+            statement_type.get("uri"),
+            statement_type.get("label"),
+            data.get("name", ""),
+            role.get("uri"),
+            role.get("label"),
+            clean_date(date.get("sortdate"), "statement"),
+            date.get("label"),
+            member_of.get("uri"),
+            member_of.get("label"),
+            data.get("statementText"),
+        )
+
+
+def stage_factoids(items: Iterable, ipif_repo, statements: List):
+    """Yields the staging rows for factoids, adding their statement refs to
+    `statements`"""
+    for seq, data in enumerate(items):
+        data = with_local_id(data)
+        input_content_hash = hash_content(data)
+        identifier = build_identifier(Factoid, ipif_repo, data["local_id"])
+
+        for statement in data["statement-refs"]:
+            statements.append(
+                (
+                    identifier,
+                    build_identifier(Statement, ipif_repo, statement["@id"]),
+                    statement["@id"],
+                    None,
+                    None,
+                )
+            )
+
+        person_ref = data["person-ref"]["@id"]
+        source_ref = data["source-ref"]["@id"]
+        yield entity_row(seq, identifier, data, input_content_hash, "factoid") + (
+            person_ref,
+            build_identifier(Person, ipif_repo, person_ref),
+            source_ref,
+            build_identifier(Source, ipif_repo, source_ref),
+        )
+
+
+def stage(cursor, name: str, columns, rows) -> int:
+    create_staging_table(cursor, name, columns)
+    return copy_rows(cursor, name, columns, rows)
+
+
+def upsert_entities(
+    cursor,
+    entity_class,
+    stage_name: str,
+    columns: List[str],
+    ipif_repo,
+    select: Dict[str, str] = None,
+    joins: str = "",
+) -> None:
+    """Applies the staged rows to the entity table, inserting new entities and
+    updating those whose inputContentHash has changed, and records the ids of
+    both in `changed_<stage_name>` (with whether each was inserted). Then gives the staged rows the ids of the
+    rows they correspond to."""
+    select = select or {}
+    target_columns = ["id", "ipif_repo_id", "hubIngestedWhen", "hubModifiedWhen"]
+    select_exprs = ["s.id", "%s", "now()", "now()"]
+    for column in columns:
+        target_columns.append(column)
+        select_exprs.append(select.get(column, f"s.{qn(column)}"))
+    updates = ", ".join(
+        f"{qn(column)} = EXCLUDED.{qn(column)}"
+        for column in target_columns
+        if column not in ("id", "ipif_repo_id", "hubIngestedWhen")
+    )
+
+    changed = qn(f"changed_{stage_name}")
+    create_staging_table(
+        cursor, f"changed_{stage_name}", [("id", "uuid"), ("inserted", "boolean")]
+    )
+    cursor.execute(
+        f"""
+        WITH latest AS (
+            SELECT DISTINCT ON (identifier) * FROM {qn(stage_name)}
+            ORDER BY identifier, seq DESC
+        ),
+        applied AS (
+            INSERT INTO {table(entity_class)} ({", ".join(map(qn, target_columns))})
+            SELECT {", ".join(select_exprs)} FROM latest s {joins}
+            ON CONFLICT (ipif_repo_id, identifier) DO UPDATE SET {updates}
+            WHERE {table(entity_class)}."inputContentHash"
+                IS DISTINCT FROM EXCLUDED."inputContentHash"
+            RETURNING id, xmax = 0 AS inserted
+        )
+        INSERT INTO {changed} SELECT id, inserted FROM applied
+        """,
+        [ipif_repo.pk] * (1 + joins.count("%s")),
+    )
+    cursor.execute(
+        f"""
+        UPDATE {qn(stage_name)} s SET id = t.id FROM {table(entity_class)} t
+        WHERE t.ipif_repo_id = %s AND t.identifier = s.identifier
+        """,
+        [ipif_repo.pk],
+    )
+
+
+def sync_links(
+    cursor,
+    entity_class,
+    field_name: str,
+    stage_name: str,
+    links_name: str,
+    targets_sql: str,
+    params: List,
+    removed_name: str = None,
+) -> None:
+    """Sets the `field_name` m2m links of the changed entities to the staged
+    ones. `targets_sql` selects (key, target_id) for the link targets. If
+    `removed_name` is given, the ids of entities that lose a link are added to
+    that table."""
+    field = entity_class._meta.get_field(field_name)
+    through = table(field.remote_field.through)
+    owner = qn(field.m2m_column_name())
+    target = qn(field.m2m_reverse_name())
+    changed = qn(f"changed_{stage_name}")
+
+    cursor.execute(
+        f"""
+        CREATE TEMPORARY TABLE wanted_links ON COMMIT DROP AS
+        SELECT DISTINCT s.id AS owner_id, t.target_id
+        FROM {qn(links_name)} l
+        JOIN {qn(stage_name)} s ON s.identifier = l.identifier
+        JOIN {changed} c ON c.id = s.id
+        JOIN ({targets_sql}) t ON t.key = l.key
+        """,
+        params,
+    )
+    delete = f"""
+        DELETE FROM {through} x USING {changed} c
+        WHERE x.{owner} = c.id AND NOT EXISTS (
+            SELECT 1 FROM wanted_links w
+            WHERE w.owner_id = x.{owner} AND w.target_id = x.{target}
+        )
+    """
+    if removed_name:
+        delete = f"""
+            WITH removed AS ({delete} RETURNING x.{owner} AS id)
+            INSERT INTO {qn(removed_name)} SELECT DISTINCT id FROM removed
+        """
+    cursor.execute(delete)
+    cursor.execute(
+        f"""
+        INSERT INTO {through} ({owner}, {target})
+        SELECT owner_id, target_id FROM wanted_links ON CONFLICT DO NOTHING
+        """
+    )
+    cursor.execute("DROP TABLE wanted_links")
+
+
+def insert_uris(cursor, links_name: str, stage_name: str) -> None:
+    """Adds the URIs linked to the changed entities of a stage"""
+    cursor.execute(
+        f"""
+        INSERT INTO {table(URI)} (uri)
+        SELECT DISTINCT l.key FROM {qn(links_name)} l
+        JOIN {qn(stage_name)} s ON s.identifier = l.identifier
+        JOIN {qn(f"changed_{stage_name}")} c ON c.id = s.id
+        ON CONFLICT (uri) DO NOTHING
+        """
+    )
+
+
+def apply_persons_or_sources(cursor, entity_class, ipif_repo) -> None:
+    name = entity_class.__name__.lower()
+    upsert_entities(
+        cursor,
+        entity_class,
+        name,
+        [column for column, _ in ENTITY_COLUMNS if column not in ("seq", "id")],
+        ipif_repo,
+    )
+    insert_uris(cursor, f"{name}_uris", name)
+    create_staging_table(cursor, f"removed_{name}_uris", [("id", "uuid")])
+    sync_links(
+        cursor,
+        entity_class,
+        "uris",
+        name,
+        f"{name}_uris",
+        f"SELECT uri AS key, id AS target_id FROM {table(URI)}",
+        [],
+        removed_name=f"removed_{name}_uris",
+    )
+
+
+def apply_statements(cursor, ipif_repo, autocreated_repo) -> None:
+    upsert_entities(
+        cursor,
+        Statement,
+        "statement",
+        [column for column, _ in STATEMENT_COLUMNS if column not in ("seq", "id")],
+        ipif_repo,
+    )
+
+    cursor.execute(
+        f"""
+        INSERT INTO {table(Place)} (uri, label)
+        SELECT DISTINCT ON (l.key) l.key, l.label FROM statement_places l
+        JOIN statement s ON s.identifier = l.identifier
+        JOIN changed_statement c ON c.id = s.id
+        ORDER BY l.key
+        ON CONFLICT (uri) DO NOTHING
+        """
+    )
+    sync_links(
+        cursor,
+        Statement,
+        "places",
+        "statement",
+        "statement_places",
+        f"SELECT uri AS key, uri AS target_id FROM {table(Place)}",
+        [],
+    )
+
+    # Persons a statement relates to are autocreated, with the URI as their
+    # identifier (and only URI), unless they already exist
+    create_staging_table(cursor, "changed_autocreated_person", [("id", "uuid")])
+    cursor.execute(
+        f"""
+        WITH created AS (
+            INSERT INTO {table(Person)} (
+                id, ipif_repo_id, local_id, identifier, label,
+                "createdBy", "createdWhen", "modifiedBy", "modifiedWhen",
+                "hubIngestedWhen", "hubModifiedWhen", "inputContentHash"
+            )
+            SELECT DISTINCT ON (l.key)
+                l.new_id, %s, l.key, l.key, l.label,
+                %s, current_date, %s, current_date,
+                now(), now(), l.content_hash
+            FROM statement_persons l
+            JOIN statement s ON s.identifier = l.identifier
+            JOIN changed_statement c ON c.id = s.id
+            ORDER BY l.key
+            ON CONFLICT (ipif_repo_id, identifier) DO NOTHING
+            RETURNING id, identifier
+        ),
+        uris AS (
+            INSERT INTO {table(URI)} (uri) SELECT identifier FROM created
+            ON CONFLICT (uri) DO NOTHING
+        )
+        INSERT INTO changed_autocreated_person SELECT id FROM created
+        """,
+        [autocreated_repo.pk, AUTOCREATED_BY, AUTOCREATED_BY],
+    )
+    cursor.execute(
+        f"""
+        INSERT INTO {table(Person.uris.through)} (person_id, uri_id)
+        SELECT p.id, u.id FROM changed_autocreated_person c
+        JOIN {table(Person)} p ON p.id = c.id
+        JOIN {table(URI)} u ON u.uri = p.identifier
+        ON CONFLICT DO NOTHING
+        """
+    )
+    sync_links(
+        cursor,
+        Statement,
+        "relatesToPerson",
+        "statement",
+        "statement_persons",
+        f"""
+        SELECT identifier AS key, id AS target_id FROM {table(Person)}
+        WHERE ipif_repo_id = %s
+        """,
+        [autocreated_repo.pk],
+    )
+
+
+def reference_targets(entity_class, name: str, ipif_repo, replaced: Set):
+    """SQL (and params) for the identifiers a staged factoid may refer to: the
+    staged ones if the batch replaces the type, else also the stored ones"""
+    if entity_class in replaced:
+        return f"(SELECT identifier FROM {qn(name)})", []
+    return (
+        f"(SELECT identifier FROM {table(entity_class)} WHERE ipif_repo_id = %s)",
+        [ipif_repo.pk],
+    )
+
+
+def check_factoid_references(cursor, ipif_repo, replaced: Set = frozenset()) -> None:
+    """Raises DataIntegrityError listing every reference of a staged factoid to a
+    person, source or statement that doesn't exist. For the types in `replaced`
+    (by a canonical batch) only the staged entities count."""
+    dangling = []
+    for entity_class, name, ref, identifier in (
+        (Person, "person", "person_ref", "person_identifier"),
+        (Source, "source", "source_ref", "source_identifier"),
+    ):
+        targets, params = reference_targets(entity_class, name, ipif_repo, replaced)
+        cursor.execute(
+            f"""
+            SELECT f.local_id, f.{ref} FROM factoid f
+            LEFT JOIN {targets} e ON e.identifier = f.{identifier}
+            WHERE e.identifier IS NULL ORDER BY f.seq
+            """,
+            params,
+        )
+        dangling += [
+            dangling_reference_error(factoid_id, entity_class, ref_id)
+            for factoid_id, ref_id in cursor.fetchall()
+        ]
+
+    targets, params = reference_targets(Statement, "statement", ipif_repo, replaced)
+    cursor.execute(
+        f"""
+        SELECT f.local_id, l.label FROM factoid_statements l
+        JOIN factoid f ON f.identifier = l.identifier
+        LEFT JOIN {targets} st ON st.identifier = l.key
+        WHERE st.identifier IS NULL ORDER BY f.seq
+        """,
+        params,
+    )
+    dangling += [
+        dangling_reference_error(factoid_id, Statement, ref_id)
+        for factoid_id, ref_id in cursor.fetchall()
+    ]
+    if dangling:
+        raise DataIntegrityError("\n".join(dict.fromkeys(dangling)))
+
+
+def apply_factoids(cursor, ipif_repo, replaced: Set = frozenset()) -> None:
+    check_factoid_references(cursor, ipif_repo, replaced)
+    upsert_entities(
+        cursor,
+        Factoid,
+        "factoid",
+        [column for column, _ in ENTITY_COLUMNS if column not in ("seq", "id")]
+        + ["person_id", "source_id"],
+        ipif_repo,
+        select={"person_id": "p.id", "source_id": "src.id"},
+        joins=f"""
+            JOIN {table(Person)} p
+                ON p.ipif_repo_id = %s AND p.identifier = s.person_identifier
+            JOIN {table(Source)} src
+                ON src.ipif_repo_id = %s AND src.identifier = s.source_identifier
+        """,
+    )
+    sync_links(
+        cursor,
+        Factoid,
+        "statements",
+        "factoid",
+        "factoid_statements",
+        f"""
+        SELECT identifier AS key, id AS target_id FROM {table(Statement)}
+        WHERE ipif_repo_id = %s
+        """,
+        [ipif_repo.pk],
+    )
+
+
+def remove_unstaged_entities(cursor, ipif_repo, keys: Iterable[str]) -> None:
+    """Deletes the repo's entities of the types in `keys` (as in SYNC_ORDER)
+    that match no staged row, as for a canonical batch"""
+    missing = {}
+    for entity_class, key in SYNC_ORDER:
+        if key not in keys:
+            continue
+        cursor.execute(
+            f"""
+            SELECT t.id FROM {table(entity_class)} t
+            WHERE t.ipif_repo_id = %s AND NOT EXISTS (
+                SELECT 1 FROM {qn(key[:-1])} s WHERE s.identifier = t.identifier
+            )
+            """,
+            [ipif_repo.pk],
+        )
+        missing[entity_class] = [row[0] for row in cursor.fetchall()]
+    delete_entities(missing)
+
+
+def fetch_ids(cursor, name: str) -> List:
+    cursor.execute(f"SELECT DISTINCT id FROM {qn(name)}")
+    return [row[0] for row in cursor.fetchall()]
+
+
+def count_changes(cursor, name: str) -> Dict[str, int]:
+    """How many of the staged entities of a type were created, updated and left
+    unchanged"""
+    changed = qn(f"changed_{name}")
+    cursor.execute(
+        f"""
+        SELECT
+            (SELECT count(DISTINCT identifier) FROM {qn(name)}),
+            (SELECT count(*) FROM {changed} WHERE inserted),
+            (SELECT count(*) FROM {changed} WHERE NOT inserted)
+        """
+    )
+    staged, created, updated = cursor.fetchone()
+    return {
+        "created": created,
+        "updated": updated,
+        "unchanged": staged - created - updated,
+    }
+
+
+@transaction.atomic
+def copy_ingest_data(
+    endpoint_slug, data, canonical: Optional[bool] = None, validated: bool = False
+) -> IngestEvents:
+    """Ingests a batch of IPIF JSON as ingest_data does (see above), including,
+    if the batch is canonical (by default, if the repo's batches are), deleting
+    the entities missing from it"""
+    if connection.vendor != "postgresql":
+        raise DataFormatError("COPY ingestion needs a PostgreSQL database")
+
+    # Imported here as the handlers module imports the tasks, which import this
+    from ipif_hub.signals.handlers import celeryCallBundle
+
+    # Counted here from the staging tables, rather than entity by entity
+    events = current_events.events or IngestEvents()
+
+    ipif_repo = IpifRepo.objects.get(pk=endpoint_slug)
+    forget_digest_receipts(ipif_repo)
+    if canonical is None:
+        canonical = ipif_repo.batch_is_canonical
+    # The types whose stored entities are replaced by the batch's
+    synced = [key for _, key in SYNC_ORDER if canonical and key in data]
+    autocreated_repo = get_ipif_hub_repo_AUTOCREATED_instance()
+
+    for key in ("persons", "sources", "factoids"):
+        if key not in data:
+            raise DataFormatError(f"IPIF JSON is missing '{key}' field")
+    if not validated:
+        try:
+            validate_batch(data)
+        except SchemaValidationError as e:
+            raise DataFormatError(e)
+
+    person_uris: List = []
+    source_uris: List = []
+    places: List = []
+    related_persons: List = []
+    factoid_statements: List = []
+
+    with connection.cursor() as cursor:
+        with events.stage("staging"):
+            stage(
+                cursor,
+                "person",
+                ENTITY_COLUMNS,
+                stage_persons_or_sources(
+                    Person, data["persons"], ipif_repo, person_uris
+                ),
+            )
+            stage(cursor, "person_uris", LINK_COLUMNS, person_uris)
+            stage(
+                cursor,
+                "source",
+                ENTITY_COLUMNS,
+                stage_persons_or_sources(
+                    Source, data["sources"], ipif_repo, source_uris
+                ),
+            )
+            stage(cursor, "source_uris", LINK_COLUMNS, source_uris)
+            stage(
+                cursor,
+                "statement",
+                STATEMENT_COLUMNS,
+                stage_statements(
+                    data.get("statements", []), ipif_repo, places, related_persons
+                ),
+            )
+            stage(cursor, "statement_places", LINK_COLUMNS, places)
+            stage(cursor, "statement_persons", LINK_COLUMNS, related_persons)
+            stage(
+                cursor,
+                "factoid",
+                FACTOID_COLUMNS,
+                stage_factoids(data["factoids"], ipif_repo, factoid_statements),
+            )
+            stage(cursor, "factoid_statements", LINK_COLUMNS, factoid_statements)
+            for name in ("person", "source", "statement", "factoid"):
+                cursor.execute(f"ANALYZE {qn(name)}")
+
+        with events.stage("applying"):
+            apply_persons_or_sources(cursor, Person, ipif_repo)
+            apply_persons_or_sources(cursor, Source, ipif_repo)
+            apply_statements(cursor, ipif_repo, autocreated_repo)
+            apply_factoids(
+                cursor,
+                ipif_repo,
+                {entity_class for entity_class, key in SYNC_ORDER if key in synced},
+            )
+
+            changed = {
+                name: fetch_ids(cursor, f"changed_{name}")
+                for name in ("person", "source", "statement", "factoid")
+            }
+            autocreated_person_ids = fetch_ids(cursor, "changed_autocreated_person")
+            counts = {
+                name: count_changes(cursor, name)
+                for name in ("person", "source", "statement", "factoid")
+            }
+            removed_uris = {
+                name: set(fetch_ids(cursor, f"removed_{name}_uris"))
+                for name in ("person", "source")
+            }
+
+        if synced:
+            with events.stage("removing"):
+                remove_unstaged_entities(cursor, ipif_repo, synced)
+
+    for entity_class, split_merge, handle_merge, add in (
+        (
+            Person,
+            split_merge_person_on_uri_delete,
+            handle_merge_person_from_person_update,
+            celeryCallBundle.add_person,
+        ),
+        (
+            Source,
+            split_merge_source_on_uri_delete,
+            handle_merge_source_from_source_update,
+            celeryCallBundle.add_source,
+        ),
+    ):
+        name = entity_class.__name__.lower()
+        for entity in entity_class.objects.filter(pk__in=changed[name]):
+            if entity.pk in removed_uris[name]:
+                split_merge(entity, {})
+            handle_merge(entity)
+            add(entity)
+
+    for person in Person.objects.filter(pk__in=autocreated_person_ids):
+        celeryCallBundle.add_person(person)
+    for statement in Statement.objects.filter(pk__in=changed["statement"]):
+        celeryCallBundle.add_statement(statement)
+    for factoid in Factoid.objects.filter(pk__in=changed["factoid"]):
+        celeryCallBundle.add_factoid(factoid)
+    transaction.on_commit(celeryCallBundle.call)
+
+    for name, actions in counts.items():
+        for action, count in actions.items():
+            events.record(name, action, count)
+    events.note(f"Created {len(autocreated_person_ids)} related persons")
+    return events
@@ -0,0 +1,50 @@
+from django.db import transaction
+from django.db.models import Count, Min
+
+
+@transaction.atomic
+def dedupe_uris(uri_model, entity_models) -> int:
+    """Merges URI rows with the same `uri` into the one with the lowest pk,
+    moving the others' links to persons and sources onto it, and deletes the
+    others. Returns the number of rows deleted.
+
+    Migration 0006 has its own copy of this, for the historical models."""
+    duplicates = (
+        uri_model.objects.values("uri")
+        .annotate(count=Count("pk"), keep=Min("pk"))
+        .filter(count__gt=1)
+    )
+
+    removed = 0
+    for duplicate in duplicates:
+        keep = duplicate["keep"]
+        others = list(
+            uri_model.objects.filter(uri=duplicate["uri"])
+            .exclude(pk=keep)
+            .values_list("pk", flat=True)
+        )
+
+        for entity_model in entity_models:
+            through = entity_model.uris.through
+            entity_field = f"{entity_model._meta.model_name}_id"
+            linked = set(
+                through.objects.filter(uri_id=keep).values_list(entity_field, flat=True)
+            )
+            to_link = (
+                set(
+                    through.objects.filter(uri_id__in=others).values_list(
+                        entity_field, flat=True
+                    )
+                )
+                - linked
+            )
+            through.objects.bulk_create(
+                [through(uri_id=keep, **{entity_field: pk}) for pk in to_link]
+            )
+
+        removed += (
+            uri_model.objects.filter(pk__in=others)
+            .delete()[1]
+            .get(uri_model._meta.label, 0)
+        )
+    return removed
@@ -1,17 +1,24 @@
 import datetime
 import hashlib
 import json
-import sys
-from io import StringIO
+from typing import Dict, List, Optional, Tuple, Type
 
 from django.core.exceptions import ValidationError
 from django.db import transaction
-from jsonschema import validate
 
-from ipif_hub.management.utils.ingest_schemas import (
-    FACTOID_SCHEMA,
-    PERSON_SOURCE_SCHEMA,
-    STATEMENT_SCHEMA,
+from ipif_hub.management.utils.canonical_sync import (
+    collect_local_ids,
+    remove_missing_entities,
+)
+from ipif_hub.management.utils.ingest_events import (
+    IngestEvents,
+    collect_events,
+    record_event,
+)
+from ipif_hub.management.utils.validation import (
+    SchemaValidationError,
+    validate_batch,
+    validate_payload,
 )
 from ipif_hub.models import (
     URI,
@@ -23,20 +30,7 @@ from ipif_hub.models import (
     Statement,
     get_ipif_hub_repo_AUTOCREATED_instance,
 )
-
-
-class Capturing(list):
-    """Grabs stdout and returns results as an array"""
-
-    def __enter__(self):
-        self._stdout = sys.stdout
-        sys.stdout = self._stringio = StringIO()
-        return self
-
-    def __exit__(self, *args):
-        self.extend(self._stringio.getvalue().splitlines())
-        del self._stringio  # free up some memory
-        sys.stdout = self._stdout
+from ipif_hub.receipts import forget_digest_receipts
 
 
 class DataFormatError(Exception):
@@ -64,13 +58,14 @@ def build_qualified_id(endpoint_uri, entity_type, id):
     return f"{uri}/{entity_type}/{id}"
 
 
-def ingest_statement(data, ipif_repo):
+def ingest_statement(data, ipif_repo, validated: bool = False):
     ipif_hub_repo_AUTOCREATED = get_ipif_hub_repo_AUTOCREATED_instance()
 
-    try:
-        validate(data, schema=STATEMENT_SCHEMA)
-    except Exception as e:
-        raise DataFormatError(e)
+    if not validated:
+        try:
+            validate_payload("statement", data)
+        except SchemaValidationError as e:
+            raise DataFormatError(e)
 
     data["local_id"] = data.pop("@id")
 
@@ -81,14 +76,14 @@ def ingest_statement(data, ipif_repo):
     places_to_set = data.pop("places", [])
 
     try:  # If already exists
-        statement = Statement.objects.get(identifier=qid)
+        statement = Statement.objects.get(ipif_repo=ipif_repo, identifier=qid)
 
         # Hash new content to see if different; if not, do not return
         if statement.inputContentHash == input_content_hash:
-            print(f'No change to <Statement @id="{qid}">; skipping ingest.')
+            record_event("statement", "unchanged")
             return NO_CHANGE_TO_DATA
         else:
-            print(f"Ingesting <Statement @id={qid}>")
+            record_event("statement", "updated")
 
         try:  # Now update the object
             statement.local_id = data["local_id"]
@@ -121,11 +116,10 @@ def ingest_statement(data, ipif_repo):
             current_places_as_uris = {place.uri for place in statement.places.all()}
             for place_to_set in places_to_set:
                 if place_to_set["uri"] not in current_places_as_uris:
-                    try:
-                        place = Place.objects.get(uri=place_to_set["uri"])
-                    except Place.DoesNotExist:
-                        place = Place(**place_to_set)
-                        place.save()
+                    place, _ = Place.objects.get_or_create(
+                        uri=place_to_set["uri"],
+                        defaults={"label": place_to_set.get("label")},
+                    )
                     statement.places.add(place)
             places_to_set_uris = {place["uri"] for place in places_to_set}
             current_places = {place for place in statement.places.all()}
@@ -176,7 +170,7 @@ def ingest_statement(data, ipif_repo):
         #    raise DataFormatError(f"ERROR: {e}")
 
     except Statement.DoesNotExist:  # If does not exist
-        print(f"Creating <Statement @id={qid}>")
+        record_event("statement", "created")
         try:
             statement = Statement()
             statement.local_id = data["local_id"]
@@ -213,11 +207,10 @@ def ingest_statement(data, ipif_repo):
             current_places_as_uris = {place.uri for place in statement.places.all()}
             for place_to_set in places_to_set:
                 if place_to_set["uri"] not in current_places_as_uris:
-                    try:
-                        place = Place.objects.get(uri=place_to_set["uri"])
-                    except Place.DoesNotExist:
-                        place = Place(**place_to_set)
-                        place.save()
+                    place, _ = Place.objects.get_or_create(
+                        uri=place_to_set["uri"],
+                        defaults={"label": place_to_set.get("label")},
+                    )
                     statement.places.add(place)
 
             for person_to_set in relatesToPerson_to_set:
@@ -247,12 +240,13 @@ def ingest_statement(data, ipif_repo):
             raise DataFormatError(f"IPIF JSON 'meta' error: {e}")
 
 
-def ingest_person_or_source(entity_class, data, ipif_repo):
+def ingest_person_or_source(entity_class, data, ipif_repo, validated: bool = False):
 
-    try:
-        validate(data, schema=PERSON_SOURCE_SCHEMA)
-    except Exception as e:
-        raise DataFormatError(e)
+    if not validated:
+        try:
+            validate_payload("person_source", data)
+        except SchemaValidationError as e:
+            raise DataFormatError(e)
 
     data["local_id"] = data.pop("@id")
 
@@ -263,18 +257,16 @@ def ingest_person_or_source(entity_class, data, ipif_repo):
     input_content_hash = hash_content(data)
 
     try:  # Entity exists
-        entity = entity_class.objects.get(identifier=qid)
+        entity = entity_class.objects.get(ipif_repo=ipif_repo, identifier=qid)
 
         # If already exists, check whether it's been modified by comparing hashes;
         # if not modified, just return
 
         if entity.inputContentHash == input_content_hash:
-            print(
-                f'No change to <{entity_class.__name__} @id="{qid}">; skipping ingest.'
-            )
+            record_event(entity_class.__name__.lower(), "unchanged")
             return NO_CHANGE_TO_DATA
         else:
-            print(f"Ingesting <{entity_class.__name__} @id={qid}>")
+            record_event(entity_class.__name__.lower(), "updated")
 
         try:
             entity.createdBy = data["createdBy"]
@@ -286,11 +278,7 @@ def ingest_person_or_source(entity_class, data, ipif_repo):
             current_uris = {uri.uri for uri in entity.uris.all()}
             for uri_to_set in uris_to_set:
                 if uri_to_set not in current_uris:
-                    try:
-                        uri = URI.objects.get(uri=uri_to_set)
-                    except URI.DoesNotExist:
-                        uri = URI(uri=uri_to_set)
-                        uri.save()
+                    uri, _ = URI.objects.get_or_create(uri=uri_to_set)
                     entity.uris.add(uri)
             current_uris = {uri for uri in entity.uris.all()}
             for current_uri in current_uris:
@@ -301,7 +289,7 @@ def ingest_person_or_source(entity_class, data, ipif_repo):
             raise DataFormatError(f"IPIF JSON 'person' error: {e}")
 
     except entity_class.DoesNotExist:
-        print(f"Creating <{entity_class.__name__} @id={qid}>")
+        record_event(entity_class.__name__.lower(), "created")
         try:
             data["inputContentHash"] = input_content_hash
             entity = entity_class(**data)
@@ -309,11 +297,7 @@ def ingest_person_or_source(entity_class, data, ipif_repo):
             entity.save()
 
             for uri_to_add in uris_to_set:
-                try:
-                    uri = URI.objects.get(uri=uri_to_add)
-                except URI.DoesNotExist:
-                    uri = URI(uri=uri_to_add)
-                    uri.save()
+                uri, _ = URI.objects.get_or_create(uri=uri_to_add)
                 entity.uris.add(uri)
 
             entity.save()
@@ -322,198 +306,276 @@ def ingest_person_or_source(entity_class, data, ipif_repo):
             raise DataFormatError(f"IPIF JSON 'person' error: {e}")
 
 
-def ingest_factoid(data, ipif_repo):
-    try:
-        validate(data, schema=FACTOID_SCHEMA)
-    except Exception as e:
-        raise DataFormatError(e)
+FACTOID_REFERENCE_TYPES = (Person, Source, Statement)
+
+
+def gather_factoid_references(factoids_data) -> List[Tuple[str, Type, str]]:
+    """(factoid @id, entity class, referenced @id) for every reference made by
+    the factoids, in order"""
+    references = []
+    for factoid in factoids_data:
+        try:
+            factoid_id = factoid["@id"]
+            references.append((factoid_id, Person, factoid["person-ref"]["@id"]))
+            references.append((factoid_id, Source, factoid["source-ref"]["@id"]))
+            for statement in factoid["statement-refs"]:
+                references.append((factoid_id, Statement, statement["@id"]))
+        except (KeyError, TypeError):
+            continue  # Reported when the factoid itself is validated
+    return references
+
+
+def resolve_factoid_references(factoids_data, ipif_repo) -> Dict[str, Dict]:
+    """Maps the identifiers of everything the factoids refer to onto the pks of
+    the stored entities (one query per type), keyed by type name. Anything not
+    stored is left out."""
+    references = gather_factoid_references(factoids_data)
+    resolved = {}
+    for entity_class in FACTOID_REFERENCE_TYPES:
+        identifiers = {
+            build_qualified_id(ipif_repo.endpoint_uri, entity_class.__name__, ref_id)
+            for _, ref_class, ref_id in references
+            if ref_class is entity_class
+        }
+        resolved[entity_class.__name__] = dict(
+            entity_class.objects.filter(
+                ipif_repo=ipif_repo, identifier__in=identifiers
+            ).values_list("identifier", "pk")
+        )
+    return resolved
+
+
+def dangling_reference_error(factoid_id, entity_class, ref_id) -> str:
+    return f"IPIF JSON Error: Factoid: {factoid_id} references non-existant {entity_class.__name__} @id='{ref_id}'"
+
+
+def check_factoid_references(data, ipif_repo, canonical: bool = False) -> None:
+    """Before anything is ingested, checks that everything the batch's factoids
+    refer to is either in the batch or already stored, raising a
+    DataIntegrityError listing every dangling reference if not.
+
+    In a canonical batch, stored entities of a type the batch includes don't
+    count: they are deleted once it is ingested (and their factoids with them)."""
+    replaced = {
+        entity_class
+        for entity_class, key in (
+            (Person, "persons"),
+            (Source, "sources"),
+            (Statement, "statements"),
+        )
+        if canonical and key in data
+    }
+    uploaded = {
+        entity_class: {
+            build_qualified_id(
+                ipif_repo.endpoint_uri, entity_class.__name__, item["@id"]
+            )
+            for item in data.get(key, [])
+            if isinstance(item, dict) and "@id" in item
+        }
+        for entity_class, key in (
+            (Person, "persons"),
+            (Source, "sources"),
+            (Statement, "statements"),
+        )
+    }
+    factoids_data = data.get("factoids", [])
+    stored = resolve_factoid_references(factoids_data, ipif_repo)
+
+    dangling = []
+    for factoid_id, entity_class, ref_id in gather_factoid_references(factoids_data):
+        identifier = build_qualified_id(
+            ipif_repo.endpoint_uri, entity_class.__name__, ref_id
+        )
+        if identifier not in uploaded[entity_class] and (
+            entity_class in replaced or identifier not in stored[entity_class.__name__]
+        ):
+            dangling.append(dangling_reference_error(factoid_id, entity_class, ref_id))
+    if dangling:
+        raise DataIntegrityError("\n".join(dict.fromkeys(dangling)))
+
+
+def resolve_reference(
+    entity_class, ref_id, data, ipif_repo, references: Optional[Dict] = None
+):
+    """The pk of an entity a factoid refers to: from `references` (see
+    resolve_factoid_references) if given, otherwise looked up"""
+    identifier = build_qualified_id(
+        ipif_repo.endpoint_uri, entity_class.__name__, ref_id
+    )
+    if references is not None:
+        pk = references[entity_class.__name__].get(identifier)
+    else:
+        pk = (
+            entity_class.objects.filter(ipif_repo=ipif_repo, identifier=identifier)
+            .values_list("pk", flat=True)
+            .first()
+        )
+    if pk is None:
+        raise DataIntegrityError(
+            dangling_reference_error(data["local_id"], entity_class, ref_id)
+        )
+    return pk
+
+
+def set_factoid_references(factoid, data, ipif_repo, references=None) -> List:
+    """Sets the factoid's person and source, and returns the pks of its
+    statements"""
+    factoid.person_id = resolve_reference(
+        Person, data["person-ref"]["@id"], data, ipif_repo, references
+    )
+    factoid.source_id = resolve_reference(
+        Source, data["source-ref"]["@id"], data, ipif_repo, references
+    )
+    return [
+        resolve_reference(Statement, statement["@id"], data, ipif_repo, references)
+        for statement in data["statement-refs"]
+    ]
+
+
+def ingest_factoid(
+    data, ipif_repo, references: Optional[Dict] = None, validated: bool = False
+):
+    """Ingests a factoid. `references` (from resolve_factoid_references) saves
+    looking up what it refers to one by one. `validated` skips validating it,
+    if it has been already."""
+    if not validated:
+        try:
+            validate_payload("factoid", data)
+        except SchemaValidationError as e:
+            raise DataFormatError(e)
 
     data["local_id"] = data.pop("@id")
 
     qid = build_qualified_id(ipif_repo.endpoint_uri, "Factoid", data["local_id"])
     input_content_hash = hash_content(data)
     try:  # factoid does exist
-        factoid = Factoid.objects.get(identifier=qid)
+        factoid = Factoid.objects.get(ipif_repo=ipif_repo, identifier=qid)
 
         if factoid.inputContentHash == input_content_hash:
-            print(f'No change to <Factoid @id="{qid}">; skipping ingest.')
+            record_event("factoid", "unchanged")
             return NO_CHANGE_TO_DATA
         else:
-            print(f"Updating <Factoid @id={qid}>")
-
-        factoid.local_id = data["local_id"]
-        factoid.createdBy = data["createdBy"]
-        factoid.createdWhen = data["createdWhen"]
-        factoid.modifiedBy = data["modifiedBy"]
-        factoid.modifiedWhen = data["modifiedWhen"]
-        factoid.label = data.get("label", "")
-        factoid.inputContentHash = input_content_hash
-        # factoid.ipif_repo = ipif_repo
-
-        try:
-            factoid.person = Person.objects.get(
-                identifier=build_qualified_id(
-                    ipif_repo.endpoint_uri, "Person", data["person-ref"]["@id"]
-                )
-            )
-        except Person.DoesNotExist:
-            raise DataIntegrityError(
-                f"IPIF JSON Error: Factoid: {data['local_id']} references non-existant Person @id='{data['person-ref']['@id']}'"
-            )
-
-        try:
-            factoid.source = Source.objects.get(
-                identifier=build_qualified_id(
-                    ipif_repo.endpoint_uri, "Source", data["source-ref"]["@id"]
-                )
-            )
-        except Source.DoesNotExist:
-            raise DataIntegrityError(
-                f"IPIF JSON Error: Factoid: {data['local_id']} references non-existant Source @id='{data['source-ref']['@id']}'"
-            )
-
-        current_statements_as_uris = {
-            statement.id for statement in factoid.statements.all()
-        }
-        for statement in data["statement-refs"]:
-            try:
-                identifier = build_qualified_id(
-                    ipif_repo.endpoint_uri, "Statement", statement["@id"]
-                )
-                if identifier not in current_statements_as_uris:
-                    s = Statement.objects.get(identifier=identifier)
-                    factoid.statements.add(s)
-                    factoid.save()
-            except Statement.DoesNotExist:
-                raise DataIntegrityError(
-                    f"IPIF JSON Error: Factoid: {data['local_id']} references non-existant Statement @id='{statement['@id']}'"
-                )
-
-        factoid.save()
-
-        statements_to_add = {
-            build_qualified_id(ipif_repo.endpoint_uri, "Statement", s["@id"])
-            for s in data["statement-refs"]
-        }
-        current_statements = {statement for statement in factoid.statements.all()}
-
-        for current_statement in current_statements:
-
-            if current_statement.identifier not in statements_to_add:
-                factoid.statements.remove(current_statement)
-
-        factoid.save()
+            record_event("factoid", "updated")
 
     except Factoid.DoesNotExist:  # Create new factoid
-        print(f"Creating <Factoid @id={qid}>")
+        record_event("factoid", "created")
         factoid = Factoid()
-        factoid.local_id = data["local_id"]
-        factoid.createdBy = data["createdBy"]
-        factoid.createdWhen = data["createdWhen"]
-        factoid.modifiedBy = data["modifiedBy"]
-        factoid.modifiedWhen = data["modifiedWhen"]
-        factoid.label = data.get("label", "")
-        factoid.inputContentHash = input_content_hash
         factoid.ipif_repo = ipif_repo
 
-        try:
-            factoid.person = Person.objects.get(
-                identifier=build_qualified_id(
-                    ipif_repo.endpoint_uri, "Person", data["person-ref"]["@id"]
-                )
-            )
-        except Person.DoesNotExist:
-            raise DataIntegrityError(
-                f"IPIF JSON Error: Factoid: {data['local_id']} references non-existant Person @id='{data['person-ref']['@id']}'"
-            )
+    factoid.local_id = data["local_id"]
+    factoid.createdBy = data["createdBy"]
+    factoid.createdWhen = data["createdWhen"]
+    factoid.modifiedBy = data["modifiedBy"]
+    factoid.modifiedWhen = data["modifiedWhen"]
+    factoid.label = data.get("label", "")
+    factoid.inputContentHash = input_content_hash
 
-        try:
-            factoid.source = Source.objects.get(
-                identifier=build_qualified_id(
-                    ipif_repo.endpoint_uri, "Source", data["source-ref"]["@id"]
-                )
-            )
-        except Source.DoesNotExist:
-            raise DataIntegrityError(
-                f"IPIF JSON Error: Factoid: {data['local_id']} references non-existant Source @id='{data['source-ref']['@id']}'"
-            )
-        factoid.save()
-        for statement in data["statement-refs"]:
-            try:
-                identifier = build_qualified_id(
-                    ipif_repo.endpoint_uri, "Statement", statement["@id"]
-                )
-
-                s = Statement.objects.get(identifier=identifier)
-
-                factoid.statements.add(s)
-            except Statement.DoesNotExist:
-                raise DataIntegrityError(
-                    f"IPIF JSON Error: Factoid: {data['local_id']} references non-existant Statement @id='{statement['@id']}'"
-                )
-
-        factoid.save()
-        # update_factoid_index.delay(factoid.pk)
-        # update_person_index.delay(factoid.person.pk)
+    statement_pks = set_factoid_references(factoid, data, ipif_repo, references)
+    factoid.save()
+    factoid.statements.set(statement_pks)
+    # update_factoid_index.delay(factoid.pk)
+    # update_person_index.delay(factoid.person.pk)
 
 
-def ingest_persons(persons_data, ipif_repo):
-    with Capturing() as output:
+def ingest_persons(persons_data, ipif_repo, validated: bool = False) -> IngestEvents:
+    with collect_events() as events, events.stage("persons"):
         for person in persons_data:
-            ingest_person_or_source(Person, person, ipif_repo)
-    return output
+            with events.recording_failure("person"):
+                ingest_person_or_source(Person, person, ipif_repo, validated)
+    return events
 
 
-def ingest_sources(sources_data, ipif_repo):
-    with Capturing() as output:
+def ingest_sources(sources_data, ipif_repo, validated: bool = False) -> IngestEvents:
+    with collect_events() as events, events.stage("sources"):
         for source in sources_data:
-            ingest_person_or_source(Source, source, ipif_repo)
-    return output
+            with events.recording_failure("source"):
+                ingest_person_or_source(Source, source, ipif_repo, validated)
+    return events
 
 
-def ingest_statements(statements_data, ipif_repo):
-    with Capturing() as output:
+def ingest_statements(
+    statements_data, ipif_repo, validated: bool = False
+) -> IngestEvents:
+    with collect_events() as events, events.stage("statements"):
         for statement in statements_data:
-            ingest_statement(statement, ipif_repo)
-    return output
+            with events.recording_failure("statement"):
+                ingest_statement(statement, ipif_repo, validated)
+    return events
 
 
-def ingest_factoids(factoids_data, ipif_repo):
-    with Capturing() as output:
+def ingest_factoids(factoids_data, ipif_repo, validated: bool = False) -> IngestEvents:
+    # Report every dangling reference (e.g. of factoids POSTed on their own)
+    # before ingesting any of the factoids
+    check_factoid_references({"factoids": factoids_data}, ipif_repo)
+    with collect_events() as events, events.stage("factoids"):
+        references = resolve_factoid_references(factoids_data, ipif_repo)
         for factoid in factoids_data:
-            ingest_factoid(factoid, ipif_repo)
-    return output
+            with events.recording_failure("factoid"):
+                ingest_factoid(factoid, ipif_repo, references, validated)
+    return events
+
+
+# The schema and ingest function for a list of each type of entity, as POSTed
+# to the API
+LIST_INGESTERS = {
+    "person": ("person_source_list", ingest_persons),
+    "source": ("person_source_list", ingest_sources),
+    "statement": ("statement_list", ingest_statements),
+    "factoid": ("factoid_list", ingest_factoids),
+}
 
 
 @transaction.atomic
-def ingest_data(endpoint_slug, data):
-    # try:
-    #    validate(instance=data, schema=FLAT_LIST_SCHEMA)
-    # except Exception as e:
-    #    raise DataFormatError(e)
+def ingest_data(
+    endpoint_slug, data, canonical: Optional[bool] = None, validated: bool = False
+) -> IngestEvents:
+    """Ingests a batch of IPIF JSON. If the batch is canonical (by default, if the
+    repo's batches are), entities missing from it are deleted afterwards.
+
+    Every item is validated first (unless `validated`), reporting all errors.
+    Returns the ingest's events (see ingest_events)."""
+    if not validated:
+        try:
+            validate_batch(data)
+        except SchemaValidationError as e:
+            raise DataFormatError(e)
 
     ipif_repo = IpifRepo.objects.get(pk=endpoint_slug)
+    # Replays of earlier POSTs must now be ingested again
+    forget_digest_receipts(ipif_repo)
+    if canonical is None:
+        canonical = ipif_repo.batch_is_canonical
+    if canonical:
+        local_ids = collect_local_ids(data)
+
+    # Report every dangling reference before ingesting anything
+    check_factoid_references(data, ipif_repo, canonical)
+
+    with collect_events() as events:
+        # TODO: missing key is not necessarily a problem —— could be
+        # pushed in batches!!
+        try:
+            ingest_persons(data["persons"], ipif_repo, validated=True)
+        except KeyError:
+            raise DataFormatError("IPIF JSON is missing 'persons' field")
+
+        try:
+            ingest_sources(data["sources"], ipif_repo, validated=True)
+        except KeyError:
+            raise DataFormatError("IPIF JSON is missing 'sources' field")
+
+        try:
+            ingest_statements(data["statements"], ipif_repo, validated=True)
+        except KeyError:
+            events.note("IPIF JSON has no 'statements' field")
+            # raise DataFormatError("IPIF JSON is missing 'statements' field")
+
+        try:
+            ingest_factoids(data["factoids"], ipif_repo, validated=True)
+        except KeyError:
+            raise DataFormatError("IPIF JSON is missing 'statements' field")
 
-    # TODO: missing key is not necessarily a problem —— could be
-    # pushed in batches!!
-    try:
-        ingest_persons(data["persons"], ipif_repo)
-    except KeyError:
-        raise DataFormatError("IPIF JSON is missing 'persons' field")
-
-    try:
-        ingest_sources(data["sources"], ipif_repo)
-    except KeyError:
-        raise DataFormatError("IPIF JSON is missing 'sources' field")
-    # print(data["statements"])
-    try:
-        ingest_statements(data["statements"], ipif_repo)
-    except KeyError as e:
-        print(e)
-        print("NO STATEMENTS")
-        # raise DataFormatError("IPIF JSON is missing 'statements' field")
-
-    try:
-        ingest_factoids(data["factoids"], ipif_repo)
-    except KeyError:
-        raise DataFormatError("IPIF JSON is missing 'statements' field")
+        if canonical:
+            remove_missing_entities(ipif_repo, local_ids)
+    return events
@@ -0,0 +1,192 @@
+"""What an ingest did, collected as structured events.
+
+The ingest functions record each entity they create, update, leave unchanged
+or fail on with the collector of the ingest in progress, which keeps counts by
+entity type and action, a bounded sample of errors and notes, and the time
+each stage took.
+
+The collector in use is per thread (see collect_events), so ingests running
+at once in one process each see only their own events; threads working on one
+ingest (as in the parallel pipeline) share its collector explicitly.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from django.conf import settings
+
+ACTIONS = ("created", "updated", "unchanged", "failed")
+
+
+class IngestEvents:
+    def __init__(self, max_samples: Optional[int] = None) -> None:
+        self.max_samples = max_samples or settings.IPIF_INGEST_EVENT_SAMPLES
+        self.counts: Dict[str, Dict[str, int]] = {}
+        self.errors: List[str] = []
+        self.notes: List[str] = []
+        # Errors and notes beyond max_samples are only counted
+        self.errors_omitted = 0
+        self.notes_omitted = 0
+        # The exceptions already recorded by fail(), which raised() skips
+        self.failures: List[BaseException] = []
+        # Set by roll_back()
+        self.rolled_back = False
+        # Stage name -> [first started, last finished]
+        self.spans: Dict[str, List[float]] = {}
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, entity_type: str, action: str, count: int = 1) -> None:
+        with self._lock:
+            counts = self.counts.setdefault(entity_type, dict.fromkeys(ACTIONS, 0))
+            counts[action] += count
+
+    def error(self, message) -> None:
+        with self._lock:
+            if len(self.errors) < self.max_samples:
+                self.errors.append(str(message))
+            else:
+                self.errors_omitted += 1
+
+    def fail(self, entity_type: str, error, count: int = 1) -> None:
+        self.record(entity_type, "failed", count)
+        self.error(error)
+        if isinstance(error, BaseException):
+            with self._lock:
+                self.failures.append(error)
+
+    def raised(self, exception: BaseException) -> None:
+        """Records the error an ingest ended with, line by line, unless it was
+        already recorded where it happened (by fail())"""
+        if any(exception is failure for failure in self.failures):
+            return
+        for line in str(exception).splitlines():
+            self.error(line)
+
+    def roll_back(self) -> None:
+        """Marks the ingest as rolled back: nothing it created or updated was
+        kept, so only the failures are still counted"""
+        with self._lock:
+            self.rolled_back = True
+            for counts in self.counts.values():
+                for action in ("created", "updated", "unchanged"):
+                    counts[action] = 0
+
+    def note(self, message) -> None:
+        with self._lock:
+            if len(self.notes) < self.max_samples:
+                self.notes.append(str(message))
+            else:
+                self.notes_omitted += 1
+
+    def record_timing(self, stage: str, started: float, finished: float) -> None:
+        with self._lock:
+            if span := self.spans.get(stage):
+                span[0] = min(span[0], started)
+                span[1] = max(span[1], finished)
+            else:
+                self.spans[stage] = [started, finished]
+
+    @contextmanager
+    def stage(self, name: str):
+        """Times the block as (part of) the stage `name`"""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record_timing(name, started, time.monotonic())
+
+    @contextmanager
+    def recording_failure(self, entity_type: str):
+        """Records a failure to ingest an entity if the block raises"""
+        try:
+            yield
+        except Exception as e:
+            self.fail(entity_type, e)
+            raise
+
+    def merge(self, other: "IngestEvents") -> None:
+        """Adds in the events of another collector (e.g. of one chunk)"""
+        for entity_type, counts in other.counts.items():
+            for action, count in counts.items():
+                if count:
+                    self.record(entity_type, action, count)
+        for message in other.errors:
+            self.error(message)
+        for message in other.notes:
+            self.note(message)
+        with self._lock:
+            self.errors_omitted += other.errors_omitted
+            self.notes_omitted += other.notes_omitted
+        for stage, (started, finished) in other.spans.items():
+            self.record_timing(stage, started, finished)
+
+    def as_dict(self) -> Dict:
+        with self._lock:
+            return {
+                "counts": {
+                    entity_type: dict(counts)
+                    for entity_type, counts in self.counts.items()
+                },
+                "errors": list(self.errors),
+                "errors_omitted": self.errors_omitted,
+                "notes": list(self.notes),
+                "notes_omitted": self.notes_omitted,
+                "timings": {
+                    stage: round(finished - started, 3)
+                    for stage, (started, finished) in self.spans.items()
+                },
+                "elapsed": round(time.monotonic() - self.started, 3),
+                "rolled_back": self.rolled_back,
+            }
+
+    def __str__(self) -> str:
+        summary = self.as_dict()
+        lines = [
+            f"{entity_type}: "
+            + ", ".join(f"{counts[action]} {action}" for action in ACTIONS)
+            for entity_type, counts in summary["counts"].items()
+        ]
+        lines += [
+            f"{stage}: {seconds:.1f}s" for stage, seconds in summary["timings"].items()
+        ]
+        if summary["rolled_back"]:
+            lines.append("Rolled back: nothing was ingested")
+        lines += summary["notes"] + summary["errors"]
+        if omitted := summary["errors_omitted"]:
+            lines.append(f"... and {omitted} more errors")
+        return "\n".join(lines)
+
+
+class CurrentEvents(threading.local):
+    def __init__(self) -> None:
+        self.events: Optional[IngestEvents] = None
+
+
+current_events = CurrentEvents()
+
+
+@contextmanager
+def collect_events(events: Optional[IngestEvents] = None):
+    """Collects the events recorded in the block (in this thread) with `events`
+    or else the collector already in use further up, or a new one. Yields the
+    collector."""
+    previous = current_events.events
+    current_events.events = events or previous or IngestEvents()
+    try:
+        yield current_events.events
+    finally:
+        current_events.events = previous
+
+
+def record_event(entity_type: str, action: str) -> None:
+    """Records that an entity was created, updated etc., if events are being
+    collected"""
+    if current_events.events is not None:
+        current_events.events.record(entity_type, action)
+
+
+def note_event(message: str) -> None:
+    if current_events.events is not None:
+        current_events.events.note(message)
@@ -0,0 +1,257 @@
+"""Parallel ingestion of IPIF JSON, in chunks.
+
+ingest_data() ingests persons, then sources, then statements, then factoids,
+all in one thread and one transaction. Persons, sources and statements don't
+depend on each other, though, so ingest_data_in_parallel() splits each into
+chunks and runs them all on a thread pool, each chunk in its own transaction.
+Once they have all committed (the barrier), the factoids, which refer to them,
+are ingested in chunks the same way.
+
+Person chunks take a lock for their transaction, as do source chunks: merge
+persons/sources are grouped by looking at other persons'/sources' URIs, so
+chunks of the same type must see each other's changes. A person chunk still
+runs alongside source and statement chunks.
+
+A chunk that fails with an integrity error or deadlock (e.g. two chunks
+creating the same URI or place at once, as a statement chunk can with a person
+chunk) is retried, from a fresh copy of its items: re-ingesting items that were
+already ingested is a no-op. Retries wait a random delay, growing with each
+attempt, so that chunks that collided don't collide again straight away.
+
+As each chunk commits on its own, a failure leaves the chunks before it
+ingested; running the ingest again picks up where it left off.
+"""
+import copy
+import random
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import partial
+from typing import Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.db import (
+    IntegrityError,
+    OperationalError,
+    connection,
+    connections,
+    transaction,
+)
+
+from ipif_hub.management.utils.canonical_sync import (
+    collect_local_ids,
+    remove_missing_entities,
+)
+from ipif_hub.management.utils.ingest_data import (
+    DataFormatError,
+    check_factoid_references,
+    ingest_factoid,
+    ingest_person_or_source,
+    ingest_statement,
+    resolve_factoid_references,
+)
+from ipif_hub.management.utils.ingest_events import IngestEvents, collect_events
+from ipif_hub.management.utils.validation import (
+    SchemaValidationError,
+    validate_batch,
+)
+from ipif_hub.models import IpifRepo, Person, Source
+from ipif_hub.receipts import forget_digest_receipts
+
+
+def lock_key(name: str) -> int:
+    """A (signed 32-bit) key for pg_advisory_xact_lock"""
+    return zlib.crc32(name.encode()) - 2**31
+
+
+def ingest_each(ingest: Callable) -> Callable:
+    """A chunk function that ingests the items one by one with `ingest`"""
+
+    def ingest_items(items, ipif_repo):
+        for item in items:
+            ingest(item, ipif_repo)
+
+    return ingest_items
+
+
+def ingest_factoid_chunk(items, ipif_repo) -> None:
+    # Look up everything the chunk's factoids refer to at once
+    references = resolve_factoid_references(items, ipif_repo)
+    for item in items:
+        ingest_factoid(item, ipif_repo, references, validated=True)
+
+
+# Stage name (the key of its items in the IPIF JSON), chunk function, and lock
+# key (if chunks of the stage must not run at the same time)
+UPSTREAM_STAGES = [
+    (
+        "persons",
+        ingest_each(partial(ingest_person_or_source, Person, validated=True)),
+        lock_key("ipif_hub.ingest.persons"),
+    ),
+    (
+        "sources",
+        ingest_each(partial(ingest_person_or_source, Source, validated=True)),
+        lock_key("ipif_hub.ingest.sources"),
+    ),
+    ("statements", ingest_each(partial(ingest_statement, validated=True)), None),
+]
+FACTOID_STAGE = ("factoids", ingest_factoid_chunk, None)
+
+
+class StageReport:
+    """Items ingested by a stage, and the time from its first chunk starting to
+    its last chunk finishing"""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.items = 0
+        self.chunks = 0
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    def add_chunk(self, items: int, started: float, finished: float) -> None:
+        self.items += items
+        self.chunks += 1
+        if self.started is None or started < self.started:
+            self.started = started
+        if self.finished is None or finished > self.finished:
+            self.finished = finished
+
+    @property
+    def seconds(self) -> float:
+        if self.started is None:
+            return 0.0
+        return self.finished - self.started
+
+    def __str__(self) -> str:
+        rate = self.items / self.seconds if self.seconds else 0
+        return (
+            f"{self.name}: {self.items} items in {self.chunks} chunks, "
+            f"{self.seconds:.1f}s ({rate:.0f} items/s)"
+        )
+
+
+def chunked(items: List, chunk_size: int) -> List[List]:
+    return [items[i : i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+
+def retry_delay(attempt: int) -> float:
+    """Seconds to wait before retrying a chunk after `attempt` attempts: a
+    random delay of up to IPIF_INGEST_RETRY_DELAY, doubled for each attempt"""
+    return random.uniform(0, settings.IPIF_INGEST_RETRY_DELAY * 2 ** (attempt - 1))
+
+
+def ingest_chunk(
+    ingest: Callable,
+    items: List,
+    ipif_repo: IpifRepo,
+    lock: Optional[int] = None,
+    events: Optional[IngestEvents] = None,
+):
+    """Ingests a chunk of items with a chunk function, in one transaction, retrying on integrity errors
+    and deadlocks (up to IPIF_INGEST_CHUNK_ATTEMPTS attempts in all). Returns when
+    it started and finished."""
+    started = time.monotonic()
+    attempts = settings.IPIF_INGEST_CHUNK_ATTEMPTS
+    try:
+        for attempt in range(1, attempts + 1):
+            # Only the events of the attempt that commits are kept
+            chunk_events = IngestEvents()
+            try:
+                with transaction.atomic(), collect_events(chunk_events):
+                    if lock is not None and connection.vendor == "postgresql":
+                        with connection.cursor() as cursor:
+                            cursor.execute("SELECT pg_advisory_xact_lock(%s)", [lock])
+                    # The ingest functions change the items, so a retry needs
+                    # the originals
+                    ingest(copy.deepcopy(items), ipif_repo)
+                break
+            except (IntegrityError, OperationalError):
+                if attempt == attempts:
+                    raise
+                time.sleep(retry_delay(attempt))
+        if events is not None:
+            events.merge(chunk_events)
+    finally:
+        # Each worker thread has its own connection
+        connections.close_all()
+    return started, time.monotonic()
+
+
+def run_stages(executor, stages, data, ipif_repo, chunk_size, reports, events) -> None:
+    """Runs all chunks of the stages on the executor, and waits for them all;
+    then raises the first error, if any chunk failed"""
+    futures = {}
+    for name, ingest, lock in stages:
+        reports[name] = StageReport(name)
+        for chunk in chunked(data.get(name, []), chunk_size):
+            future = executor.submit(
+                ingest_chunk, ingest, chunk, ipif_repo, lock, events
+            )
+            futures[future] = (name, len(chunk))
+
+    wait(futures)
+    for future, (name, items) in futures.items():
+        if error := future.exception():
+            events.fail(name[:-1], error, count=items)  # e.g. persons -> person
+        else:
+            reports[name].add_chunk(items, *future.result())
+            events.record_timing(name, *future.result())
+    for future in futures:
+        if error := future.exception():
+            raise error
+
+
+def ingest_data_in_parallel(
+    endpoint_slug,
+    data,
+    workers: int = None,
+    chunk_size: int = None,
+    canonical: Optional[bool] = None,
+    validated: bool = False,
+) -> Dict[str, StageReport]:
+    """Ingests a batch of IPIF JSON like ingest_data(), but in chunks on a pool
+    of worker threads (see above). Returns a report on each stage; the events
+    go to the collector in use (see ingest_events), if any."""
+    workers = workers or settings.IPIF_INGEST_WORKERS
+    chunk_size = chunk_size or settings.IPIF_INGEST_CHUNK_SIZE
+
+    for key in ("persons", "sources", "factoids"):
+        if key not in data:
+            raise DataFormatError(f"IPIF JSON is missing '{key}' field")
+    # Validate every item up front (unless `validated`); the chunk functions
+    # then skip validating
+    if not validated:
+        try:
+            validate_batch(data)
+        except SchemaValidationError as e:
+            raise DataFormatError(e)
+
+    ipif_repo = IpifRepo.objects.get(pk=endpoint_slug)
+    forget_digest_receipts(ipif_repo)
+    if canonical is None:
+        canonical = ipif_repo.batch_is_canonical
+    if canonical:
+        local_ids = collect_local_ids(data)
+
+    # Report every dangling reference before ingesting anything
+    check_factoid_references(data, ipif_repo, canonical)
+
+    reports: Dict[str, StageReport] = {}
+    with collect_events() as events:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            run_stages(
+                executor, UPSTREAM_STAGES, data, ipif_repo, chunk_size, reports, events
+            )
+            # Barrier: factoids are only linked once everything they refer to is in
+            run_stages(
+                executor, [FACTOID_STAGE], data, ipif_repo, chunk_size, reports, events
+            )
+
+        if canonical:
+            remove_missing_entities(ipif_repo, local_ids)
+
+        for report in reports.values():
+            events.note(str(report))
+    return reports
@@ -0,0 +1,119 @@
+"""Purging all of a repo's persons, sources, statements and factoids.
+
+Deleting through the ORM goes entity by entity: each deleted person or source
+regroups its merge entity, and each deleted document is removed from Solr with
+its own request. purge_repo() instead deletes with one SQL statement per table
+(and dependent m2m/edge table), leaves tombstones in the changes feed in bulk,
+regroups each affected merge person/source once, and removes the documents
+with one Solr delete-by-query.
+
+The IpifRepo itself is kept, along with its ingestion jobs.
+"""
+from typing import Dict
+
+from django.db import connection, transaction
+
+from ipif_hub.changes import assign_commit_seqs
+from ipif_hub.models import (
+    ChangeLogEntry,
+    EntityIdentifier,
+    Factoid,
+    IngestionReceipt,
+    IpifRepo,
+    MergePerson,
+    MergeSource,
+    Person,
+    Source,
+    Statement,
+)
+from ipif_hub.resolution import identifier_cache
+from ipif_hub.search import remove_repo_documents
+from ipif_hub.signals.deletion_batch import batch_deletes
+
+# Deleted in this order, as factoids refer to persons and sources
+PURGED_MODELS = [Factoid, Statement, Person, Source]
+
+
+def qn(name: str) -> str:
+    return connection.ops.quote_name(name)
+
+
+def repo_entity_ids(model) -> str:
+    return f"SELECT id FROM {qn(model._meta.db_table)} WHERE ipif_repo_id = %s"
+
+
+def record_tombstones(cursor, model, ipif_repo: IpifRepo) -> None:
+    """Replaces the latest changes-feed entries of the repo's entities of `model`
+    with tombstones, as record_change(..., deleted=True) would one by one"""
+    cursor.execute(
+        f"""
+        INSERT INTO {qn(ChangeLogEntry._meta.db_table)}
+            (entity_type, entity_id, identifier, ipif_repo_slug, action, changed_when)
+        SELECT %s, id, identifier, ipif_repo_id, 'deleted', now()
+        FROM {qn(model._meta.db_table)} WHERE ipif_repo_id = %s
+        ORDER BY identifier
+        ON CONFLICT (entity_id) DO UPDATE SET
+            identifier = EXCLUDED.identifier,
+            action = EXCLUDED.action,
+            changed_when = EXCLUDED.changed_when,
+            commit_seq = NULL
+        """,
+        [model.__name__.lower(), ipif_repo.pk],
+    )
+
+
+def delete_dependents(cursor, model, ipif_repo: IpifRepo) -> None:
+    """Deletes the rows (m2m links, person edges...) with a foreign key to the
+    repo's entities of `model`, as Django's cascade would"""
+    for relation in model._meta.get_fields(include_hidden=True):
+        if relation.auto_created and not relation.concrete and relation.one_to_many:
+            cursor.execute(
+                f"""
+                DELETE FROM {qn(relation.related_model._meta.db_table)}
+                WHERE {qn(relation.field.column)} IN ({repo_entity_ids(model)})
+                """,
+                [ipif_repo.pk],
+            )
+
+
+@transaction.atomic
+def purge_repo(ipif_repo: IpifRepo) -> Dict[str, int]:
+    """Deletes all of the repo's persons, sources, statements and factoids, and
+    their documents. Returns the number deleted of each."""
+    merge_persons = list(
+        MergePerson.objects.filter(persons__ipif_repo=ipif_repo).distinct()
+    )
+    merge_sources = list(
+        MergeSource.objects.filter(sources__ipif_repo=ipif_repo).distinct()
+    )
+
+    # Replays of POSTs must be ingested again
+    IngestionReceipt.objects.filter(ipif_repo=ipif_repo).delete()
+
+    deleted = {}
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {qn(EntityIdentifier._meta.db_table)} "
+            "WHERE ipif_repo_slug = %s",
+            [ipif_repo.pk],
+        )
+        for model in PURGED_MODELS:
+            record_tombstones(cursor, model, ipif_repo)
+            delete_dependents(cursor, model, ipif_repo)
+            cursor.execute(
+                f"DELETE FROM {qn(model._meta.db_table)} WHERE ipif_repo_id = %s",
+                [ipif_repo.pk],
+            )
+            deleted[model.__name__.lower()] = cursor.rowcount
+
+    # The merge entities now missing persons/sources are regrouped (or deleted)
+    # in one pass, with any deleted merge documents removed in one request
+    with batch_deletes() as batch:
+        batch.merge_persons.update(merge_persons)
+        batch.merge_sources.update(merge_sources)
+
+    transaction.on_commit(lambda: remove_repo_documents(ipif_repo.pk))
+    transaction.on_commit(assign_commit_seqs)
+    # Lookups cached in this process may point at the deleted documents
+    transaction.on_commit(identifier_cache.clear)
+    return deleted
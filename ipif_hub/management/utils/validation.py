@@ -0,0 +1,78 @@
+"""Validation of IPIF JSON payloads against the ingest schemas.
+
+jsonschema.validate() checks the schema itself and builds a new validator (and
+ref resolver) on every call; here a validator is compiled for each schema once,
+at import. Errors are collected rather than stopping at the first, each as
+`<JSON path>: <message>`.
+"""
+from typing import Dict, List
+
+from jsonschema.validators import validator_for
+
+from ipif_hub.management.utils.ingest_schemas import (
+    FACTOID_LIST,
+    FACTOID_SCHEMA,
+    FLAT_LIST_SCHEMA,
+    PERSON_SOURCE_LIST,
+    PERSON_SOURCE_SCHEMA,
+    STATEMENT_LIST,
+    STATEMENT_SCHEMA,
+)
+
+
+def compile_validator(schema: Dict):
+    validator_class = validator_for(schema)
+    validator_class.check_schema(schema)
+    return validator_class(schema)
+
+
+VALIDATORS = {
+    "factoid": compile_validator(FACTOID_SCHEMA),
+    "person_source": compile_validator(PERSON_SOURCE_SCHEMA),
+    "statement": compile_validator(STATEMENT_SCHEMA),
+    "factoid_list": compile_validator(FACTOID_LIST),
+    "person_source_list": compile_validator(PERSON_SOURCE_LIST),
+    "statement_list": compile_validator(STATEMENT_LIST),
+    "flat_list": compile_validator(FLAT_LIST_SCHEMA),
+}
+
+# The schema of the items under each key of a batch
+BATCH_ITEM_SCHEMAS = {
+    "persons": "person_source",
+    "sources": "person_source",
+    "statements": "statement",
+    "factoids": "factoid",
+}
+
+
+class SchemaValidationError(Exception):
+    """All the errors found validating a payload"""
+
+    def __init__(self, errors: List[str]) -> None:
+        super().__init__("\n".join(errors))
+        self.errors = errors
+
+
+def schema_errors(schema_name: str, instance, path: str = "$") -> List[str]:
+    """Every error in `instance`, prefixed with its JSON path (under `path`, if
+    the instance is part of a larger payload)"""
+    errors = VALIDATORS[schema_name].iter_errors(instance)
+    return [
+        f"{path}{error.json_path[1:]}: {error.message}"
+        for error in sorted(errors, key=lambda error: error.json_path)
+    ]
+
+
+def validate_payload(schema_name: str, instance) -> None:
+    if errors := schema_errors(schema_name, instance):
+        raise SchemaValidationError(errors)
+
+
+def validate_batch(data: Dict) -> None:
+    """Validates every item of a batch of IPIF JSON (as taken by ingest_data)"""
+    errors = []
+    for key, schema_name in BATCH_ITEM_SCHEMAS.items():
+        for i, item in enumerate(data.get(key, [])):
+            errors += schema_errors(schema_name, item, f"$.{key}[{i}]")
+    if errors:
+        raise SchemaValidationError(errors)
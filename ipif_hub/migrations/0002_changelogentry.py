@@ -0,0 +1,25 @@
+# Generated by Django 3.2.25 on 2026-10-19 07:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ipif_hub', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLogEntry',
+            fields=[
+                ('seq', models.BigAutoField(primary_key=True, serialize=False)),
+                ('entity_type', models.CharField(max_length=20)),
+                ('entity_id', models.UUIDField(db_index=True)),
+                ('identifier', models.CharField(default='', max_length=300)),
+                ('ipif_repo_slug', models.CharField(blank=True, db_index=True, max_length=20)),
+                ('action', models.CharField(choices=[('created', 'created'), ('updated', 'updated'), ('deleted', 'deleted')], max_length=10)),
+                ('changed_when', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2.25 on 2026-10-19 07:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ipif_hub', '0002_changelogentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EntityIdentifier',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=300)),
+                ('entity_type', models.CharField(max_length=20)),
+                ('entity_id', models.UUIDField(db_index=True)),
+                ('ipif_repo_slug', models.CharField(blank=True, max_length=20)),
+                ('priority', models.PositiveSmallIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='entityidentifier',
+            index=models.Index(fields=['key', 'entity_type', 'ipif_repo_slug'], name='ipif_hub_en_key_318601_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 3.2.25 on 2026-10-19 07:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ipif_hub', '0003_entityidentifier'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PersonEdge',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('edge_type', models.CharField(choices=[('relatesToPerson', 'relatesToPerson'), ('sharedStatement', 'sharedStatement')], max_length=20)),
+                ('role', models.CharField(blank=True, default='', max_length=300)),
+                ('factoid', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='ipif_hub.factoid')),
+                ('other_factoid', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='ipif_hub.factoid')),
+                ('source_person', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='ipif_hub.person')),
+                ('statement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='ipif_hub.statement')),
+                ('target_person', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='ipif_hub.person')),
+            ],
+        ),
+    ]
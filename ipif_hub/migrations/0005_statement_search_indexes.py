@@ -0,0 +1,33 @@
+# Generated by Django 3.2.25 on 2026-10-19 07:38
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ipif_hub', '0004_personedge'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='place',
+            index=models.Index(django.db.models.functions.text.Upper('label'), name='place_label_upper'),
+        ),
+        migrations.AddIndex(
+            model_name='statement',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['statementText'], name='statement_text_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='statement',
+            index=models.Index(django.db.models.functions.text.Upper('role_label'), name='statement_role_label_upper'),
+        ),
+        migrations.AddIndex(
+            model_name='statement',
+            index=models.Index(django.db.models.functions.text.Upper('memberOf_label'), name='statement_memberof_label_upper'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicate_uris(apps, schema_editor):
+    # Kept apart from 0007, which makes URI.uri unique: PostgreSQL won't alter a
+    # table with pending (deferred) constraint checks from the deletes here.
+    # A copy of management.utils.dedupe_uris, so that later changes to it can't
+    # change what this migration does
+    URI = apps.get_model("ipif_hub", "URI")
+    entity_models = [
+        apps.get_model("ipif_hub", "Person"),
+        apps.get_model("ipif_hub", "Source"),
+    ]
+
+    duplicates = (
+        URI.objects.values("uri")
+        .annotate(count=Count("pk"), keep=Min("pk"))
+        .filter(count__gt=1)
+    )
+    for duplicate in duplicates:
+        keep = duplicate["keep"]
+        others = list(
+            URI.objects.filter(uri=duplicate["uri"])
+            .exclude(pk=keep)
+            .values_list("pk", flat=True)
+        )
+
+        # Move the others' links onto the URI kept
+        for entity_model in entity_models:
+            through = entity_model.uris.through
+            entity_field = f"{entity_model._meta.model_name}_id"
+            linked = set(
+                through.objects.filter(uri_id=keep).values_list(entity_field, flat=True)
+            )
+            to_link = (
+                set(
+                    through.objects.filter(uri_id__in=others).values_list(
+                        entity_field, flat=True
+                    )
+                )
+                - linked
+            )
+            through.objects.bulk_create(
+                [through(uri_id=keep, **{entity_field: pk}) for pk in to_link]
+            )
+
+        URI.objects.filter(pk__in=others).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ipif_hub', '0005_statement_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_uris, migrations.RunPython.noop),
+    ]
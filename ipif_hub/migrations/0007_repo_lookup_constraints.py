@@ -0,0 +1,83 @@
+# Generated by Django 3.2.25 on 2026-10-19 07:40
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ipif_hub', '0006_dedupe_uris'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='uri',
+            name='uri',
+            field=models.URLField(unique=True),
+        ),
+        migrations.AlterUniqueTogether(
+            name='factoid',
+            unique_together=set(),
+        ),
+        migrations.AlterUniqueTogether(
+            name='person',
+            unique_together=set(),
+        ),
+        migrations.AlterUniqueTogether(
+            name='source',
+            unique_together=set(),
+        ),
+        migrations.AlterUniqueTogether(
+            name='statement',
+            unique_together=set(),
+        ),
+        migrations.AddIndex(
+            model_name='factoid',
+            index=models.Index(fields=['ipif_repo', 'local_id'], name='factoid_repo_local_id'),
+        ),
+        migrations.AddIndex(
+            model_name='factoid',
+            index=django.contrib.postgres.indexes.HashIndex(fields=['inputContentHash'], name='factoid_content_hash'),
+        ),
+        migrations.AddIndex(
+            model_name='person',
+            index=models.Index(fields=['ipif_repo', 'local_id'], name='person_repo_local_id'),
+        ),
+        migrations.AddIndex(
+            model_name='person',
+            index=django.contrib.postgres.indexes.HashIndex(fields=['inputContentHash'], name='person_content_hash'),
+        ),
+        migrations.AddIndex(
+            model_name='source',
+            index=models.Index(fields=['ipif_repo', 'local_id'], name='source_repo_local_id'),
+        ),
+        migrations.AddIndex(
+            model_name='source',
+            index=django.contrib.postgres.indexes.HashIndex(fields=['inputContentHash'], name='source_content_hash'),
+        ),
+        migrations.AddIndex(
+            model_name='statement',
+            index=models.Index(fields=['ipif_repo', 'local_id'], name='statement_repo_local_id'),
+        ),
+        migrations.AddIndex(
+            model_name='statement',
+            index=django.contrib.postgres.indexes.HashIndex(fields=['inputContentHash'], name='statement_content_hash'),
+        ),
+        migrations.AddConstraint(
+            model_name='factoid',
+            constraint=models.UniqueConstraint(fields=('ipif_repo', 'identifier'), name='factoid_repo_identifier_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='person',
+            constraint=models.UniqueConstraint(fields=('ipif_repo', 'identifier'), name='person_repo_identifier_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='source',
+            constraint=models.UniqueConstraint(fields=('ipif_repo', 'identifier'), name='source_repo_identifier_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='statement',
+            constraint=models.UniqueConstraint(fields=('ipif_repo', 'identifier'), name='statement_repo_identifier_uniq'),
+        ),
+    ]
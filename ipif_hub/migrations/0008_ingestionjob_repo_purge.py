@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-19 07:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ipif_hub', '0007_repo_lookup_constraints'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ingestionjob',
+            name='job_type',
+            field=models.CharField(choices=[('file_batch_upload', 'file batch upload'), ('repo_purge', 'repo purge')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ipif_hub', '0008_ingestionjob_repo_purge'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ingestionjob',
+            name='job_type',
+            field=models.CharField(choices=[('file_batch_upload', 'file batch upload'), ('repo_purge', 'repo purge'), ('rest_post', 'REST POST')], max_length=20),
+        ),
+    ]
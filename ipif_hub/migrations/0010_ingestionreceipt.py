@@ -0,0 +1,33 @@
+# Generated by Django 3.2.25 on 2026-10-19 09:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ipif_hub', '0009_ingestionjob_rest_post'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestionReceipt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity_type', models.CharField(max_length=20)),
+                ('key', models.CharField(max_length=255)),
+                ('is_digest', models.BooleanField(default=False)),
+                ('digest', models.CharField(max_length=64)),
+                ('status', models.PositiveSmallIntegerField()),
+                ('response', models.JSONField()),
+                ('created_when', models.DateTimeField(auto_now_add=True)),
+                ('ipif_repo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='ipif_hub.ipifrepo')),
+                ('job', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='ipif_hub.ingestionjob')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='ingestionreceipt',
+            constraint=models.UniqueConstraint(fields=('ipif_repo', 'entity_type', 'is_digest', 'key'), name='unique_ingestion_receipt_key'),
+        ),
+    ]
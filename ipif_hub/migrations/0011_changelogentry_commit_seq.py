@@ -0,0 +1,35 @@
+# Generated by Django 3.2.25 on 2026-10-19 10:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ipif_hub', '0010_ingestionreceipt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='changelogentry',
+            name='commit_seq',
+            field=models.BigIntegerField(null=True, unique=True),
+        ),
+        # Existing entries keep their numbers, so feed tokens stay valid
+        migrations.RunSQL(
+            """
+            CREATE SEQUENCE ipif_hub_changelogentry_commit_seq;
+            UPDATE ipif_hub_changelogentry SET commit_seq = seq;
+            SELECT setval(
+                'ipif_hub_changelogentry_commit_seq',
+                COALESCE((SELECT max(seq) FROM ipif_hub_changelogentry), 0) + 1,
+                false
+            );
+            """,
+            reverse_sql="DROP SEQUENCE ipif_hub_changelogentry_commit_seq;",
+        ),
+        migrations.AddIndex(
+            model_name='changelogentry',
+            index=models.Index(condition=models.Q(('commit_seq__isnull', True)), fields=['seq'], name='changelogentry_unnumbered'),
+        ),
+    ]
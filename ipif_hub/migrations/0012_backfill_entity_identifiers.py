@@ -0,0 +1,118 @@
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def uris_by_entity(through, entity_field, pks):
+    uris = {}
+    for pk, uri in (
+        through.objects.filter(**{f"{entity_field}__in": pks})
+        .order_by("uri__uri")
+        .values_list(entity_field, "uri__uri")
+    ):
+        uris.setdefault(pk, []).append(uri)
+    return uris
+
+
+def unique_keys(keys):
+    # Keep the best priority for keys that appear more than once
+    found = {}
+    for key, priority in keys:
+        if key and key not in found:
+            found[key] = priority
+    return found.items()
+
+
+def fill_entity_identifiers(apps, schema_editor):
+    # Retrieval only reads EntityIdentifier, which was filled by reindexing
+    # alone: fill it for every entity that has no rows yet. A copy of
+    # resolution.get_identifier_keys, for the historical models
+    EntityIdentifier = apps.get_model("ipif_hub", "EntityIdentifier")
+    URI = apps.get_model("ipif_hub", "URI")
+    recorded = set(
+        EntityIdentifier.objects.values_list("entity_id", flat=True).distinct()
+    )
+
+    def fill(model, rows):
+        entity_type = model._meta.model_name
+        batch = []
+        for pk, repo_slug, keys in rows:
+            if pk in recorded:
+                continue
+            batch += [
+                EntityIdentifier(
+                    key=key,
+                    entity_type=entity_type,
+                    entity_id=pk,
+                    ipif_repo_slug=repo_slug,
+                    priority=priority,
+                )
+                for key, priority in unique_keys(keys)
+            ]
+        EntityIdentifier.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+
+    for name in ("Person", "Source", "Statement", "Factoid"):
+        model = apps.get_model("ipif_hub", name)
+        rows = model.objects.order_by("pk").values_list(
+            "pk", "ipif_repo_id", "identifier", "local_id"
+        )
+        for start in range(0, rows.count(), BATCH_SIZE):
+            chunk = list(rows[start : start + BATCH_SIZE])
+            uris = {}
+            if name in ("Person", "Source"):
+                uris = uris_by_entity(
+                    model.uris.through, name.lower(), [row[0] for row in chunk]
+                )
+            fill(
+                model,
+                [
+                    (
+                        pk,
+                        repo_slug,
+                        [
+                            (identifier, 0),
+                            (local_id, 1),
+                            *((uri, 2) for uri in uris.get(pk, [])),
+                        ],
+                    )
+                    for pk, repo_slug, identifier, local_id in chunk
+                ],
+            )
+
+    for name, merge_lookup in (
+        ("MergePerson", "persons__merge_person"),
+        ("MergeSource", "sources__merge_source"),
+    ):
+        model = apps.get_model("ipif_hub", name)
+        pks = list(model.objects.order_by("pk").values_list("pk", flat=True))
+        for start in range(0, len(pks), BATCH_SIZE):
+            chunk = pks[start : start + BATCH_SIZE]
+            uris = {}
+            for pk, uri in (
+                URI.objects.filter(**{f"{merge_lookup}__in": chunk})
+                .values_list(merge_lookup, "uri")
+                .distinct()
+            ):
+                uris.setdefault(pk, set()).add(uri)
+            fill(
+                model,
+                [
+                    (
+                        pk,
+                        "",
+                        [(str(pk), 0), *((uri, 2) for uri in sorted(uris.get(pk, ())))],
+                    )
+                    for pk in chunk
+                ],
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ipif_hub', '0011_changelogentry_commit_seq'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_entity_identifiers, migrations.RunPython.noop),
+    ]
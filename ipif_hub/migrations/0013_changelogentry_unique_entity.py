@@ -0,0 +1,28 @@
+# Generated by Django 3.2.25 on 2026-10-19 10:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ipif_hub', '0012_backfill_entity_identifiers'),
+    ]
+
+    operations = [
+        # Keep only the latest entry of any entity logged twice by concurrent
+        # reindexes
+        migrations.RunSQL(
+            """
+            DELETE FROM ipif_hub_changelogentry e
+            USING ipif_hub_changelogentry later
+            WHERE later.entity_id = e.entity_id AND later.seq > e.seq;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AlterField(
+            model_name='changelogentry',
+            name='entity_id',
+            field=models.UUIDField(unique=True),
+        ),
+    ]
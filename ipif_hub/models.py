@@ -3,15 +3,30 @@ from typing import Optional, Set
 from uuid import uuid4
 
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex, HashIndex
 from django.core.exceptions import ValidationError
 from django.core.validators import URLValidator
 from django.db import models
+from django.db.models.functions import Upper
 
 
 class IpifEntityAbstractBase(models.Model):
     class Meta:
         abstract = True
-        unique_together = [["local_id", "ipif_repo", "identifier"]]
+        # Entities are read by identifier or local_id, always within a repo
+        constraints = [
+            models.UniqueConstraint(
+                fields=["ipif_repo", "identifier"],
+                name="%(class)s_repo_identifier_uniq",
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["ipif_repo", "local_id"], name="%(class)s_repo_local_id"
+            ),
+            # Only ever compared for equality, when checking for changed input
+            HashIndex(fields=["inputContentHash"], name="%(class)s_content_hash"),
+        ]
 
     id: models.UUIDField = models.UUIDField(
         primary_key=True, editable=False, default=uuid4, db_index=True
@@ -71,7 +86,7 @@ class IpifEntityAbstractBase(models.Model):
 
 
 class URI(models.Model):
-    uri: models.URLField = models.URLField(db_index=True)
+    uri: models.URLField = models.URLField(unique=True)
 
     def __str__(self):
         return self.uri
@@ -170,6 +185,21 @@ class Person(IpifEntityAbstractBase):
 
 
 class Statement(IpifEntityAbstractBase):
+    class Meta(IpifEntityAbstractBase.Meta):
+        indexes = [
+            *IpifEntityAbstractBase.Meta.indexes,
+            # Trigram index for the substring (LIKE '%...%') statementText filter
+            GinIndex(
+                fields=["statementText"],
+                name="statement_text_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+            # For the case-insensitive (UPPER(...) = UPPER(...)) label filters
+            models.Index(Upper("role_label"), name="statement_role_label_upper"),
+            models.Index(
+                Upper("memberOf_label"), name="statement_memberof_label_upper"
+            ),
+        ]
 
     statementType_uri: models.URLField = models.URLField(
         blank=True, null=True, db_index=True
@@ -216,6 +246,9 @@ class Source(IpifEntityAbstractBase):
 
 
 class Place(models.Model):
+    class Meta:
+        indexes = [models.Index(Upper("label"), name="place_label_upper")]
+
     uri = models.URLField(primary_key=True, db_index=True)
     label = models.CharField(max_length=300, null=True, db_index=True)
 
@@ -261,7 +294,12 @@ class IngestionJob(models.Model):
     start_datetime = models.DateTimeField(default=datetime.now)
     end_datetime = models.DateTimeField(default=None, null=True, blank=True)
     job_type = models.CharField(
-        max_length=20, choices=(("file_batch_upload", "file batch upload"),)
+        max_length=20,
+        choices=(
+            ("file_batch_upload", "file batch upload"),
+            ("repo_purge", "repo purge"),
+            ("rest_post", "REST POST"),
+        ),
     )
     ipif_repo = models.ForeignKey("IpifRepo", on_delete=models.CASCADE)
 
@@ -279,6 +317,126 @@ class IngestionJob(models.Model):
         return None
 
 
+class IngestionReceipt(models.Model):
+    """A POST that has been ingested (or accepted as a job), with the response
+    given, so replays of it can be answered without ingesting it again.
+
+    Keyed by the client's Idempotency-Key header or, without one, by a digest
+    of the POST body."""
+
+    ipif_repo = models.ForeignKey("IpifRepo", on_delete=models.CASCADE)
+    entity_type = models.CharField(max_length=20)
+    key = models.CharField(max_length=255)
+    is_digest = models.BooleanField(default=False)
+    digest = models.CharField(max_length=64)
+    status = models.PositiveSmallIntegerField()
+    response = models.JSONField()
+    # For a POST ingested as a job, which forgets the receipt if it fails
+    job = models.ForeignKey(
+        "IngestionJob", on_delete=models.CASCADE, null=True, blank=True
+    )
+    created_when = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["ipif_repo", "entity_type", "is_digest", "key"],
+                name="unique_ingestion_receipt_key",
+            )
+        ]
+
+
+class ChangeLogEntry(models.Model):
+    """One row per changed (or deleted) indexed entity, for the changes feed.
+
+    Rows are written whenever an entity's document is (re)indexed or deleted,
+    replacing the entity's previous row, so the table holds just the latest
+    change per entity (plus tombstones), ordered by `commit_seq`.
+
+    `seq` is assigned on insert, so rows can commit out of `seq` order (a long
+    transaction commits its low `seq`s after short ones commit higher ones).
+    The feed instead pages by `commit_seq`, which is assigned only once a row
+    has committed (see changes.assign_commit_seqs)."""
+
+    seq = models.BigAutoField(primary_key=True)
+    commit_seq = models.BigIntegerField(null=True, unique=True)
+    entity_type = models.CharField(max_length=20)
+    entity_id = models.UUIDField(unique=True)
+    identifier = models.CharField(max_length=300, default="")
+    # Slug rather than FK, so tombstones outlive the repository itself
+    ipif_repo_slug = models.CharField(max_length=20, blank=True, db_index=True)
+    action = models.CharField(
+        max_length=10,
+        choices=(
+            ("created", "created"),
+            ("updated", "updated"),
+            ("deleted", "deleted"),
+        ),
+    )
+    changed_when = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["seq"],
+                condition=models.Q(commit_seq__isnull=True),
+                name="changelogentry_unnumbered",
+            )
+        ]
+
+
+class EntityIdentifier(models.Model):
+    """One row per key (identifier, local_id or URI) an indexed entity can be
+    looked up by, pointing at the entity and so at its Solr document.
+
+    Kept up to date whenever an entity is (re)indexed or deleted, so ids
+    can be resolved exactly, rather than via Solr's analyzed text fields."""
+
+    key = models.CharField(max_length=300)
+    entity_type = models.CharField(max_length=20)
+    entity_id = models.UUIDField(db_index=True)
+    # Slug rather than FK, as with ChangeLogEntry; blank for merge entities
+    ipif_repo_slug = models.CharField(max_length=20, blank=True)
+    # Where one key belongs to several entities, the lowest priority wins
+    # (i.e. an entity's own identifier beats its local_id beats its other URIs)
+    priority = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        indexes = [models.Index(fields=["key", "entity_type", "ipif_repo_slug"])]
+
+
+class PersonEdge(models.Model):
+    """A link between two persons, derived from one of a factoid's statements:
+    either the statement `relatesToPerson` another person (keeping the role),
+    or another person's factoid shares the statement.
+
+    Rebuilt whenever the factoid is (re)indexed, so the person graph can be
+    walked one query per hop."""
+
+    source_person = models.ForeignKey(
+        "Person", on_delete=models.CASCADE, related_name="+"
+    )
+    target_person = models.ForeignKey(
+        "Person", on_delete=models.CASCADE, related_name="+"
+    )
+    edge_type = models.CharField(
+        max_length=20,
+        choices=(
+            ("relatesToPerson", "relatesToPerson"),
+            ("sharedStatement", "sharedStatement"),
+        ),
+    )
+    role = models.CharField(max_length=300, blank=True, default="")
+    statement = models.ForeignKey(
+        "Statement", on_delete=models.CASCADE, related_name="+"
+    )
+    factoid = models.ForeignKey("Factoid", on_delete=models.CASCADE, related_name="+")
+    # For sharedStatement edges, the other person's factoid
+    other_factoid = models.ForeignKey(
+        "Factoid", on_delete=models.CASCADE, related_name="+", null=True
+    )
+
+
 def get_ipif_hub_repo_AUTOCREATED_instance() -> IpifRepo:
     try:
         ipif_hub_repo_AUTOCREATED = IpifRepo.objects.get(
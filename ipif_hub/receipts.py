@@ -0,0 +1,87 @@
+"""Receipts for ingested POSTs, so that replays can be answered at once.
+
+Clients retry POSTs after timeouts, and re-send identical batches. A POST
+that is ingested leaves a receipt, keyed by its Idempotency-Key header or,
+without one, by a digest of its body; a replay with the same key gets the
+recorded response back without being validated or ingested again.
+
+A digest only says that the same body was ingested, not that the repo still
+holds what it did then. So a repo's digest receipts for a type are forgotten
+when another POST of that type is ingested, and all of them when the repo is
+ingested into any other way. Receipts expire after IPIF_INGEST_RECEIPT_TTL.
+"""
+import hashlib
+from datetime import timedelta
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from ipif_hub.models import IngestionJob, IngestionReceipt, IpifRepo
+
+
+def payload_digest(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
+
+
+def current_receipts(ipif_repo: IpifRepo, entity_type: str):
+    expired = timezone.now() - timedelta(seconds=settings.IPIF_INGEST_RECEIPT_TTL)
+    return IngestionReceipt.objects.filter(
+        ipif_repo=ipif_repo, entity_type=entity_type, created_when__gt=expired
+    )
+
+
+def find_receipt(
+    ipif_repo: IpifRepo, entity_type: str, key: Optional[str], digest: str
+) -> Optional[IngestionReceipt]:
+    """The receipt for an earlier POST with the idempotency key (if given) or
+    the same digest, if there is one"""
+    if key:
+        receipts = current_receipts(ipif_repo, entity_type).filter(
+            is_digest=False, key=key
+        )
+    else:
+        receipts = current_receipts(ipif_repo, entity_type).filter(
+            is_digest=True, key=digest
+        )
+    return receipts.first()
+
+
+def record_receipt(
+    ipif_repo: IpifRepo,
+    entity_type: str,
+    key: Optional[str],
+    digest: str,
+    status: int,
+    response: Dict,
+    job: Optional[IngestionJob] = None,
+) -> None:
+    """Records the response to an ingested POST, forgetting the digest receipts
+    (and expired receipts) it makes stale"""
+    expired = timezone.now() - timedelta(seconds=settings.IPIF_INGEST_RECEIPT_TTL)
+    IngestionReceipt.objects.filter(
+        ipif_repo=ipif_repo, created_when__lte=expired
+    ).delete()
+    IngestionReceipt.objects.filter(
+        ipif_repo=ipif_repo, entity_type=entity_type, is_digest=True
+    ).delete()
+
+    IngestionReceipt.objects.update_or_create(
+        ipif_repo=ipif_repo,
+        entity_type=entity_type,
+        is_digest=not key,
+        key=key or digest,
+        defaults={
+            "digest": digest,
+            "status": status,
+            "response": response,
+            "job": job,
+            "created_when": timezone.now(),
+        },
+    )
+
+
+def forget_digest_receipts(ipif_repo: IpifRepo) -> None:
+    """Forgets the repo's digest receipts, as its data is being changed other
+    than by a POST"""
+    IngestionReceipt.objects.filter(ipif_repo=ipif_repo, is_digest=True).delete()
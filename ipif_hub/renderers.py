@@ -0,0 +1,63 @@
+"""Compact binary renderers for the IPIF API, picked by content negotiation.
+
+Alongside JSON, responses can be requested as MessagePack
+(`Accept: application/msgpack`, or `?format=msgpack`) and, if cbor2 is
+installed, CBOR (`Accept: application/cbor`, or `?format=cbor`). Documents keep
+the same structure as in JSON; anything JSON would render as a string (dates,
+UUIDs...) is rendered as the same string.
+
+The CBOR renderer is only offered if cbor2 (the `cbor` extra) can be imported,
+so without it a request for CBOR gets a 406.
+"""
+from typing import List
+
+import msgpack
+from rest_framework.renderers import BaseRenderer, BrowsableAPIRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import cbor2
+except ImportError:  # pragma: no cover
+    cbor2 = None
+
+
+json_encoder = JSONEncoder()
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, use_bin_type=True, default=json_encoder.default)
+
+
+class CBORRenderer(BaseRenderer):
+    media_type = "application/cbor"
+    format = "cbor"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return cbor2.dumps(
+            data,
+            default=lambda encoder, value: encoder.encode(json_encoder.default(value)),
+        )
+
+
+def get_ipif_renderers() -> List:
+    """The renderers for the IPIF API views: JSON (and the browsable API) first,
+    then MessagePack, and CBOR if available"""
+    renderers: List = [JSONRenderer, BrowsableAPIRenderer, MessagePackRenderer]
+    if cbor2 is not None:
+        renderers.append(CBORRenderer)
+    return renderers
+
+
+IPIF_RENDERERS = get_ipif_renderers()
@@ -0,0 +1,278 @@
+"""Exact resolution of entities by identifier, URI or local_id.
+
+Solr's `identifier`, `uris` and `local_id` fields are analyzed text, so looking
+an id up there is slow and can match the wrong document. Instead, every key an
+entity can be looked up by is kept in the EntityIdentifier table, pointing at
+the entity's Solr document; resolving an id is then an exact (and usually
+cached) lookup, followed by fetching the document by its unique key.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+
+from ipif_hub.changes import TRACKED_MODELS
+from ipif_hub.documents import decode_document
+from ipif_hub.models import EntityIdentifier, MergePerson, MergeSource, Person, Source
+from ipif_hub.search import fetch_documents
+
+
+class IdentifierCache:
+    """A thread-safe LRU cache whose entries also expire after `ttl` seconds.
+
+    Each process has its own cache, and identifiers are mostly recorded by
+    Celery workers, so expiry (and dropping entries whose document turns out
+    to have gone) is what stops other processes serving stale mappings."""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value, expires = self._entries[key]
+            except KeyError:
+                return None
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, key) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+identifier_cache = IdentifierCache(
+    settings.IPIF_IDENTIFIER_CACHE_SIZE, settings.IPIF_IDENTIFIER_CACHE_TTL
+)
+
+
+def build_document_id(entity_type: str, entity_id) -> str:
+    """The Solr unique key Haystack gives an entity's document"""
+    return f"ipif_hub.{entity_type}.{entity_id}"
+
+
+def get_entity_id(document_id: str) -> str:
+    """The pk of the entity a Solr document belongs to"""
+    return document_id.rsplit(".", 1)[1]
+
+
+def get_identifier_keys(instance) -> List[Tuple[str, int]]:
+    """Returns the (key, priority) pairs an entity can be looked up by"""
+    if isinstance(instance, (MergePerson, MergeSource)):
+        keys = [(str(instance.pk), 0), *((uri, 2) for uri in sorted(instance.uri_set))]
+    else:
+        keys = [(instance.identifier, 0), (instance.local_id, 1)]
+        if isinstance(instance, (Person, Source)):
+            keys += [(uri.uri, 2) for uri in instance.uris.all()]
+
+    # Keep the best priority for keys that appear more than once
+    unique_keys: Dict[str, int] = {}
+    for key, priority in keys:
+        if key and key not in unique_keys:
+            unique_keys[key] = priority
+    return list(unique_keys.items())
+
+
+def _forget_cached_keys(entity_type: str, repo_slug: str, keys: Iterable[str]):
+    for key in keys:
+        identifier_cache.discard((entity_type, repo_slug, key))
+        identifier_cache.discard((entity_type, "", key))
+
+
+def record_identifiers(instance) -> None:
+    """Replaces the stored lookup keys of an entity with its current ones"""
+    if not isinstance(instance, TRACKED_MODELS):
+        return
+
+    entity_type = type(instance).__name__.lower()
+    repo_slug = (
+        ""
+        if isinstance(instance, (MergePerson, MergeSource))
+        else instance.ipif_repo_id
+    )
+    keys = get_identifier_keys(instance)
+
+    previous = EntityIdentifier.objects.filter(entity_id=instance.pk)
+    with transaction.atomic():
+        previous_keys = list(previous.values_list("key", flat=True))
+        previous.delete()
+        EntityIdentifier.objects.bulk_create(
+            EntityIdentifier(
+                key=key,
+                entity_type=entity_type,
+                entity_id=instance.pk,
+                ipif_repo_slug=repo_slug,
+                priority=priority,
+            )
+            for key, priority in keys
+        )
+
+    _forget_cached_keys(entity_type, repo_slug, [*previous_keys, *dict(keys)])
+
+
+def remove_identifiers(instance) -> None:
+    """Removes the stored lookup keys of a deleted entity"""
+    if not isinstance(instance, TRACKED_MODELS):
+        return
+
+    previous = EntityIdentifier.objects.filter(entity_id=instance.pk)
+    for entity_type, repo_slug, key in previous.values_list(
+        "entity_type", "ipif_repo_slug", "key"
+    ):
+        _forget_cached_keys(entity_type, repo_slug, [key])
+    previous.delete()
+
+
+def resolve_document_ids(
+    keys: Iterable[str], ipif_type: str, repo: Optional[str] = None
+) -> Dict[str, str]:
+    """Maps each key to the Solr id of the entity of `ipif_type` it belongs to
+    (in `repo`, if given), leaving out keys that match nothing"""
+    repo_slug = repo or ""
+    document_ids = {}
+    misses = []
+    for key in keys:
+        if document_id := identifier_cache.get((ipif_type, repo_slug, key)):
+            document_ids[key] = document_id
+        else:
+            misses.append(key)
+
+    if misses:
+        rows = EntityIdentifier.objects.filter(key__in=misses, entity_type=ipif_type)
+        if repo:
+            rows = rows.filter(ipif_repo_slug=repo)
+        for key, entity_id in rows.order_by("priority", "entity_id").values_list(
+            "key", "entity_id"
+        ):
+            if key not in document_ids:
+                document_ids[key] = build_document_id(ipif_type, entity_id)
+                identifier_cache.set((ipif_type, repo_slug, key), document_ids[key])
+
+    return document_ids
+
+
+def resolve_documents_by_type(
+    keys_by_type: Dict[str, Iterable[str]], repo: Optional[str] = None
+) -> Dict[str, Dict[str, str]]:
+    """Maps each key to the pre-serialized document of the entity of that type
+    it belongs to, leaving out keys that match nothing. The documents of all
+    the types are fetched from Solr together."""
+    document_ids = {
+        ipif_type: resolve_document_ids(keys, ipif_type, repo)
+        for ipif_type, keys in keys_by_type.items()
+    }
+    documents = fetch_documents(
+        {d for ids in document_ids.values() for d in ids.values()}
+    )
+
+    # A cached id whose document has gone is stale: forget it, and go back to
+    # the database for those keys
+    refreshed_ids = {}
+    for ipif_type, ids in document_ids.items():
+        if stale := [k for k, d in ids.items() if d not in documents]:
+            for key in stale:
+                identifier_cache.discard((ipif_type, repo or "", key))
+            refreshed_ids[ipif_type] = resolve_document_ids(stale, ipif_type, repo)
+
+    if refreshed_ids:
+        documents.update(
+            fetch_documents(
+                {d for ids in refreshed_ids.values() for d in ids.values()}
+                - set(documents)
+            )
+        )
+        for ipif_type, ids in refreshed_ids.items():
+            document_ids[ipif_type].update(ids)
+
+    return {
+        ipif_type: {
+            key: documents[document_id]["pre_serialized"]
+            for key, document_id in ids.items()
+            if document_id in documents
+        }
+        for ipif_type, ids in document_ids.items()
+    }
+
+
+def resolve_documents(
+    keys: Iterable[str], ipif_type: str, repo: Optional[str] = None
+) -> Dict[str, str]:
+    """Maps each key to the pre-serialized document of the entity it belongs to,
+    leaving out keys that match nothing"""
+    return resolve_documents_by_type({ipif_type: keys}, repo)[ipif_type]
+
+
+URI_LOOKUP_TYPES = {
+    "person": "persons",
+    "source": "sources",
+    "mergeperson": "mergePerson",
+    "mergesource": "mergeSource",
+}
+
+
+def lookup_uris(uris: Iterable[str], repo: Optional[str] = None) -> Dict[str, dict]:
+    """Finds every Person and Source carrying each URI, grouped by repo, along
+    with the MergePerson/MergeSource cluster the URI belongs to.
+
+    One (indexed) query on the EntityIdentifier table finds all the entities,
+    and their documents come from Solr in a single fetch by unique key.
+    URIs matching nothing are left out."""
+    uris = list(uris)
+    rows = (
+        EntityIdentifier.objects.filter(
+            key__in=uris, entity_type__in=list(URI_LOOKUP_TYPES)
+        )
+        .exclude(ipif_repo_slug="IPIFHUB_AUTOCREATED")
+        .order_by("ipif_repo_slug", "priority", "entity_id")
+        .values_list("key", "entity_type", "entity_id", "ipif_repo_slug")
+    )
+    if repo:
+        # Merge entities have no repo, so are always included
+        rows = rows.filter(ipif_repo_slug__in=[repo, ""])
+
+    matches = [
+        (key, entity_type, build_document_id(entity_type, entity_id), repo_slug)
+        for key, entity_type, entity_id, repo_slug in rows
+    ]
+    documents = fetch_documents({document_id for _, _, document_id, _ in matches})
+
+    results: Dict[str, dict] = {}
+    for key, entity_type, document_id, repo_slug in matches:
+        if document_id not in documents:
+            continue
+        result = results.setdefault(
+            key,
+            {"persons": {}, "sources": {}, "mergePerson": None, "mergeSource": None},
+        )
+        document = decode_document(documents[document_id]["pre_serialized"])
+        group = URI_LOOKUP_TYPES[entity_type]
+        if entity_type in {"mergeperson", "mergesource"}:
+            # Entities sharing a URI are always grouped into the same cluster
+            result[group] = result[group] or document
+        else:
+            result[group].setdefault(repo_slug, []).append(document)
+
+    return results
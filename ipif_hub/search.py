@@ -1,3 +1,4 @@
+from haystack import connections
 from haystack.backends.solr_backend import SolrEngine, SolrSearchBackend
 
 
@@ -16,3 +17,54 @@ class AutoCommitSolrEngine(SolrEngine):
     """
 
     backend = AutoCommitSolrSearchBackend
+
+
+def get_solr_connection(using="default"):
+    """Returns the underlying pysolr connection, for the few things (cursorMark
+    deep paging, facet ranges, delete-by-query) that Haystack doesn't expose"""
+    return connections[using].get_backend().conn
+
+
+def remove_documents(document_ids, chunk_size=1000, using="default"):
+    """Removes documents by their unique key, a chunk of ids per request (rather
+    than one request per document, as Haystack's remove() does)"""
+    document_ids = list(document_ids)
+    conn = get_solr_connection(using)
+    for start in range(0, len(document_ids), chunk_size):
+        conn.delete(id=document_ids[start : start + chunk_size], commit=False)
+
+
+def remove_repo_documents(repo_slug: str, using="default"):
+    """Removes every document of a repo's persons, sources, statements and
+    factoids with a single delete-by-query"""
+    get_solr_connection(using).delete(q=f'ipif_repo_slug:"{repo_slug}"', commit=False)
+
+
+def iter_solr_documents(fq, fl="pre_serialized", rows=500, using="default"):
+    """Yields every Solr document matching the filter queries, paging with
+    cursorMark so the cost of each page stays the same however deep we are"""
+    conn = get_solr_connection(using)
+    cursor_mark = "*"
+    while True:
+        results = conn.search(
+            "*:*", fq=fq, fl=fl, sort="id asc", rows=rows, cursorMark=cursor_mark
+        )
+        yield from results.docs
+        if not results.docs or results.nextCursorMark == cursor_mark:
+            return
+        cursor_mark = results.nextCursorMark
+
+
+def fetch_documents(document_ids, fl="id,pre_serialized", using="default"):
+    """Fetches documents by their unique key (e.g. `ipif_hub.person.<pk>`) in a
+    single query, returning them keyed by id"""
+    document_ids = list(document_ids)
+    if not document_ids:
+        return {}
+    results = get_solr_connection(using).search(
+        "*:*",
+        fq="{!terms f=id}" + ",".join(document_ids),
+        fl=fl,
+        rows=len(document_ids),
+    )
+    return {doc["id"]: doc for doc in results.docs}
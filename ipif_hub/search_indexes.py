@@ -1,9 +1,14 @@
 import datetime
-import json
 import os
 
 from haystack import indexes
 
+from ipif_hub.documents import (
+    MergePersonDocumentSerializer,
+    MergeSourceDocumentSerializer,
+    encode_document,
+    get_document_serializer_from_model,
+)
 from ipif_hub.models import Factoid, MergePerson, MergeSource, Person, Source, Statement
 from ipif_hub.serializers import (
     FactoidSerializer,
@@ -92,6 +97,9 @@ class BaseIndex(indexes.SearchIndex):
 
     text = indexes.CharField(document=True, use_template=True)
 
+    # Label, name and URIs, edge-ngrammed for the suggest (typeahead) view
+    suggest = indexes.EdgeNgramField()
+
     def prepare_ipif_repo_id(self, inst):
         return inst.ipif_repo.endpoint_uri
 
@@ -102,8 +110,9 @@ class BaseIndex(indexes.SearchIndex):
         return self.get_model().__name__.lower()
 
     def prepare_pre_serialized(self, inst):
-        serializer = get_serializer_from_model(self.get_model())
-        return json.dumps(serializer(inst).data)
+        serializer = get_document_serializer_from_model(self.get_model())
+        serializer.prefetch_instances([inst])
+        return encode_document(serializer(inst).data)
 
     def prepare_uris(self, inst):
         values = []
@@ -111,6 +120,14 @@ class BaseIndex(indexes.SearchIndex):
             values.append(uri.uri)
         return values
 
+    def prepare_suggest(self, inst):
+        values = [inst.label]
+        if self.get_model() in {Person, Source}:
+            values += [inst.identifier, *(uri.uri for uri in inst.uris.all())]
+        if self.get_model() is Statement:
+            values.append(inst.name)
+        return " ".join(v for v in values if v)
+
     def prepare_sort_personId(self, inst):
         if self.get_model().__name__ == "Factoid":
             return inst.person.local_id
@@ -269,7 +286,8 @@ class BaseIndex(indexes.SearchIndex):
         # automatically by saving the model, so nothing can change without being reindexed...
         # in which case, whole thing is slightly redundant???)
         """Used when the entire index for model is updated."""
-        return (
+        serializer = get_document_serializer_from_model(self.get_model())
+        return serializer.setup_queryset(
             self.get_model()
             .objects.filter(hubModifiedWhen__lte=datetime.datetime.now())
             .exclude(ipif_repo__pk="IPIFHUB_AUTOCREATED")
@@ -360,9 +378,33 @@ class StatementIndex(BaseIndex, indexes.Indexable):
         use_template=True, template_name=get_template("person_via_related_factoid.txt")
     )
 
+    # Unanalyzed copies of the values the statements endpoint can be faceted on
+    statementType_facet = indexes.CharField(null=True)
+    role_facet = indexes.CharField(null=True)
+    memberOf_facet = indexes.CharField(null=True)
+    place_facet = indexes.MultiValueField()
+    date_decade = indexes.IntegerField(null=True)
+
     def get_model(self):
         return Statement
 
+    def prepare_statementType_facet(self, inst):
+        return inst.statementType_label or inst.statementType_uri or None
+
+    def prepare_role_facet(self, inst):
+        return inst.role_label or inst.role_uri or None
+
+    def prepare_memberOf_facet(self, inst):
+        return inst.memberOf_label or inst.memberOf_uri or None
+
+    def prepare_place_facet(self, inst):
+        return [place.label or place.uri for place in inst.places.all()]
+
+    def prepare_date_decade(self, inst):
+        if inst.date_sortdate:
+            return inst.date_sortdate.year // 10 * 10
+        return None
+
 
 class MergePersonIndex(indexes.SearchIndex, indexes.Indexable):
     def get_model(self):
@@ -374,8 +416,9 @@ class MergePersonIndex(indexes.SearchIndex, indexes.Indexable):
     local_id = indexes.CharField(model_attr="id")
     uris = indexes.MultiValueField()
     ipif_type = indexes.CharField()
-    # label = indexes.CharField(model_attr="label")
+    label = indexes.CharField()
     pre_serialized = indexes.CharField()
+    suggest = indexes.EdgeNgramField()
 
     st = indexes.CharField(
         use_template=True, template_name=get_template("statements_via_merge_person.txt")
@@ -421,14 +464,23 @@ class MergePersonIndex(indexes.SearchIndex, indexes.Indexable):
     sort_to = indexes.DateTimeField()
 
     def prepare_uris(self, inst):
-        return list(inst.uri_set)
+        return sorted(inst.uri_set)
+
+    def prepare_label(self, inst):
+        labels = inst.persons.exclude(label="").order_by("label")
+        return labels.values_list("label", flat=True).first() or ""
+
+    def prepare_suggest(self, inst):
+        labels = inst.persons.exclude(label="").values_list("label", flat=True)
+        return " ".join([*labels.distinct(), *inst.uri_set])
 
     def prepare_ipif_type(self, inst):
         return self.get_model().__name__.lower()
 
     def prepare_pre_serialized(self, inst):
-        serializer = MergePersonSerializer
-        return json.dumps(serializer(inst).data)
+        serializer = MergePersonDocumentSerializer
+        serializer.prefetch_instances([inst])
+        return encode_document(serializer(inst).data)
 
     def prepare_sort_personId(self, inst):
         if person := inst.persons.order_by("local_id").first():
@@ -555,8 +607,9 @@ class MergeSourceIndex(indexes.SearchIndex, indexes.Indexable):
     local_id = indexes.CharField(model_attr="id")
     uris = indexes.MultiValueField()
     ipif_type = indexes.CharField()
-    # label = indexes.CharField(model_attr="label")
+    label = indexes.CharField()
     pre_serialized = indexes.CharField()
+    suggest = indexes.EdgeNgramField()
 
     st = indexes.CharField(
         use_template=True, template_name=get_template("statements_via_merge_source.txt")
@@ -602,14 +655,23 @@ class MergeSourceIndex(indexes.SearchIndex, indexes.Indexable):
     sort_to = indexes.DateTimeField()
 
     def prepare_uris(self, inst):
-        return list(inst.uri_set)
+        return sorted(inst.uri_set)
+
+    def prepare_label(self, inst):
+        labels = inst.sources.exclude(label="").order_by("label")
+        return labels.values_list("label", flat=True).first() or ""
+
+    def prepare_suggest(self, inst):
+        labels = inst.sources.exclude(label="").values_list("label", flat=True)
+        return " ".join([*labels.distinct(), *inst.uri_set])
 
     def prepare_ipif_type(self, inst):
         return self.get_model().__name__.lower()
 
     def prepare_pre_serialized(self, inst):
-        serializer = MergeSourceSerializer
-        return json.dumps(serializer(inst).data)
+        serializer = MergeSourceDocumentSerializer
+        serializer.prefetch_instances([inst])
+        return encode_document(serializer(inst).data)
 
     def prepare_sort_personId(self, inst):
         if (
@@ -1,7 +1,8 @@
 from itertools import filterfalse
-from typing import List
+from typing import Dict, List
 
 from django.conf import settings
+from django.db.models import Prefetch, prefetch_related_objects
 from rest_framework import serializers
 
 from ipif_hub.models import (
@@ -32,6 +33,35 @@ class PlaceSerializer(serializers.ModelSerializer):
         return {"label": data["label"], "uri": data["uri"]}
 
 
+class PrefetchProfileMixin:
+    """Declares the related objects a serializer walks, so they can be loaded
+    up front — for a queryset, or for instances already fetched — in a fixed
+    number of queries, however many related objects there are"""
+
+    select_related: List = []
+    prefetch_related: List = []
+
+    @classmethod
+    def setup_queryset(cls, queryset):
+        return queryset.select_related(*cls.select_related).prefetch_related(
+            *cls.prefetch_related
+        )
+
+    @classmethod
+    def prefetch_instances(cls, instances) -> None:
+        prefetch_related_objects(
+            list(instances), *cls.select_related, *cls.prefetch_related
+        )
+
+
+def factoid_refs_prefetch(path: str = "factoids") -> List:
+    """Prefetches for serializing the factoids at `path` with FactoidRefSerializer"""
+    return [
+        Prefetch(path, queryset=Factoid.objects.select_related("person", "source")),
+        f"{path}__statements",
+    ]
+
+
 class GenericRefSerializer:
     def to_representation(self, instance):
         data = super().to_representation(instance)
@@ -58,7 +88,11 @@ class StatementRefSerializer(GenericRefSerializer, serializers.ModelSerializer):
         fields = ["identifier", "label"]
 
 
-class FactoidRefSerializer(GenericRefSerializer, serializers.ModelSerializer):
+class FactoidRefSerializer(
+    PrefetchProfileMixin, GenericRefSerializer, serializers.ModelSerializer
+):
+    select_related = ["person", "source"]
+    prefetch_related = ["statements"]
 
     person = PersonRefSerializer()
     source = SourceRefSerializer()
@@ -98,7 +132,9 @@ class FactoidSerializer(FactoidRefSerializer):
         ]
 
 
-class PersonSerializer(serializers.ModelSerializer):
+class PersonSerializer(PrefetchProfileMixin, serializers.ModelSerializer):
+    prefetch_related = ["uris", *factoid_refs_prefetch()]
+
     uris = URISerlializer(many=True)
     factoids = FactoidRefSerializer(many=True)
 
@@ -136,7 +172,9 @@ class PersonSerializer(serializers.ModelSerializer):
         return return_data
 
 
-class SourceSerializer(serializers.ModelSerializer):
+class SourceSerializer(PrefetchProfileMixin, serializers.ModelSerializer):
+    prefetch_related = ["uris", *factoid_refs_prefetch()]
+
     uris = URISerlializer(many=True)
     factoids = FactoidRefSerializer(many=True)
 
@@ -171,7 +209,18 @@ class SourceSerializer(serializers.ModelSerializer):
         }
 
 
-class StatementSerializer(GenericRefSerializer, serializers.ModelSerializer):
+class StatementSerializer(
+    PrefetchProfileMixin, GenericRefSerializer, serializers.ModelSerializer
+):
+    # relatesToPerson is serialized to depth 2, which takes in each person's
+    # uris and repository (with its owners)
+    prefetch_related = [
+        "places",
+        "relatesToPerson__uris",
+        "relatesToPerson__ipif_repo__owners",
+        *factoid_refs_prefetch(),
+    ]
+
     places = PlaceSerializer(many=True)
     factoids = FactoidRefSerializer(many=True)
 
@@ -215,62 +264,114 @@ class StatementSerializer(GenericRefSerializer, serializers.ModelSerializer):
         return return_dict
 
 
-class MergePersonSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = MergePerson
-        exclude = ["persons"]
+def choose_merge_uri(uris) -> str:
+    """Picks the @id for a merge entity: the first URI that isn't one of
+    the hub's own"""
+    for uri in uris:
+        if not uri.startswith(settings.IPIF_BASE_URI):
+            return uri
+    return "http://merge_source.com"
+
+
+def merge_factoid_refs(factoids, member: str) -> List[dict]:
+    """Builds the factoid refs of a merge entity's members, as
+    FactoidRefSerializer would, from one flat query: a row for each factoid
+    and statement, ordered by member and then factoid"""
+    rows = factoids.order_by(
+        f"{member}__identifier", f"{member}_id", "identifier", "pk"
+    ).values_list(
+        "pk",
+        "identifier",
+        "label",
+        "person__identifier",
+        "person__label",
+        "source__identifier",
+        "source__label",
+        "statements__identifier",
+        "statements__label",
+    )
+
+    refs: Dict = {}
+    for (
+        pk,
+        identifier,
+        label,
+        person_identifier,
+        person_label,
+        source_identifier,
+        source_label,
+        statement_identifier,
+        statement_label,
+    ) in rows:
+        if pk not in refs:
+            refs[pk] = {
+                "@id": identifier,
+                "label": label,
+                "person-ref": {"@id": person_identifier, "label": person_label},
+                "source-ref": {"@id": source_identifier, "label": source_label},
+                "statement-refs": [],
+            }
+        # Factoids without statements come back with a single empty row
+        if statement_identifier is not None:
+            refs[pk]["statement-refs"].append(
+                {"@id": statement_identifier, "label": statement_label}
+            )
+    return list(refs.values())
+
+
+class MergeEntitySerializer(PrefetchProfileMixin, serializers.ModelSerializer):
+    """Serializes a merge entity in two queries, however many members it has:
+    one for the members' factoids with their refs, and one for their URIs.
+    Nothing needs prefetching, so the prefetch profile is empty"""
+
+    # The members' field on Factoid, and the merge entity's on a member
+    member = ""
+    merge_relation = ""
+
+    @classmethod
+    def get_uris(cls, instance) -> List[str]:
+        return sorted(
+            set(
+                URI.objects.filter(
+                    **{f"{cls.member}s__{cls.merge_relation}": instance}
+                ).values_list("uri", flat=True)
+            )
+        )
+
+    @classmethod
+    def get_factoid_refs(cls, instance) -> List[dict]:
+        return merge_factoid_refs(
+            Factoid.objects.filter(**{f"{cls.member}__{cls.merge_relation}": instance}),
+            cls.member,
+        )
 
-    def to_representation(self, instance: MergePerson):
+    def to_representation(self, instance):
 
         data = super().to_representation(instance)
         _ = data.pop("id")
-        uris = list(instance.uri_set)
-        chosen_uri = "http://merge_source.com"
-
-        for uri in uris:
-            if not uri.startswith(settings.IPIF_BASE_URI):
-                chosen_uri = uri
-                break
+        uris = self.get_uris(instance)
 
-        return_data = {"@id": chosen_uri, **data}
+        return_data = {"@id": choose_merge_uri(uris), **data}
         return_data["uris"] = uris
 
-        return_data["factoid-refs"] = []
-
-        for person in instance.persons.all():
-            if factoids := person.factoids.all():
-                return_data["factoid-refs"] += FactoidRefSerializer(
-                    factoids, many=True
-                ).data
+        return_data["factoid-refs"] = self.get_factoid_refs(instance)
 
         return return_data
 
 
-class MergeSourceSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = MergeSource
-        exclude = ["sources"]
-
-    def to_representation(self, instance: MergeSource):
+class MergePersonSerializer(MergeEntitySerializer):
+    member = "person"
+    merge_relation = "merge_person"
 
-        data = super().to_representation(instance)
-        _ = data.pop("id")
-        uris = list(instance.uri_set)
-        chosen_uri = "http://merge_source.com"
-        for uri in uris:
-            if not uri.startswith(settings.IPIF_BASE_URI):
-                chosen_uri = uri
-                break
-
-        return_data = {"@id": chosen_uri, **data}
-        return_data["uris"] = uris
+    class Meta:
+        model = MergePerson
+        exclude = ["persons"]
 
-        return_data["factoid-refs"] = []
 
-        for source in instance.sources.all():
-            if factoids := source.factoids.all():
-                return_data["factoid-refs"] += FactoidRefSerializer(
-                    factoids, many=True
-                ).data
+class MergeSourceSerializer(MergeEntitySerializer):
+    member = "source"
+    merge_relation = "merge_source"
 
-        return return_data
+    class Meta:
+        model = MergeSource
+        exclude = ["sources"]
@@ -0,0 +1,53 @@
+"""Batching of what deleting persons, sources etc. triggers.
+
+Deleting a person or source normally regroups its merge person/source in
+pre_delete, and the haystack signal processor removes each deleted entity's
+Solr document with its own request. Inside `batch_deletes()`, both are
+deferred: each affected merge entity is regrouped once, when the block ends,
+and the documents are removed with one Solr request once the transaction
+commits.
+"""
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+
+from ipif_hub.search import remove_documents
+from ipif_hub.signals.handler_utils import (
+    regroup_merge_persons,
+    regroup_merge_sources,
+)
+
+
+class DeletionBatch(threading.local):
+    def __init__(self) -> None:
+        self._reset()
+
+    def _reset(self):
+        self.active = False
+        self.document_ids = []
+        self.merge_persons = set()
+        self.merge_sources = set()
+
+
+deletion_batch = DeletionBatch()
+
+
+@contextmanager
+def batch_deletes():
+    """Defers merge regrouping and Solr removal for the deletes in the block.
+    Must be used inside a transaction."""
+    if deletion_batch.active:  # Already batching further up
+        yield deletion_batch
+        return
+
+    deletion_batch.active = True
+    try:
+        yield deletion_batch
+        # Regrouping can delete merge entities, whose documents join the batch
+        regroup_merge_persons(deletion_batch.merge_persons)
+        regroup_merge_sources(deletion_batch.merge_sources)
+        document_ids = list(deletion_batch.document_ids)
+        transaction.on_commit(lambda: remove_documents(document_ids))
+    finally:
+        deletion_batch._reset()
@@ -38,10 +38,15 @@ def build_uri_from_base(
 
 def build_extra_uris(instance):
     AUTOCREATED = get_ipif_hub_repo_AUTOCREATED_instance()
-    repo_name = instance.ipif_repo.endpoint_slug
     if instance.ipif_repo == AUTOCREATED:
         # Autocreated persons don't need a load of extra identifiers
         return [instance.identifier]
+    return build_repo_uris(instance)
+
+
+def build_repo_uris(instance):
+    """The URIs an entity from a (non-autocreated) repo is given besides its own"""
+    repo_name = instance.ipif_repo.endpoint_slug
     return [
         instance.identifier,
         build_uri_from_base(instance, instance.identifier),
@@ -53,14 +58,8 @@ def build_extra_uris(instance):
 def add_extra_uris(instance):
     uris_to_add = []
     for u in build_extra_uris(instance):
-
-        try:
-            uri = URI.objects.get(uri=u)
-            uris_to_add.append(uri)
-        except URI.DoesNotExist:
-            uri = URI(uri=u)
-            uri.save()
-            uris_to_add.append(uri)
+        uri, _ = URI.objects.get_or_create(uri=u)
+        uris_to_add.append(uri)
     # print("Adding uris", uris_to_add, "to person", instance)
     instance.uris.add(*uris_to_add)
 
@@ -170,6 +169,30 @@ def handle_delete_person_updating_merge_persons(person_to_delete: Person) -> Non
     old_merge_person.delete()
 
 
+def regroup_merge_persons(merge_persons) -> None:
+    """After a batch of persons has been deleted, regroups the remaining persons
+    of each affected MergePerson by common URIs, replacing it with a MergePerson
+    per group (or just deleting it, if none are left)"""
+    for old_merge_person in merge_persons:
+        remaining_persons = list(old_merge_person.persons.prefetch_related("uris"))
+        uri_sets = [
+            {uri.uri for uri in person.uris.all()} for person in remaining_persons
+        ]
+        for uri_group in merge_uri_sets([list(uris) for uris in uri_sets]):
+            uri_group = set(uri_group)
+            new_merged_person = MergePerson(
+                createdBy="ipif-hub",
+                createdWhen=datetime.date.today(),
+                modifiedBy="ipif-hub",
+                modifiedWhen=datetime.date.today(),
+            )
+            new_merged_person.save()
+            new_merged_person.persons.add(
+                *(p for p, uris in zip(remaining_persons, uri_sets) if uris & uri_group)
+            )
+        old_merge_person.delete()
+
+
 def handle_merge_source_from_source_update(new_source):
     """Receives a Source object"""
 
@@ -278,3 +301,27 @@ def split_merge_source_on_uri_delete(instance, kwargs):
                 new_merged_source.sources.add(*sources)
 
             ms.delete()
+
+
+def regroup_merge_sources(merge_sources) -> None:
+    """After a batch of sources has been deleted, regroups the remaining sources
+    of each affected MergeSource by common URIs, replacing it with a MergeSource
+    per group (or just deleting it, if none are left)"""
+    for old_merge_source in merge_sources:
+        remaining_sources = list(old_merge_source.sources.prefetch_related("uris"))
+        uri_sets = [
+            {uri.uri for uri in source.uris.all()} for source in remaining_sources
+        ]
+        for uri_group in merge_uri_sets([list(uris) for uris in uri_sets]):
+            uri_group = set(uri_group)
+            new_merged_source = MergeSource(
+                createdBy="ipif-hub",
+                createdWhen=datetime.date.today(),
+                modifiedBy="ipif-hub",
+                modifiedWhen=datetime.date.today(),
+            )
+            new_merged_source.save()
+            new_merged_source.sources.add(
+                *(s for s, uris in zip(remaining_sources, uri_sets) if uris & uri_group)
+            )
+        old_merge_source.delete()
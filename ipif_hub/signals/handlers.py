@@ -1,9 +1,12 @@
+import threading
+
 from celery import chord, group
 from django.db import transaction
 from django.db.models.signals import m2m_changed, post_save, pre_delete
 from django.dispatch import receiver
 
 from ipif_hub.models import Factoid, MergePerson, MergeSource, Person, Source, Statement
+from ipif_hub.signals.deletion_batch import deletion_batch
 from ipif_hub.signals.handler_utils import (
     add_extra_uris,
     handle_delete_person_updating_merge_persons,
@@ -24,13 +27,15 @@ from ipif_hub.tasks import (
 )
 
 
-class CeleryCallBundle:
+class CeleryCallBundle(threading.local):
     """Class to bundle together calls to update indexes and call them *once*
     (by using self.already_called flag) after the transaction has completed.
 
     - Add relevant type with CeleryCallBundle.add_*()
     - To be called inside a transaction.on_commit from a signal
 
+    Each thread (so each database connection, and its transactions) has its
+    own bundle, so parallel ingestion threads don't share one.
     """
 
     def __init__(self) -> None:
@@ -207,6 +212,9 @@ def person_m2m_changed(sender, instance, **kwargs):
 
 @receiver(pre_delete, sender=Person)
 def person_pre_delete(sender, instance, **kwargs):
+    if deletion_batch.active:
+        deletion_batch.merge_persons.update(instance.merge_person.all())
+        return
 
     handle_delete_person_updating_merge_persons(instance)
 
@@ -233,6 +241,9 @@ def source_m2m_changed(sender, instance, **kwargs):
 
 @receiver(pre_delete, sender=Source)
 def source_pre_delete(sender, instance, **kwargs):
+    if deletion_batch.active:
+        deletion_batch.merge_sources.update(instance.merge_source.all())
+        return
 
     handle_delete_source_updating_merge_sources(instance)
 
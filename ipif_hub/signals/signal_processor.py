@@ -1,5 +1,10 @@
 from django.db import models
 from haystack import signals
+from haystack.utils import get_identifier
+
+from ipif_hub.changes import record_change
+from ipif_hub.resolution import remove_identifiers
+from ipif_hub.signals.deletion_batch import deletion_batch
 
 
 class SignalProcessor(signals.BaseSignalProcessor):
@@ -16,3 +21,20 @@ class SignalProcessor(signals.BaseSignalProcessor):
         models.signals.post_delete.disconnect(self.handle_delete)
         # Efficient would be going through all backends & collecting all models
         # being used, then disconnecting signals only for those.
+
+    def is_indexed(self, sender) -> bool:
+        return (
+            sender
+            in self.connections["default"].get_unified_index().get_indexed_models()
+        )
+
+    def handle_delete(self, sender, instance, **kwargs):
+        if deletion_batch.active:
+            # Removed from Solr along with the rest of the batch
+            if self.is_indexed(sender):
+                deletion_batch.document_ids.append(get_identifier(instance))
+        else:
+            super().handle_delete(sender, instance, **kwargs)
+        # Leave a tombstone in the changes feed
+        record_change(instance, deleted=True)
+        remove_identifiers(instance)
@@ -1,21 +1,43 @@
 import datetime
-import sys
-from io import StringIO
+import json
+import threading
 
 import requests
 from celery import shared_task
 from celery.utils.log import get_task_logger
-
-from ipif_hub.management.utils.ingest_data import ingest_data
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+
+from ipif_hub.changes import record_change
+from ipif_hub.graph import record_edges
+from ipif_hub.management.utils.copy_ingest import copy_ingest_data
+from ipif_hub.management.utils.ingest_data import (
+    LIST_INGESTERS,
+    DataFormatError,
+    DataIntegrityError,
+    ingest_data,
+)
+from ipif_hub.management.utils.ingest_events import IngestEvents, collect_events
+from ipif_hub.management.utils.pipeline import ingest_data_in_parallel
+from ipif_hub.management.utils.purge_repo import purge_repo
+from ipif_hub.management.utils.validation import (
+    SchemaValidationError,
+    validate_payload,
+)
 from ipif_hub.models import (
     Factoid,
     IngestionJob,
+    IngestionReceipt,
+    IpifRepo,
     MergePerson,
     MergeSource,
     Person,
     Source,
     Statement,
 )
+from ipif_hub.resolution import record_identifiers
 from ipif_hub.search_indexes import (
     FactoidIndex,
     MergePersonIndex,
@@ -34,6 +56,15 @@ mergePersonIndex = MergePersonIndex()
 mergeSourceIndex = MergeSourceIndex()
 
 
+def update_index(index, instance):
+    """Reindexes an entity, and records the change, its (possibly changed)
+    identifiers and, for a factoid, the person graph edges it makes"""
+    index.update_object(instance)
+    record_change(instance)
+    record_identifiers(instance)
+    record_edges(instance)
+
+
 @shared_task
 def call_commit(*args, **kwargs):
 
@@ -45,7 +76,7 @@ def call_commit(*args, **kwargs):
 def update_merge_person_index(instance_pk):
     try:
         merge_person = MergePerson.objects.get(pk=instance_pk)
-        mergePersonIndex.update_object(merge_person)
+        update_index(mergePersonIndex, merge_person)
     except MergePerson.DoesNotExist:
         pass
 
@@ -54,7 +85,7 @@ def update_merge_person_index(instance_pk):
 def update_merge_source_index(instance_pk):
     try:
         merge_source = MergeSource.objects.get(pk=instance_pk)
-        mergeSourceIndex.update_object(merge_source)
+        update_index(mergeSourceIndex, merge_source)
     except MergeSource.DoesNotExist:
         pass
 
@@ -66,30 +97,31 @@ def update_factoid_index(instance_pk):
         # factoid_searches = FactoidIndex.objects.filter(django_id=instance_pk)
         # for factoid_search in factoid_searches:
         factoid = Factoid.objects.get(pk=instance_pk)
-        factoidIndex.update_object(factoid)
+        update_index(factoidIndex, factoid)
 
         person = factoid.person
-        personIndex.update_object(person)
+        update_index(personIndex, person)
 
         if merge_person := person.merge_person.first():
-            mergePersonIndex.update_object(merge_person)
+            update_index(mergePersonIndex, merge_person)
 
         source = factoid.source
-        sourceIndex.update_object(source)
+        update_index(sourceIndex, source)
 
         if merge_source := source.merge_source.first():
-            mergeSourceIndex.update_object(merge_source)
+            update_index(mergeSourceIndex, merge_source)
 
         statements = factoid.statements.all()
         for statement in statements:
-            statementIndex.update_object(statement)
+            update_index(statementIndex, statement)
     except Factoid.DoesNotExist:
         pass
 
 
 @shared_task
 def update_person_index(instance_pk):
-    personIndex.update_object(Person.objects.get(pk=instance_pk))
+    person = Person.objects.get(pk=instance_pk)
+    update_index(personIndex, person)
 
     # if merge_person := person.merge_person.first():
     #    update_merge_person_index(merge_person.pk)
@@ -97,48 +129,151 @@ def update_person_index(instance_pk):
 
 @shared_task
 def update_source_index(instance_pk):
-    sourceIndex.update_object(Source.objects.get(pk=instance_pk))
+    source = Source.objects.get(pk=instance_pk)
+    update_index(sourceIndex, source)
 
 
 @shared_task
 def update_statement_index(instance_pk):
-    statementIndex.update_object(Statement.objects.get(pk=instance_pk))
+    statement = Statement.objects.get(pk=instance_pk)
+    update_index(statementIndex, statement)
+
+
+class JobProgress(threading.Thread):
+    """Saves an ingest's events to its job every IPIF_INGEST_PROGRESS_INTERVAL
+    seconds while the ingest runs. Being another thread, it has its own
+    database connection, so the saves are seen before the ingest's transaction
+    commits."""
+
+    def __init__(self, job: IngestionJob, events: IngestEvents) -> None:
+        super().__init__(daemon=True)
+        self.job = job
+        self.events = events
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        try:
+            while not self.stopped.wait(settings.IPIF_INGEST_PROGRESS_INTERVAL):
+                IngestionJob.objects.filter(pk=self.job.pk).update(
+                    job_output=json.dumps(self.events.as_dict())
+                )
+        finally:
+            connection.close()
+
+    def __enter__(self) -> "JobProgress":
+        self.start()
+        return self
 
+    def __exit__(self, *args) -> None:
+        self.stopped.set()
+        self.join()
 
-class Capturing(list):
-    """Grabs stdout and returns results as an array"""
 
-    def __enter__(self):
-        self._stdout = sys.stdout
-        sys.stdout = self._stringio = StringIO()
-        return self
-
-    def __exit__(self, *args):
-        self.extend(self._stringio.getvalue().splitlines())
-        del self._stringio  # free up some memory
-        sys.stdout = self._stdout
+def finish_job(job: IngestionJob, status: str, output) -> None:
+    job.is_complete = True
+    job.job_output = json.dumps(output)
+    job.job_status = status
+    job.end_datetime = datetime.datetime.now()
+    job.save()
 
 
 @shared_task
-def ingest_json_data_task(repo_id, data, job_id=None):
+def ingest_json_data_task(
+    repo_id, data, job_id=None, use_copy=False, parallel=False, validated=False
+):
     job = IngestionJob.objects.get(pk=job_id)
 
     job.job_status = "running"
     job.save()
-    with Capturing() as output:
-        ingest_data(repo_id, data)
+    status = "successful"
+    events = IngestEvents()
+    with JobProgress(job, events), collect_events(events):
+        try:
+            if use_copy:
+                copy_ingest_data(repo_id, data, validated=validated)
+            elif parallel:
+                ingest_data_in_parallel(repo_id, data, validated=validated)
+            else:
+                ingest_data(repo_id, data, validated=validated)
+        except (DataFormatError, DataIntegrityError) as e:
+            status = "failed"
+            events.raised(e)
+            # Parallel ingests commit chunk by chunk, so keep what they did
+            if not parallel:
+                events.roll_back()
+        except Exception as e:
+            # Any other error (from the database or Solr, say, once the
+            # pipeline's retries run out) fails the job, rather than leaving
+            # it running
+            status = "failed"
+            logger.exception("Ingesting data into repo %s failed", repo_id)
+            events.raised(e)
+            if not parallel:
+                events.roll_back()
+
+    finish_job(job, status, events.as_dict())
+
+
+def spool_post_data(job: IngestionJob, body: bytes) -> str:
+    """Saves a POST body for ingest_posted_data_task, so it needn't pass
+    through the broker. Returns its name in the default storage."""
+    return default_storage.save(f"ingest_spool/{job.id}.json", ContentFile(body))
 
-    job.is_complete = True
-    job.job_output = output
-    job.job_status = "successful"
-    job.end_datetime = datetime.datetime.now()
+
+@shared_task
+def ingest_posted_data_task(repo_id, entity_type, spool_name, job_id):
+    """Ingests a list of persons, sources, statements or factoids POSTed to
+    the API in async mode (spooled by spool_post_data)"""
+    job = IngestionJob.objects.get(pk=job_id)
+
+    job.job_status = "running"
     job.save()
+    schema_name, ingest = LIST_INGESTERS[entity_type]
+    status = "successful"
+    events = IngestEvents()
+    with JobProgress(job, events), collect_events(events):
+        try:
+            with default_storage.open(spool_name) as f:
+                data = json.load(f)
+            validate_payload(schema_name, data)
+            ingest(data, IpifRepo.objects.get(pk=repo_id), validated=True)
+        except json.JSONDecodeError:
+            status = "failed"
+            events.error("Posted data is not parseable as JSON")
+        except SchemaValidationError as e:
+            status = "failed"
+            for error in e.errors:
+                events.error(error)
+        except (DataFormatError, DataIntegrityError) as e:
+            status = "failed"
+            # The items before the one that failed are kept
+            events.raised(e)
+        except Exception as e:
+            status = "failed"
+            logger.exception("Ingesting posted data into repo %s failed", repo_id)
+            events.raised(e)
+        finally:
+            default_storage.delete(spool_name)
+
+    if status == "failed":
+        # So the POST can be corrected and retried
+        IngestionReceipt.objects.filter(job=job).delete()
+    finish_job(job, status, events.as_dict())
+
 
-    """ # Don't need this any more
-    send_mail(
-        subject="Upload complete",
-        message=json.dumps(output),
-        recipient_list=["oculardexterity@gmail.com"],
-        from_email="ipif@hub.com",
-    )
-    """
+@shared_task
+def purge_repo_task(repo_id, job_id):
+    job = IngestionJob.objects.get(pk=job_id)
+
+    job.job_status = "running"
+    job.save()
+    try:
+        deleted = purge_repo(IpifRepo.objects.get(pk=repo_id))
+    except Exception as e:
+        # Any error (from the database or Solr) fails the job, rather than
+        # leaving it running
+        logger.exception("Purging repo %s failed", repo_id)
+        finish_job(job, "failed", {"errors": str(e).splitlines()})
+        return
+
+    finish_job(job, "successful", {"deleted": deleted})
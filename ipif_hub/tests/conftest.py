@@ -22,6 +22,7 @@ from ipif_hub.models import (
     Statement,
     get_ipif_hub_repo_AUTOCREATED_instance,
 )
+from ipif_hub.resolution import identifier_cache
 from ipif_hub.signals.handlers import celeryCallBundle
 
 
@@ -35,9 +36,11 @@ def _setup():
         backend="memory",
     ):
         celeryCallBundle._reset()
+        identifier_cache.clear()
         call_command("clear_index", interactive=False, verbosity=0)
         yield
         call_command("clear_index", interactive=False, verbosity=0)
+        identifier_cache.clear()
         celeryCallBundle._reset()
 
 
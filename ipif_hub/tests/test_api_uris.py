@@ -1,7 +1,17 @@
+import json
+
 import pytest
 from rest_framework.test import APIClient
 
-from ipif_hub.models import Factoid, IpifRepo, Person, Source, Statement
+from ipif_hub.models import (
+    Factoid,
+    IngestionJob,
+    IngestionReceipt,
+    IpifRepo,
+    Person,
+    Source,
+    Statement,
+)
 from ipif_hub.serializers import (
     FactoidSerializer,
     MergePersonSerializer,
@@ -115,10 +125,7 @@ def test_request_post_data(repo: IpifRepo):
         format="json",
     )
     assert response.status_code == 200
-    assert (
-        "Creating <Person @id=http://test.com/persons/Person1>"
-        in response.data["detail"]
-    )
+    assert response.data["detail"]["counts"]["person"]["created"] == 1
 
     response = client.get(f"/{repo.endpoint_slug}/ipif/persons/Person1")
     assert response.status_code == 200
@@ -140,10 +147,7 @@ def test_request_post_data(repo: IpifRepo):
         format="json",
     )
     assert response.status_code == 200
-    assert (
-        "Creating <Source @id=http://test.com/sources/Source1>"
-        in response.data["detail"]
-    )
+    assert response.data["detail"]["counts"]["source"]["created"] == 1
     response = client.get(f"/{repo.endpoint_slug}/ipif/sources/Source1")
     assert response.status_code == 200
     assert response.data == SourceSerializer(Source.objects.first()).data
@@ -182,14 +186,7 @@ def test_request_post_data(repo: IpifRepo):
         format="json",
     )
     assert response.status_code == 200
-    assert (
-        "Creating <Statement @id=http://test.com/statements/St1-John-Smith-Name>"
-        in response.data["detail"]
-    )
-    assert (
-        "Creating <Statement @id=http://test.com/statements/St2-jsmith-teacher>"
-        in response.data["detail"]
-    )
+    assert response.data["detail"]["counts"]["statement"]["created"] == 2
 
     response = client.get(f"/{repo.endpoint_slug}/ipif/statements/St1-John-Smith-Name")
     assert response.status_code == 200
@@ -220,11 +217,119 @@ def test_request_post_data(repo: IpifRepo):
         format="json",
     )
     assert response.status_code == 200
-    assert (
-        "Creating <Factoid @id=http://test.com/factoids/Factoid1>"
-        in response.data["detail"]
-    )
+    assert response.data["detail"]["counts"]["factoid"]["created"] == 1
 
     response = client.get(f"/{repo.endpoint_slug}/ipif/factoids/Factoid1")
     assert response.status_code == 200
     assert response.data == FactoidSerializer(Factoid.objects.first()).data
+
+
+@pytest.mark.django_db(transaction=True)
+def test_request_post_factoids_with_dangling_references(person, source):
+    factoids = [
+        {
+            "@id": f"Factoid{i}",
+            "person-ref": {"@id": person_id},
+            "source-ref": {"@id": "source1"},
+            "statement-refs": [],
+            "createdBy": "Researcher4",
+            "createdWhen": "2012-04-23",
+            "modifiedBy": "Researcher2",
+            "modifiedWhen": "2012-04-23",
+        }
+        for i, person_id in enumerate(["person1", "Nobody1", "Nobody2"], 1)
+    ]
+    client = APIClient()
+    response = client.post(
+        f"/{person.ipif_repo.endpoint_slug}/ipif/factoids/",
+        data=factoids,
+        format="json",
+    )
+
+    assert response.status_code == 400
+    assert response.data["detail"].splitlines() == [
+        "IPIF JSON Error: Factoid: Factoid2 references non-existant Person @id='Nobody1'",
+        "IPIF JSON Error: Factoid: Factoid3 references non-existant Person @id='Nobody2'",
+    ]
+    assert not Factoid.objects.exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_request_post_data_as_job(repo: IpifRepo):
+    person_data = {
+        "@id": "Person1",
+        "label": "Person Number One",
+        "uris": ["http://ahpiss.com/Person1"],
+        "createdBy": "Researcher3",
+        "createdWhen": "2012-04-23",
+        "modifiedBy": "Researcher4",
+        "modifiedWhen": "2012-04-23",
+    }
+    client = APIClient()
+    response = client.post(
+        f"/{repo.endpoint_slug}/ipif/persons/?async=true",
+        data=[person_data],
+        format="json",
+    )
+    assert response.status_code == 202
+
+    job = IngestionJob.objects.get(job_type="rest_post")
+    assert response.data["job_uri"].endswith(f"/job/{job.id}/")
+    assert job.job_status == "successful"
+    assert json.loads(job.job_output)["counts"]["person"]["created"] == 1
+    assert Person.objects.get().local_id == "Person1"
+
+    del person_data["createdBy"]
+    response = client.post(
+        f"/{repo.endpoint_slug}/ipif/sources/?async=true",
+        data=[person_data],
+        format="json",
+    )
+    assert response.status_code == 202
+
+    job = IngestionJob.objects.get(job_type="rest_post", job_status="failed")
+    assert json.loads(job.job_output)["errors"] == [
+        "$[0]: 'createdBy' is a required property"
+    ]
+    assert not Source.objects.exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_request_post_data_replay(repo: IpifRepo):
+    person_data = {
+        "@id": "Person1",
+        "label": "Person Number One",
+        "uris": ["http://ahpiss.com/Person1"],
+        "createdBy": "Researcher3",
+        "createdWhen": "2012-04-23",
+        "modifiedBy": "Researcher4",
+        "modifiedWhen": "2012-04-23",
+    }
+    client = APIClient()
+    url = f"/{repo.endpoint_slug}/ipif/persons/"
+    response = client.post(url, data=[person_data], format="json")
+    assert response.status_code == 200
+    assert response.data["detail"]["counts"]["person"]["created"] == 1
+
+    # The replay gets the recorded response, rather than one of no change
+    replay = client.post(url, data=[person_data], format="json")
+    assert replay.status_code == 200
+    assert replay.data == response.data
+    assert IngestionReceipt.objects.get().is_digest
+
+    # Once other data is POSTed, the first payload is ingested again
+    client.post(url, data=[{**person_data, "label": "Changed"}], format="json")
+    response = client.post(url, data=[person_data], format="json")
+    assert response.data["detail"]["counts"]["person"]["updated"] == 1
+
+    response = client.post(
+        url, data=[person_data], format="json", HTTP_IDEMPOTENCY_KEY="batch-1"
+    )
+    assert response.status_code == 200
+    response = client.post(
+        url,
+        data=[{**person_data, "label": "Changed"}],
+        format="json",
+        HTTP_IDEMPOTENCY_KEY="batch-1",
+    )
+    assert response.status_code == 422
@@ -7,7 +7,7 @@ from pytest_django.asserts import assertNumQueries
 from rest_framework import viewsets
 from rest_framework.request import Request
 from rest_framework.response import Response
-from rest_framework.test import APIRequestFactory
+from rest_framework.test import APIClient, APIRequestFactory
 
 from ipif_hub.api_views import (
     FactoidViewSet,
@@ -36,7 +36,7 @@ def build_request_with_params(**params) -> Request:
         params["from"] = params.pop("_from")
 
     factory = APIRequestFactory()
-    temp_get_request = factory.get(f"/?{urlencode(params)}")
+    temp_get_request = factory.get(f"/?{urlencode(params, doseq=True)}")
     req = Request(temp_get_request)
     return req
 
@@ -70,7 +70,9 @@ def test_build_statement_filters_name_wildcard():
 def test_build_statement_filters_role():
     req = build_request_with_params(role="janitor")
     statement_filters = build_statement_filters(req)
-    assert statement_filters == [Q(role_uri="janitor") | Q(role_label="janitor")]
+    assert statement_filters == [
+        Q(role_uri="janitor") | Q(role_label__iexact="janitor")
+    ]
 
 
 def test_build_statement_filters_role_wildcard():
@@ -95,7 +97,7 @@ def test_build_statement_filters_place():
     req = build_request_with_params(place="Gibraltar")
     statement_filters = build_statement_filters(req)
     assert statement_filters == [
-        Q(places__uri="Gibraltar") | Q(places__label="Gibraltar")
+        Q(places__uri="Gibraltar") | Q(places__label__iexact="Gibraltar")
     ]
 
 
@@ -147,12 +149,29 @@ def test_build_statement_filters_multiple():
     statement_filters = build_statement_filters(req)
     assert statement_filters == [
         Q(name="John"),
-        Q(places__uri="Gibraltar") | Q(places__label="Gibraltar"),
+        Q(places__uri="Gibraltar") | Q(places__label__iexact="Gibraltar"),
         Q(date_sortdate__gte=datetime.date(1900, 1, 1)),
         Q(date_sortdate__lte=datetime.date(2000, 10, 1)),
     ]
 
 
+@pytest.mark.django_db(transaction=True)
+def test_build_statement_filters_match_labels_case_insensitively(statement):
+    for params in [
+        {"role": "UNEMPLOYED"},
+        {"memberOf": "made up organisation"},
+        {"place": "nowhere"},
+        {"statementText": "a Member of"},
+    ]:
+        req = build_request_with_params(**params)
+        statement_filters = build_statement_filters(req)
+        assert list(Statement.objects.filter(*statement_filters)) == [statement]
+
+    req = build_request_with_params(statementText="a member of")
+    statement_filters = build_statement_filters(req)
+    assert not Statement.objects.filter(*statement_filters).exists()
+
+
 def test_query_dict():
     # Dealing with Factoid directly (no path)
     assert query_dict("")("statement__name", "John") == {"statement__name": "John"}
@@ -341,6 +360,53 @@ def test_retrieve_view_fails_with_non_uri_id_and_no_repo(person, factoid):
     }
 
 
+@pytest.mark.django_db(transaction=True)
+def test_batch_retrieve_view_returns_documents_in_request_order(
+    factoid, factoid2, statement, statement2
+):
+    vs = StatementViewSet()
+
+    req = build_request_with_params(id=["statement2", "statement1", "nonexistent"])
+    # One query to resolve the ids...
+    with assertNumQueries(1):
+        response = vs.batch(request=req, repo="testrepo")
+
+    assert response.status_code == 200
+    assert response.data["results"] == [
+        StatementSerializer(statement2).data,
+        StatementSerializer(statement).data,
+    ]
+    assert response.data["missing"] == ["nonexistent"]
+
+    # ...after which the found ones are cached (misses are always looked up)
+    with assertNumQueries(1):
+        response = vs.batch(request=req, repo="testrepo")
+    assert len(response.data["results"]) == 2
+
+
+@pytest.mark.django_db(transaction=True)
+def test_batch_retrieve_view_returns_merge_person_with_no_repo(person, factoid):
+    vs = PersonViewSet()
+
+    req = build_request_with_params(id=["http://alternative.com/person1"])
+    response = vs.batch(request=req)
+
+    assert response.status_code == 200
+    assert response.data["results"] == [
+        MergePersonSerializer(person.merge_person.first()).data
+    ]
+    assert response.data["missing"] == []
+
+
+@pytest.mark.django_db(transaction=True)
+def test_batch_retrieve_view_fails_with_non_uri_id_and_no_repo(person, factoid):
+    vs = PersonViewSet()
+
+    req = build_request_with_params(id=["person1"])
+    response = vs.batch(request=req)
+    assert response.status_code == 400
+
+
 """
 N.B. assertNumQueries(0) context manager is used below to check that none
 of the queries hit the Django database —— all work should be done with
@@ -643,6 +709,47 @@ def test_list_view_pagination(person, person2, factoid):
     ]
 
 
+@pytest.mark.django_db(transaction=True)
+def test_list_view_pagination_envelope(person, person2, factoid):
+    vs = PersonViewSet()
+
+    req = build_request_with_params(size=1, page=1, sortBy="personId", envelope="true")
+    with assertNumQueries(0):
+        response = vs.list(request=req, repo="testrepo")
+    assert response.status_code == 200
+    assert response.data["count"] == 2
+    assert response.data["page"] == 1
+    assert response.data["size"] == 1
+    assert response.data["pages"] == 2
+    assert response.data["prev"] is None
+    assert "page=2" in response.data["next"]
+    assert response.data["results"] == [PersonSerializer(person).data]
+
+    req = build_request_with_params(size=1, page=2, sortBy="personId", envelope="true")
+    response = vs.list(request=req, repo="testrepo")
+    assert response.data["next"] is None
+    assert "page=1" in response.data["prev"]
+    assert response.data["results"] == [PersonSerializer(person2).data]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_list_view_count_only(person, person2, factoid, statement):
+    vs = PersonViewSet()
+
+    req = build_request_with_params(count="true")
+    with assertNumQueries(0):
+        response = vs.list(request=req, repo="testrepo")
+    assert response.status_code == 200
+    assert response.data == {"count": 2}
+
+    # Count also works when the ORM is needed to filter
+    req = build_request_with_params(
+        count="true", statementId="http://test.com/statements/statement1"
+    )
+    response = vs.list(request=req, repo="testrepo")
+    assert response.data == {"count": 1}
+
+
 @pytest.mark.django_db(transaction=True)
 def test_list_view_with_id_query_params(person, factoid, statement):
     vs = PersonViewSet()
@@ -968,3 +1075,85 @@ def test_params_query_correctly(factoid, statement, person):
     assert response.status_code == 200
     assert len(response.data) == 1
     assert response.data == [PersonSerializer(person).data]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_statement_facets_view(statement, statement2):
+    client = APIClient()
+    response = client.get("/testrepo/ipif/statements/facets/")
+    assert response.status_code == 200
+    assert response.data["count"] == 2
+
+    facets = response.data["facets"]
+    assert {(f["value"], f["count"]) for f in facets["statementType"]} == {
+        ("All Purpose Statement", 1),
+        ("naming", 1),
+    }
+    assert facets["role"] == [{"value": "unemployed", "count": 1}]
+    assert facets["memberOf"] == [{"value": "Made Up Organisation", "count": 1}]
+    assert facets["place"] == [{"value": "Nowhere", "count": 1}]
+    assert [(str(f["value"]), f["count"]) for f in facets["decade"]] == [("1900", 1)]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_statement_facets_view_with_filters(statement, statement2):
+    client = APIClient()
+    response = client.get(
+        "/testrepo/ipif/statements/facets/?name=Johannes Schmitt&facet=statementType"
+    )
+    assert response.status_code == 200
+    assert response.data == {
+        "count": 1,
+        "facets": {"statementType": [{"value": "naming", "count": 1}]},
+    }
+
+    response = client.get("/testrepo/ipif/statements/facets/?name=Nobody")
+    assert response.data["count"] == 0
+
+    response = client.get("/testrepo/ipif/statements/facets/?facet=colour")
+    assert response.status_code == 400
+
+    response = client.get("/testrepo/ipif/statements/facets/?limit=abc")
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db(transaction=True)
+def test_suggest_view(person, person_no_uri, factoid):
+    vs = PersonViewSet()
+
+    req = build_request_with_params(q="Pers")
+    response = vs.suggest(request=req, repo="testrepo")
+    assert response.status_code == 200
+    assert sorted(response.data, key=lambda r: r["@id"]) == [
+        {"@id": "http://test.com/persons/person1", "label": "Person One"},
+        {"@id": "http://test.com/persons/person_no_uri", "label": "person no uri"},
+    ]
+
+    req = build_request_with_params(q="person on")
+    response = vs.suggest(request=req, repo="testrepo")
+    assert response.data == [
+        {"@id": "http://test.com/persons/person1", "label": "Person One"}
+    ]
+
+    # Matches on URIs too, and returns merge persons with no repo
+    req = build_request_with_params(q="alternative")
+    response = vs.suggest(request=req)
+    assert response.data == [
+        {"@id": "http://alternative.com/person1", "label": "Person One"}
+    ]
+
+
+def test_suggest_view_fails_with_no_query():
+    vs = PersonViewSet()
+
+    req = build_request_with_params(q="")
+    response = vs.suggest(request=req)
+    assert response.status_code == 400
+
+
+def test_suggest_view_fails_with_non_integer_size():
+    vs = PersonViewSet()
+
+    req = build_request_with_params(q="Pers", size="ten")
+    response = vs.suggest(request=req)
+    assert response.status_code == 400
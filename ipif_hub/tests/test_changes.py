@@ -0,0 +1,133 @@
+import pytest
+from django.db import transaction
+from rest_framework.test import APIClient
+
+from ipif_hub.changes import (
+    InvalidChangeToken,
+    assign_commit_seqs,
+    decode_change_token,
+    encode_change_token,
+    get_changes,
+)
+from ipif_hub.models import ChangeLogEntry, Person
+from ipif_hub.serializers import PersonSerializer, StatementSerializer
+from ipif_hub.tests.conftest import created_modified
+
+
+def test_change_token_round_trip():
+    assert decode_change_token(encode_change_token(42)) == 42
+    assert decode_change_token(None) == 0
+
+
+def test_invalid_change_token_raises_error():
+    with pytest.raises(InvalidChangeToken):
+        decode_change_token("not-a-token")
+
+
+@pytest.mark.django_db(transaction=True)
+def test_changes_feed_lists_created_entities(person, source, statement, factoid):
+    feed = get_changes(0, repo="testrepo")
+
+    changes = {(c["ipif_type"], c["@id"]): c for c in feed["changes"]}
+    assert changes[("person", person.identifier)]["document"] == (
+        PersonSerializer(person).data
+    )
+    assert changes[("statement", statement.identifier)]["document"] == (
+        StatementSerializer(statement).data
+    )
+    assert ("factoid", factoid.identifier) in changes
+    assert ("source", source.identifier) in changes
+    assert feed["more"] is False
+
+    # Sequence numbers are in order, and each entity only appears once
+    seqs = [c["seq"] for c in feed["changes"]]
+    assert seqs == sorted(seqs)
+    assert len(changes) == len(feed["changes"])
+
+    # Nothing new since the returned token
+    feed = get_changes(decode_change_token(feed["next"]), repo="testrepo")
+    assert feed["changes"] == []
+
+
+@pytest.mark.django_db(transaction=True)
+def test_changes_feed_records_updates_and_deletions(repo):
+    with transaction.atomic():
+        p = Person(local_id="person1", ipif_repo=repo, **created_modified)
+        p.save()
+
+    since = decode_change_token(get_changes(0, repo="testrepo")["next"])
+
+    with transaction.atomic():
+        p.label = "Changed"
+        p.save()
+
+    feed = get_changes(since, repo="testrepo")
+    assert [(c["action"], c["@id"]) for c in feed["changes"]] == [
+        ("updated", p.identifier)
+    ]
+    since = feed["changes"][-1]["seq"]
+
+    identifier = p.identifier
+    p.delete()
+
+    feed = get_changes(since, repo="testrepo")
+    assert [(c["action"], c["@id"]) for c in feed["changes"]] == [
+        ("deleted", identifier)
+    ]
+    assert "document" not in feed["changes"][0]
+
+    # Only the latest change for each entity is kept
+    assert ChangeLogEntry.objects.filter(entity_id=p.pk).count() == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_changes_feed_numbers_entries_in_commit_order(repo):
+    with transaction.atomic():
+        p1 = Person(local_id="person1", ipif_repo=repo, **created_modified)
+        p1.save()
+    since = decode_change_token(get_changes(0, repo="testrepo")["next"])
+
+    with transaction.atomic():
+        p1.label = "Changed"
+        p1.save()
+        p2 = Person(local_id="person2", ipif_repo=repo, **created_modified)
+        p2.save()
+    early = ChangeLogEntry.objects.get(entity_id=p1.pk)
+    late = ChangeLogEntry.objects.get(entity_id=p2.pk)
+    assert early.seq < late.seq
+
+    # As if p1's entry were written by a transaction that committed after a
+    # reader had paged past p2's: the feed doesn't show it until it is
+    # numbered, and then it comes after that reader's token
+    token = ChangeLogEntry.objects.get(pk=late.pk).commit_seq
+    ChangeLogEntry.objects.filter(pk=early.pk).update(commit_seq=None)
+    assert get_changes(token, repo="testrepo")["changes"] == []
+
+    assign_commit_seqs()
+    feed = get_changes(token, repo="testrepo")
+    assert [c["@id"] for c in feed["changes"]] == [p1.identifier]
+    assert ChangeLogEntry.objects.get(pk=early.pk).commit_seq > token
+
+
+@pytest.mark.django_db(transaction=True)
+def test_changes_feed_pagination(person, person2, factoid):
+    feed = get_changes(0, repo="testrepo", size=1)
+    assert len(feed["changes"]) == 1
+    assert feed["more"] is True
+
+    next_feed = get_changes(decode_change_token(feed["next"]), repo="testrepo")
+    assert feed["changes"][0]["seq"] < next_feed["changes"][0]["seq"]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_changes_view(person, factoid):
+    client = APIClient()
+    response = client.get("/testrepo/ipif/changes/")
+    assert response.status_code == 200
+    assert response.data["changes"]
+
+    response = client.get("/testrepo/ipif/changes/?since=not-a-token")
+    assert response.status_code == 400
+
+    response = client.get("/testrepo/ipif/changes/?size=lots")
+    assert response.status_code == 400
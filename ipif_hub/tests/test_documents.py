@@ -0,0 +1,93 @@
+import datetime
+import json
+
+import pytest
+
+from ipif_hub.documents import encode_document, get_document_serializer_from_model
+from ipif_hub.models import Factoid, MergeSource, Person, Source
+from ipif_hub.search_indexes import get_serializer_from_model
+
+
+def as_old_document(document: str) -> str:
+    """A stored document as the index stored it before encode_document: with
+    json.dumps' defaults, which keep the key order of the decoded document"""
+    return json.dumps(json.loads(document))
+
+
+def serialize_both(instance):
+    """Serializes fresh copies of the instance as the index used to (json.dumps
+    of the DRF serializer's output) and as it does now (encode_document of the
+    document serializer's), each with its own prefetching"""
+    encoded = []
+    for get_serializer, encode in (
+        (get_serializer_from_model, json.dumps),
+        (get_document_serializer_from_model, encode_document),
+    ):
+        serializer = get_serializer(type(instance))
+        fresh = type(instance).objects.get(pk=instance.pk)
+        serializer.prefetch_instances([fresh])
+        encoded.append(encode(serializer(fresh).data))
+    return encoded
+
+
+@pytest.mark.django_db(transaction=True)
+def test_document_serializers_match_drf_serializers(
+    person,
+    person_sameAs,
+    source,
+    sourceSameAs,
+    statement,
+    statement2,
+    factoid,
+    factoid2,
+    factoid3,
+):
+    merge_source = MergeSource(
+        createdBy="ipif-hub",
+        createdWhen=datetime.date.today(),
+        modifiedBy="ipif-hub",
+        modifiedWhen=datetime.date.today(),
+    )
+    merge_source.save()
+    merge_source.sources.add(source, sourceSameAs)
+
+    instances = [
+        person,
+        person_sameAs,
+        source,
+        sourceSameAs,
+        statement,
+        statement2,
+        factoid,
+        factoid2,
+        factoid3,
+        person.merge_person.first(),
+        merge_source,
+    ]
+    # Related objects with no factoids, and statements without places or dates
+    instances += list(Person.objects.filter(factoids__isnull=True))
+    instances += list(Source.objects.filter(factoids__isnull=True))
+
+    for instance in instances:
+        old_document, document = serialize_both(instance)
+        assert as_old_document(document) == old_document, type(instance).__name__
+
+
+@pytest.mark.django_db(transaction=True)
+def test_document_serializers_handle_unsaved_date_strings(repo, person, source):
+    factoid = Factoid(
+        local_id="factoid_with_string_dates",
+        ipif_repo=repo,
+        person=person,
+        source=source,
+        createdBy="Researcher One",
+        createdWhen="2022-02-01",
+        modifiedBy="Researcher One",
+        modifiedWhen="2022-02-01",
+    )
+    factoid.save()
+
+    drf_data = get_serializer_from_model(Factoid)(factoid).data
+    data = get_document_serializer_from_model(Factoid)(factoid).data
+    assert as_old_document(encode_document(data)) == json.dumps(drf_data)
+    assert data["createdWhen"] == "2022-02-01"
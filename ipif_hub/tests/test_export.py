@@ -0,0 +1,78 @@
+import gzip
+import json
+
+import pytest
+from rest_framework.test import APIClient
+
+from ipif_hub.export import gzip_stream, iter_export_lines
+from ipif_hub.serializers import (
+    FactoidSerializer,
+    MergePersonSerializer,
+    MergeSourceSerializer,
+    PersonSerializer,
+    SourceSerializer,
+    StatementSerializer,
+)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_export_repo_from_solr(person, source, statement, factoid):
+    exported = [json.loads(line) for line in iter_export_lines("testrepo")]
+
+    # The autocreated relatesToPerson person (see conftest.statement) is not included
+    assert exported == [
+        {"ipif_type": "person", "document": PersonSerializer(person).data},
+        {"ipif_type": "source", "document": SourceSerializer(source).data},
+        {"ipif_type": "statement", "document": StatementSerializer(statement).data},
+        {"ipif_type": "factoid", "document": FactoidSerializer(factoid).data},
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_export_hub_from_solr(person, source, statement, factoid):
+    exported = [json.loads(line) for line in iter_export_lines()]
+
+    assert exported == [
+        {
+            "ipif_type": "mergeperson",
+            "document": MergePersonSerializer(person.merge_person.first()).data,
+        },
+        {
+            "ipif_type": "mergesource",
+            "document": MergeSourceSerializer(source.merge_source.first()).data,
+        },
+        {"ipif_type": "statement", "document": StatementSerializer(statement).data},
+        {"ipif_type": "factoid", "document": FactoidSerializer(factoid).data},
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_export_from_db_matches_export_from_solr(person, source, statement, factoid):
+    from_solr = [json.loads(line) for line in iter_export_lines("testrepo")]
+    from_db = [json.loads(line) for line in iter_export_lines("testrepo", "db")]
+    assert from_db == from_solr
+
+
+@pytest.mark.django_db(transaction=True)
+def test_export_gzip(person, source, statement, factoid):
+    lines = list(iter_export_lines("testrepo"))
+    compressed = b"".join(gzip_stream(iter(lines)))
+    assert gzip.decompress(compressed).decode() == "".join(lines)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_export_view(person, source, statement, factoid):
+    client = APIClient()
+    response = client.get("/testrepo/ipif/export/")
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/x-ndjson"
+
+    content = b"".join(response.streaming_content).decode()
+    assert content == "".join(iter_export_lines("testrepo"))
+
+    response = client.get("/testrepo/ipif/export/?gzip=true")
+    assert response.status_code == 200
+    assert gzip.decompress(b"".join(response.streaming_content)).decode() == content
+
+    response = client.get("/nonexistent/ipif/export/")
+    assert response.status_code == 404
@@ -0,0 +1,79 @@
+import pytest
+from rest_framework.test import APIClient
+
+from ipif_hub.graph import get_neighbourhood
+from ipif_hub.models import PersonEdge
+
+
+@pytest.mark.django_db(transaction=True)
+def test_edges_recorded_for_factoid(person, statement, factoid):
+    related_person = statement.relatesToPerson.first()
+    assert list(
+        PersonEdge.objects.values_list(
+            "source_person", "target_person", "edge_type", "role"
+        )
+    ) == [(person.pk, related_person.pk, "relatesToPerson", "unemployed")]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_edges_removed_with_factoid(person, statement, factoid):
+    factoid.delete()
+    assert not PersonEdge.objects.exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_get_neighbourhood(
+    person, person_sameAs, statement, statement2, factoid, factoid2, factoid3
+):
+    related_person = statement.relatesToPerson.first()
+
+    graph = get_neighbourhood([person_sameAs.pk], hops=1)
+    assert [(n["@id"], n["hop"]) for n in graph["nodes"]] == [
+        (person_sameAs.identifier, 0),
+        (person.identifier, 1),
+    ]
+    assert [(e["type"], e["statement"]) for e in graph["edges"]] == [
+        ("sharedStatement", statement2.identifier)
+    ]
+
+    # Another hop reaches the person the first statement relates to
+    graph = get_neighbourhood([person_sameAs.pk], hops=2)
+    assert (related_person.identifier, 2) in [
+        (n["@id"], n["hop"]) for n in graph["nodes"]
+    ]
+
+    graph = get_neighbourhood([person_sameAs.pk], hops=2, max_nodes=2)
+    assert len(graph["nodes"]) == 2
+    assert graph["truncated"] is True
+
+
+@pytest.mark.django_db(transaction=True)
+def test_person_graph_view(person, statement, factoid):
+    related_person = statement.relatesToPerson.first()
+
+    client = APIClient()
+    response = client.get("/testrepo/ipif/persons/graph/?id=person1&hops=2")
+    assert response.status_code == 200
+    assert [n["@id"] for n in response.data["nodes"]] == [
+        person.identifier,
+        related_person.identifier,
+    ]
+    assert response.data["edges"][0]["role"] == "unemployed"
+
+    # On the hub, the person is found by (merge person) URI
+    response = client.get(
+        "/ipif/persons/graph/?id=http://alternative.com/person1&types=relatesToPerson"
+    )
+    assert response.status_code == 200
+    assert response.data["nodes"][0]["mergePerson"] == str(
+        person.merge_person.first().pk
+    )
+
+    response = client.get("/testrepo/ipif/persons/graph/?id=nobody")
+    assert response.status_code == 404
+
+    response = client.get("/testrepo/ipif/persons/graph/?id=person1&types=enemies")
+    assert response.status_code == 400
+
+    response = client.get("/testrepo/ipif/persons/graph/?id=person1&hops=two")
+    assert response.status_code == 400
@@ -0,0 +1,68 @@
+import pytest
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from ipif_hub.includes import InvalidInclude, collect_refs, parse_include
+from ipif_hub.serializers import (
+    FactoidSerializer,
+    PersonSerializer,
+    SourceSerializer,
+    StatementSerializer,
+)
+
+
+def test_parse_include():
+    assert parse_include(None) == []
+    assert parse_include("factoids, statements,factoids") == ["factoids", "statements"]
+
+    with pytest.raises(InvalidInclude):
+        parse_include("factoids,colours")
+
+
+@pytest.mark.django_db(transaction=True)
+def test_collect_refs(person, source, statement, factoid):
+    refs = collect_refs(
+        PersonSerializer(person).data, ["factoids", "statements", "persons"]
+    )
+    assert refs == {
+        "factoids": [factoid.identifier],
+        "statements": [statement.identifier],
+        # The person itself is not included
+        "persons": [],
+    }
+
+    refs = collect_refs(FactoidSerializer(factoid).data, ["factoids", "sources"])
+    assert refs == {"factoids": [], "sources": [source.identifier]}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_retrieve_with_include(person, source, statement, factoid):
+    client = APIClient()
+    response = client.get(
+        "/testrepo/ipif/persons/person1?include=factoids,statements,sources"
+    )
+    assert response.status_code == 200
+    assert response.data["@id"] == person.identifier
+    assert response.data["included"] == {
+        "factoids": [FactoidSerializer(factoid).data],
+        "statements": [StatementSerializer(statement).data],
+        "sources": [SourceSerializer(source).data],
+    }
+
+    response = client.get("/testrepo/ipif/persons/person1?include=colours")
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db(transaction=True)
+def test_list_with_include_is_limited(person, source, statement, factoid):
+    client = APIClient()
+    with override_settings(IPIF_INCLUDE_MAX_DOCUMENTS=1):
+        response = client.get("/testrepo/ipif/factoids/?include=statements,sources")
+
+    assert response.status_code == 200
+    [document] = response.data
+    assert document["included"] == {
+        "statements": [StatementSerializer(statement).data],
+        "sources": [],
+    }
+    assert document["included-truncated"] is True
@@ -1,8 +1,12 @@
+import copy
 import datetime
+import json
+import threading
 
 import pytest
-from django.db import transaction
+from django.db import IntegrityError, OperationalError, transaction
 
+from ipif_hub.management.utils.copy_ingest import copy_ingest_data
 from ipif_hub.management.utils.ingest_data import (
     NO_CHANGE_TO_DATA,
     DataFormatError,
@@ -11,9 +15,25 @@ from ipif_hub.management.utils.ingest_data import (
     ingest_factoid,
     ingest_person_or_source,
     ingest_statement,
+    resolve_factoid_references,
+    set_factoid_references,
+)
+from ipif_hub.management.utils.ingest_events import (
+    IngestEvents,
+    collect_events,
+    record_event,
+)
+from ipif_hub.management.utils.pipeline import ingest_chunk, ingest_data_in_parallel
+from ipif_hub.management.utils.purge_repo import purge_repo
+from ipif_hub.management.utils.validation import (
+    SchemaValidationError,
+    validate_batch,
 )
 from ipif_hub.models import (
+    URI,
+    ChangeLogEntry,
     Factoid,
+    IngestionJob,
     IpifRepo,
     MergePerson,
     Person,
@@ -21,6 +41,7 @@ from ipif_hub.models import (
     Statement,
     get_ipif_hub_repo_AUTOCREATED_instance,
 )
+from ipif_hub.tasks import ingest_json_data_task, purge_repo_task
 from ipif_hub.tests.conftest import created_modified
 
 
@@ -661,6 +682,341 @@ def test_data_ingestion_function(
     ingest_data("testrepo", data)
 
 
+@pytest.fixture
+def canonical_data_set(factoid1_data, person1_data, source1_data, statement1_data):
+    person2_data = {
+        **person1_data,
+        "@id": "Person2",
+        "label": "Person Number Two",
+        "uris": ["http://other.com/person1", "http://other.com/person2"],
+    }
+    factoid2_data = {
+        **factoid1_data,
+        "@id": "Factoid2",
+        "person-ref": {"@id": "Person2"},
+    }
+    return {
+        "factoids": [factoid1_data, factoid2_data],
+        "persons": [person1_data, person2_data],
+        "sources": [source1_data],
+        "statements": [statement1_data],
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+def test_canonical_ingest_removes_missing_entities(repo, canonical_data_set):
+    ingest_data("testrepo", copy.deepcopy(canonical_data_set))
+    assert Person.objects.filter(ipif_repo=repo).count() == 2
+    assert MergePerson.objects.count() == 1
+
+    canonical_data_set["persons"].pop()
+    canonical_data_set["factoids"].pop()
+    ingest_data("testrepo", canonical_data_set, canonical=True)
+
+    assert [p.local_id for p in Person.objects.filter(ipif_repo=repo)] == ["Person1"]
+    assert [f.local_id for f in Factoid.objects.all()] == ["Factoid1"]
+    assert Statement.objects.count() == 1
+    assert Source.objects.count() == 1
+
+    merge_person = MergePerson.objects.get()
+    assert [p.local_id for p in merge_person.persons.all()] == ["Person1"]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_canonical_ingest_removes_missing_entities_in_batches(
+    repo, canonical_data_set, monkeypatch
+):
+    monkeypatch.setattr("ipif_hub.management.utils.canonical_sync.DELETE_BATCH_SIZE", 1)
+    ingest_data("testrepo", copy.deepcopy(canonical_data_set))
+
+    ingest_data(
+        "testrepo",
+        {"factoids": [], "persons": [], "sources": [], "statements": []},
+        canonical=True,
+    )
+
+    assert not Factoid.objects.exists()
+    assert not Statement.objects.exists()
+    assert not Person.objects.filter(ipif_repo=repo).exists()
+    assert not Source.objects.filter(ipif_repo=repo).exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_non_canonical_ingest_keeps_missing_entities(repo, canonical_data_set):
+    ingest_data("testrepo", copy.deepcopy(canonical_data_set))
+
+    canonical_data_set["persons"].pop()
+    canonical_data_set["factoids"].pop()
+    ingest_data("testrepo", canonical_data_set, canonical=False)
+
+    assert Person.objects.filter(ipif_repo=repo).count() == 2
+    assert Factoid.objects.count() == 2
+
+
+@pytest.mark.django_db(transaction=True)
+def test_canonical_ingest_rejects_references_to_entities_it_removes(
+    repo, canonical_data_set
+):
+    ingest_data("testrepo", copy.deepcopy(canonical_data_set), canonical=False)
+
+    # Factoid2 still refers to Person2, which the canonical batch would delete
+    canonical_data_set["persons"].pop()
+    with pytest.raises(DataIntegrityError) as e:
+        ingest_data("testrepo", canonical_data_set, canonical=True)
+
+    assert str(e.value) == (
+        "IPIF JSON Error: Factoid: Factoid2 references non-existant Person @id='Person2'"
+    )
+    assert Person.objects.filter(ipif_repo=repo).count() == 2
+    assert Factoid.objects.count() == 2
+
+
+@pytest.mark.django_db(transaction=True)
+def test_ingest_data_in_parallel(repo, canonical_data_set, statement2_data):
+    canonical_data_set["statements"].append(statement2_data)
+
+    reports = ingest_data_in_parallel(
+        "testrepo", canonical_data_set, workers=4, chunk_size=1
+    )
+
+    assert {name: r.items for name, r in reports.items()} == {
+        "persons": 2,
+        "sources": 1,
+        "statements": 2,
+        "factoids": 2,
+    }
+    assert reports["persons"].chunks == 2
+    assert Person.objects.filter(ipif_repo=repo).count() == 2
+    assert MergePerson.objects.get().persons.count() == 2
+    assert Statement.objects.count() == 2
+    f: Factoid = Factoid.objects.get(identifier="http://test.com/factoids/Factoid2")
+    assert f.person.local_id == "Person2"
+    assert [s.local_id for s in f.statements.all()] == ["St1-John-Smith-Name"]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_ingest_chunk_retries_collisions(repo, settings):
+    settings.IPIF_INGEST_CHUNK_ATTEMPTS = 3
+    settings.IPIF_INGEST_RETRY_DELAY = 0
+    attempts = []
+
+    def collide(items, ipif_repo):
+        attempts.append(items)
+        raise IntegrityError("duplicate key value")
+
+    with pytest.raises(IntegrityError):
+        ingest_chunk(collide, ["Person1"], repo)
+    assert attempts == [["Person1"]] * 3
+
+
+@pytest.mark.django_db(transaction=True)
+def test_ingest_data_in_parallel_checks_references_first(repo, canonical_data_set):
+    canonical_data_set["statements"] = []
+
+    with pytest.raises(DataIntegrityError):
+        ingest_data_in_parallel("testrepo", canonical_data_set, chunk_size=1)
+
+    assert not Person.objects.filter(ipif_repo=repo).exists()
+
+
+@pytest.mark.django_db
+def test_ingest_data_reports_every_dangling_reference(repo, canonical_data_set):
+    canonical_data_set["statements"] = []
+    canonical_data_set["sources"] = []
+    canonical_data_set["factoids"][1]["person-ref"] = {"@id": "Person3"}
+
+    with pytest.raises(DataIntegrityError) as e:
+        ingest_data("testrepo", canonical_data_set)
+
+    assert str(e.value).splitlines() == [
+        "IPIF JSON Error: Factoid: Factoid1 references non-existant Source @id='Source1'",
+        "IPIF JSON Error: Factoid: Factoid1 references non-existant Statement @id='St1-John-Smith-Name'",
+        "IPIF JSON Error: Factoid: Factoid2 references non-existant Person @id='Person3'",
+        "IPIF JSON Error: Factoid: Factoid2 references non-existant Source @id='Source1'",
+        "IPIF JSON Error: Factoid: Factoid2 references non-existant Statement @id='St1-John-Smith-Name'",
+    ]
+    assert not Person.objects.exists()
+
+
+@pytest.mark.django_db
+def test_ingest_factoids_resolves_references_in_bulk(
+    repo,
+    factoid1_data: dict,
+    person1_data: dict,
+    source1_data: dict,
+    statement1_data: dict,
+    django_assert_max_num_queries,
+):
+    ingest_person_or_source(Person, person1_data, repo)
+    ingest_person_or_source(Source, source1_data, repo)
+    ingest_statement(statement1_data, repo)
+
+    references = resolve_factoid_references([factoid1_data], repo)
+    assert references["Person"] == {
+        "http://test.com/persons/Person1": Person.objects.get(local_id="Person1").pk
+    }
+
+    with django_assert_max_num_queries(0):
+        set_factoid_references(
+            Factoid(),
+            {**factoid1_data, "local_id": "Factoid1"},
+            repo,
+            references,
+        )
+
+
+def test_validate_batch_reports_every_error_with_its_path(canonical_data_set):
+    del canonical_data_set["persons"][0]["createdBy"]
+    canonical_data_set["factoids"][1]["statement-refs"] = [{"@id": 1}]
+
+    with pytest.raises(SchemaValidationError) as e:
+        validate_batch(canonical_data_set)
+
+    assert e.value.errors == [
+        "$.persons[0]: 'createdBy' is a required property",
+        "$.factoids[1].statement-refs[0].@id: 1 is not of type 'string'",
+    ]
+
+
+@pytest.mark.django_db
+def test_ingest_data_with_invalid_data_ingests_nothing(repo, canonical_data_set):
+    del canonical_data_set["persons"][0]["createdBy"]
+    del canonical_data_set["factoids"][0]["source-ref"]
+
+    with pytest.raises(DataFormatError) as e:
+        ingest_data("testrepo", canonical_data_set)
+
+    assert str(e.value).splitlines() == [
+        "$.persons[0]: 'createdBy' is a required property",
+        "$.factoids[0]: 'source-ref' is a required property",
+    ]
+    assert not Person.objects.exists()
+
+
+@pytest.mark.django_db
+def test_ingest_data_records_events(repo, canonical_data_set):
+    events = ingest_data("testrepo", copy.deepcopy(canonical_data_set))
+    assert events.as_dict()["counts"]["person"] == {
+        "created": 2,
+        "updated": 0,
+        "unchanged": 0,
+        "failed": 0,
+    }
+    assert set(events.as_dict()["timings"]) == {
+        "persons",
+        "sources",
+        "statements",
+        "factoids",
+    }
+
+    canonical_data_set["factoids"][0]["label"] = "Changed"
+    events = ingest_data("testrepo", canonical_data_set)
+    assert events.as_dict()["counts"]["factoid"] == {
+        "created": 0,
+        "updated": 1,
+        "unchanged": 1,
+        "failed": 0,
+    }
+
+
+def test_ingest_events_keep_a_bounded_sample_of_errors():
+    events = IngestEvents(max_samples=2)
+    for i in range(5):
+        events.fail("person", f"Error {i}")
+
+    summary = events.as_dict()
+    assert summary["counts"]["person"]["failed"] == 5
+    assert summary["errors"] == ["Error 0", "Error 1"]
+    assert summary["errors_omitted"] == 3
+
+
+def test_ingest_events_record_each_error_once():
+    events = IngestEvents()
+    events.record("person", "created")
+    failure = DataFormatError("Bad person")
+    events.fail("person", failure)
+
+    # Re-raised up to the task, the failure isn't recorded again
+    events.raised(failure)
+    events.raised(DataIntegrityError("Dangling\nreferences"))
+    events.roll_back()
+
+    summary = events.as_dict()
+    assert summary["errors"] == ["Bad person", "Dangling", "references"]
+    assert summary["counts"]["person"]["created"] == 0
+    assert summary["counts"]["person"]["failed"] == 1
+    assert summary["rolled_back"]
+
+
+def test_collect_events_is_per_thread():
+    with collect_events() as events:
+        record_event("person", "created")
+        thread = threading.Thread(target=record_event, args=("person", "created"))
+        thread.start()
+        thread.join()
+
+    assert events.as_dict()["counts"]["person"]["created"] == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_purge_repo_deletes_entities_and_regroups_merges(
+    repo, repo2, canonical_data_set
+):
+    ingest_data("testrepo", canonical_data_set)
+    other_person = Person(
+        local_id="OtherPerson1", ipif_repo=repo2, label="Other", **created_modified
+    )
+    other_person.save()
+    other_person.uris.add(URI.objects.get(uri="http://other.com/person1"))
+    assert MergePerson.objects.get().persons.count() == 3
+
+    deleted = purge_repo(repo)
+
+    assert deleted == {"factoid": 2, "statement": 1, "person": 2, "source": 1}
+    assert not Person.objects.filter(ipif_repo=repo).exists()
+    assert not Factoid.objects.exists()
+    assert not Statement.objects.exists()
+    assert IpifRepo.objects.filter(pk="testrepo").exists()
+    assert [p.pk for p in MergePerson.objects.get().persons.all()] == [other_person.pk]
+    tombstones = ChangeLogEntry.objects.filter(
+        ipif_repo_slug="testrepo", action="deleted"
+    )
+    assert tombstones.count() == 6
+
+
+@pytest.mark.django_db(transaction=True)
+def test_purge_repo_task_fails_job_on_error(repo, monkeypatch):
+    def fail(ipif_repo):
+        raise OperationalError("Solr is down")
+
+    monkeypatch.setattr("ipif_hub.tasks.purge_repo", fail)
+    job = IngestionJob(ipif_repo=repo, job_type="repo_purge")
+    job.save()
+
+    purge_repo_task(repo.pk, job.id)
+
+    job.refresh_from_db()
+    assert job.job_status == "failed"
+    assert json.loads(job.job_output) == {"errors": ["Solr is down"]}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_ingest_json_data_task_fails_job_on_error(repo, monkeypatch):
+    def fail(repo_id, data, validated=False):
+        raise OperationalError("Database connection lost")
+
+    monkeypatch.setattr("ipif_hub.tasks.ingest_data_in_parallel", fail)
+    job = IngestionJob(ipif_repo=repo, job_type="file_batch_upload")
+    job.save()
+
+    ingest_json_data_task(repo.pk, {"factoids": []}, job_id=job.id, parallel=True)
+
+    job.refresh_from_db()
+    assert job.job_status == "failed"
+    assert job.is_complete
+    assert json.loads(job.job_output)["errors"] == ["Database connection lost"]
+
+
 @pytest.mark.django_db(transaction=True)
 def test_ingest_person_with_realworld_data(repo):
     with transaction.atomic():
@@ -677,3 +1033,128 @@ def test_ingest_person_with_realworld_data(repo):
         ]
         for person in data:
             ingest_person_or_source(Person, person, repo)
+
+
+@pytest.fixture
+def copy_ingest_data_set(
+    factoid1_data, person1_data, source1_data, statement1_data, statement2_data
+):
+    factoid1_data["statement-refs"].append({"@id": "St2-jsmith-teacher"})
+    return {
+        "factoids": [factoid1_data],
+        "persons": [person1_data],
+        "sources": [source1_data],
+        "statements": [statement1_data, statement2_data],
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+def test_copy_ingest_data(repo, copy_ingest_data_set):
+    copy_ingest_data("testrepo", copy_ingest_data_set)
+
+    p: Person = Person.objects.get(identifier="http://test.com/persons/Person1")
+    assert p.label == "Person Number One"
+    assert p.createdWhen == datetime.date(2012, 4, 23)
+    assert {uri.uri for uri in p.uris.all()} == {
+        "http://other.com/person1",
+        "http://test.com/persons/Person1",
+        "http://localhost:8000/ipif/persons/http://test.com/persons/Person1",
+        "http://localhost:8000/testrepo/ipif/persons/Person1",
+        "http://localhost:8000/testrepo/ipif/persons/http://test.com/persons/Person1",
+    }
+    assert p.merge_person.count() == 1
+
+    st: Statement = Statement.objects.get(
+        identifier="http://test.com/statements/St2-jsmith-teacher"
+    )
+    assert st.role_label == "teachery"
+    assert [place.label for place in st.places.all()] == ["Germany"]
+    related: Person = st.relatesToPerson.get()
+    assert related.identifier == "http://persons.com/mrsSpenceley"
+    assert related.ipif_repo == get_ipif_hub_repo_AUTOCREATED_instance()
+    assert [uri.uri for uri in related.uris.all()] == [
+        "http://persons.com/mrsSpenceley"
+    ]
+
+    f: Factoid = Factoid.objects.get(identifier="http://test.com/factoids/Factoid1")
+    assert f.person == p
+    assert f.source == Source.objects.get(identifier="http://test.com/sources/Source1")
+    assert {s.local_id for s in f.statements.all()} == {
+        "St1-John-Smith-Name",
+        "St2-jsmith-teacher",
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+def test_copy_ingest_data_only_updates_changed_entities(repo, copy_ingest_data_set):
+    copy_ingest_data("testrepo", copy.deepcopy(copy_ingest_data_set))
+    modified = {st.local_id: st.hubModifiedWhen for st in Statement.objects.all()}
+
+    copy_ingest_data_set["statements"][1]["places"] = []
+    copy_ingest_data_set["statements"][1]["label"] = "John Smith was a teacher"
+    copy_ingest_data("testrepo", copy_ingest_data_set)
+
+    st1 = Statement.objects.get(local_id="St1-John-Smith-Name")
+    assert st1.hubModifiedWhen == modified["St1-John-Smith-Name"]
+    st2 = Statement.objects.get(local_id="St2-jsmith-teacher")
+    assert st2.hubModifiedWhen > modified["St2-jsmith-teacher"]
+    assert st2.label == "John Smith was a teacher"
+    assert not st2.places.exists()
+    assert Person.objects.count() == 2
+
+
+@pytest.mark.django_db(transaction=True)
+def test_copy_ingest_data_fails_with_missing_statement_ref(repo, copy_ingest_data_set):
+    copy_ingest_data_set["statements"].pop()
+
+    with pytest.raises(DataIntegrityError) as e:
+        copy_ingest_data("testrepo", copy_ingest_data_set)
+    assert "St2-jsmith-teacher" in str(e.value)
+    assert not Person.objects.exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_canonical_copy_ingest_removes_missing_entities(repo, canonical_data_set):
+    copy_ingest_data("testrepo", copy.deepcopy(canonical_data_set))
+    assert Person.objects.filter(ipif_repo=repo).count() == 2
+
+    canonical_data_set["persons"].pop()
+    canonical_data_set["factoids"].pop()
+    copy_ingest_data("testrepo", canonical_data_set, canonical=True)
+
+    assert [p.local_id for p in Person.objects.filter(ipif_repo=repo)] == ["Person1"]
+    assert [f.local_id for f in Factoid.objects.all()] == ["Factoid1"]
+    assert Source.objects.count() == 1
+
+    merge_person = MergePerson.objects.get()
+    assert [p.local_id for p in merge_person.persons.all()] == ["Person1"]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_canonical_copy_ingest_rejects_references_to_entities_it_removes(
+    repo, canonical_data_set
+):
+    copy_ingest_data("testrepo", copy.deepcopy(canonical_data_set), canonical=False)
+
+    # Factoid2 still refers to Person2, which the canonical batch would delete
+    canonical_data_set["persons"].pop()
+    with pytest.raises(DataIntegrityError) as e:
+        copy_ingest_data("testrepo", canonical_data_set, canonical=True)
+
+    assert str(e.value) == (
+        "IPIF JSON Error: Factoid: Factoid2 references non-existant Person @id='Person2'"
+    )
+    assert Person.objects.filter(ipif_repo=repo).count() == 2
+    assert Factoid.objects.count() == 2
+
+
+@pytest.mark.django_db(transaction=True)
+def test_non_canonical_copy_ingest_keeps_missing_entities(repo, canonical_data_set):
+    copy_ingest_data("testrepo", copy.deepcopy(canonical_data_set))
+
+    canonical_data_set["persons"].pop()
+    canonical_data_set["factoids"].pop()
+    copy_ingest_data("testrepo", canonical_data_set, canonical=False)
+
+    assert Person.objects.filter(ipif_repo=repo).count() == 2
+    assert Factoid.objects.count() == 2
@@ -1,7 +1,7 @@
 import pytest
 from django.db import IntegrityError
 
-from ipif_hub.models import IpifRepo, MergePerson, MergeSource, Person, Source
+from ipif_hub.models import URI, IpifRepo, MergePerson, MergeSource, Person, Source
 from ipif_hub.signals.handler_utils import build_extra_uris
 from ipif_hub.tests.conftest import created_modified, test_repo_no_slug
 
@@ -45,6 +45,25 @@ def test_created_person_in_db(repo):
     assert looked_up_p.identifier == p.identifier
 
 
+@pytest.mark.django_db
+def test_identifier_is_unique_within_repo(repo, repo2):
+    Person(local_id="person1", ipif_repo=repo, **created_modified).save()
+    Person(
+        local_id="http://test.com/persons/person1", ipif_repo=repo2, **created_modified
+    ).save()
+
+    with pytest.raises(IntegrityError):
+        Person(local_id="person1", ipif_repo=repo, **created_modified).save()
+
+
+@pytest.mark.django_db
+def test_uri_is_unique():
+    URI(uri="http://persons.com/person1").save()
+
+    with pytest.raises(IntegrityError):
+        URI(uri="http://persons.com/person1").save()
+
+
 @pytest.mark.django_db
 def test_create_person_and_correct_id_when_id_is_uri(repo):
     # If the id is already a URL, we can use that instead
@@ -0,0 +1,65 @@
+import datetime
+from uuid import uuid4
+
+import msgpack
+import pytest
+from rest_framework.test import APIClient
+
+from ipif_hub.renderers import CBORRenderer, MessagePackRenderer
+from ipif_hub.serializers import FactoidSerializer, PersonSerializer
+
+
+def test_msgpack_renderer_keeps_json_structure():
+    uuid = uuid4()
+    data = {
+        "@id": "http://test.com/persons/person1",
+        "uris": ["http://test.com/persons/person1"],
+        "createdWhen": datetime.date(2022, 1, 1),
+        "id": uuid,
+        "label": None,
+    }
+
+    rendered = MessagePackRenderer().render(data)
+
+    assert msgpack.unpackb(rendered) == {
+        **data,
+        "createdWhen": "2022-01-01",
+        "id": str(uuid),
+    }
+
+
+def test_cbor_renderer_keeps_json_structure():
+    cbor2 = pytest.importorskip("cbor2")
+    data = {
+        "@id": "http://test.com/persons/person1",
+        "createdWhen": datetime.date(2022, 1, 1),
+    }
+
+    assert cbor2.loads(CBORRenderer().render(data)) == {
+        **data,
+        "createdWhen": "2022-01-01",
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+def test_list_and_retrieve_views_render_msgpack(person, factoid):
+    client = APIClient()
+
+    response = client.get("/testrepo/ipif/persons/", HTTP_ACCEPT="application/msgpack")
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/msgpack"
+    assert msgpack.unpackb(response.content) == [PersonSerializer(person).data]
+
+    response = client.get("/testrepo/ipif/factoids/factoid1", {"format": "msgpack"})
+    assert response.status_code == 200
+    assert msgpack.unpackb(response.content) == FactoidSerializer(factoid).data
+
+
+@pytest.mark.django_db(transaction=True)
+def test_views_still_render_json_by_default(person, factoid):
+    client = APIClient()
+
+    response = client.get("/testrepo/ipif/persons/")
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/json"
+    assert response.json() == [PersonSerializer(person).data]
@@ -0,0 +1,146 @@
+import time
+
+import pytest
+from django.db import transaction
+from rest_framework.test import APIClient
+
+from ipif_hub.models import EntityIdentifier
+from ipif_hub.resolution import (
+    IdentifierCache,
+    build_document_id,
+    identifier_cache,
+    lookup_uris,
+    resolve_document_ids,
+    resolve_documents,
+)
+from ipif_hub.serializers import (
+    MergePersonSerializer,
+    PersonSerializer,
+    SourceSerializer,
+)
+
+
+def test_identifier_cache_evicts_least_recently_used():
+    cache = IdentifierCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_identifier_cache_entries_expire():
+    cache = IdentifierCache(max_size=2, ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+@pytest.mark.django_db(transaction=True)
+def test_identifiers_recorded_for_person(person, factoid):
+    keys = set(
+        EntityIdentifier.objects.filter(entity_id=person.pk).values_list(
+            "key", flat=True
+        )
+    )
+    assert {
+        person.identifier,
+        person.local_id,
+        "http://alternative.com/person1",
+    } <= keys
+
+    merge_person = person.merge_person.first()
+    keys = set(
+        EntityIdentifier.objects.filter(entity_id=merge_person.pk).values_list(
+            "key", flat=True
+        )
+    )
+    assert keys == {str(merge_person.pk), *merge_person.uri_set}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_resolve_documents_exactly(person, person_no_uri, factoid):
+    document_ids = resolve_document_ids(
+        ["person1", "person", "http://alternative.com/person1"],
+        "person",
+        repo="testrepo",
+    )
+    assert document_ids == {
+        "person1": build_document_id("person", person.pk),
+        "http://alternative.com/person1": build_document_id("person", person.pk),
+    }
+
+    documents = resolve_documents(["person1"], "person", repo="testrepo")
+    assert documents.keys() == {"person1"}
+    assert PersonSerializer(person).data["@id"] in documents["person1"]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_identifiers_updated_when_uri_removed_and_entity_deleted(person, factoid):
+    assert resolve_document_ids(
+        ["http://alternative.com/person1"], "person", repo="testrepo"
+    )
+
+    with transaction.atomic():
+        person.uris.remove(*person.uris.filter(uri="http://alternative.com/person1"))
+
+    assert (
+        resolve_document_ids(
+            ["http://alternative.com/person1"], "person", repo="testrepo"
+        )
+        == {}
+    )
+
+    pk = person.pk
+    person.delete()
+    assert not EntityIdentifier.objects.filter(entity_id=pk).exists()
+    assert resolve_document_ids(["person1"], "person", repo="testrepo") == {}
+    assert len(identifier_cache) == 0
+
+
+@pytest.mark.django_db(transaction=True)
+def test_lookup_uris_groups_entities_by_repo(person, person_sameAs, factoid, factoid3):
+    results = lookup_uris(["http://alternative.com/person1", "http://nowhere.com/"])
+
+    assert results.keys() == {"http://alternative.com/person1"}
+    result = results["http://alternative.com/person1"]
+    assert result["persons"] == {
+        "testrepo": [PersonSerializer(person).data],
+        "testrepo2": [PersonSerializer(person_sameAs).data],
+    }
+    assert result["mergePerson"] == (
+        MergePersonSerializer(person.merge_person.first()).data
+    )
+    assert result["sources"] == {}
+    assert result["mergeSource"] is None
+
+    # Only the given repo's entities (plus the merge cluster) on a repo route
+    results = lookup_uris(["http://alternative.com/person1"], repo="testrepo2")
+    assert results["http://alternative.com/person1"]["persons"] == {
+        "testrepo2": [PersonSerializer(person_sameAs).data]
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+def test_uri_lookup_view(person, source, factoid):
+    client = APIClient()
+    response = client.post(
+        "/ipif/uris/",
+        ["http://sources.com/source1", "http://nowhere.com/"],
+        format="json",
+    )
+    assert response.status_code == 200
+    assert [r["uri"] for r in response.data["results"]] == [
+        "http://sources.com/source1"
+    ]
+    assert response.data["results"][0]["sources"] == {
+        "testrepo": [SourceSerializer(source).data]
+    }
+    assert response.data["missing"] == ["http://nowhere.com/"]
+
+    response = client.get("/ipif/uris/?uri=not-a-uri")
+    assert response.status_code == 400
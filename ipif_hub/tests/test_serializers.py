@@ -1,10 +1,16 @@
 import datetime
 
 import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
 
 from ipif_hub.models import (
+    Factoid,
     MergePerson,
     MergeSource,
+    Person,
+    Place,
+    Statement,
     get_ipif_hub_repo_AUTOCREATED_instance,
 )
 from ipif_hub.serializers import (
@@ -366,3 +372,139 @@ def test_merge_source_serializer(
             },
         ],
     }
+
+
+def count_serializer_queries(serializer, instance) -> int:
+    """Serializes a freshly-fetched copy of the instance, using the serializer's
+    prefetch profile, and returns the number of queries it took"""
+    instance = type(instance).objects.get(pk=instance.pk)
+    with CaptureQueriesContext(connection) as context:
+        serializer.prefetch_instances([instance])
+        serializer(instance).data
+    return len(context.captured_queries)
+
+
+def add_factoids(repo, person, source, count):
+    with transaction.atomic():
+        for i in range(count):
+            st = Statement(
+                local_id=f"extra_statement{i}",
+                ipif_repo=repo,
+                name=f"Extra {i}",
+                **created_modified,
+            )
+            st.save()
+            f = Factoid(
+                local_id=f"extra_factoid{i}",
+                ipif_repo=repo,
+                person=person,
+                source=source,
+                **created_modified,
+            )
+            f.save()
+            f.statements.add(st)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_serializer_query_counts_do_not_grow_with_factoids(
+    django_assert_num_queries, repo, person, source, statement, factoid
+):
+    merge_person = person.merge_person.first()
+    merge_source = source.merge_source.first()
+    entities = [
+        (PersonSerializer, person),
+        (SourceSerializer, source),
+        (MergePersonSerializer, merge_person),
+        (MergeSourceSerializer, merge_source),
+    ]
+    query_counts = [count_serializer_queries(s, e) for s, e in entities]
+
+    add_factoids(repo, person, source, 3)
+
+    for (serializer, entity), query_count in zip(entities, query_counts):
+        entity = type(entity).objects.get(pk=entity.pk)
+        with django_assert_num_queries(query_count):
+            serializer.prefetch_instances([entity])
+            assert len(serializer(entity).data["factoid-refs"]) == 4
+
+
+@pytest.mark.django_db(transaction=True)
+def test_statement_serializer_query_count_does_not_grow(
+    django_assert_num_queries, repo, person, source, statement, factoid
+):
+    query_count = count_serializer_queries(StatementSerializer, statement)
+
+    with transaction.atomic():
+        for i in range(3):
+            related = Person(
+                local_id=f"related{i}",
+                ipif_repo=get_ipif_hub_repo_AUTOCREATED_instance(),
+                **created_modified,
+            )
+            related.save()
+            statement.relatesToPerson.add(related)
+            place = Place(uri=f"http://places.com/extra{i}", label=f"Extra {i}")
+            place.save()
+            statement.places.add(place)
+            f = Factoid(
+                local_id=f"extra_factoid{i}",
+                ipif_repo=repo,
+                person=person,
+                source=source,
+                **created_modified,
+            )
+            f.save()
+            f.statements.add(statement)
+
+    statement = Statement.objects.get(pk=statement.pk)
+    with django_assert_num_queries(query_count):
+        StatementSerializer.prefetch_instances([statement])
+        data = StatementSerializer(statement).data
+    assert len(data["relatesToPerson"]) == 4
+    assert len(data["factoid-refs"]) == 4
+
+
+@pytest.mark.django_db(transaction=True)
+def test_factoid_serializer_query_count_does_not_grow(
+    django_assert_num_queries, repo, person, source, statement, factoid
+):
+    query_count = count_serializer_queries(FactoidSerializer, factoid)
+
+    with transaction.atomic():
+        for i in range(3):
+            st = Statement(
+                local_id=f"extra_statement{i}", ipif_repo=repo, **created_modified
+            )
+            st.save()
+            factoid.statements.add(st)
+
+    factoid = Factoid.objects.get(pk=factoid.pk)
+    with django_assert_num_queries(query_count):
+        FactoidSerializer.prefetch_instances([factoid])
+        assert len(FactoidSerializer(factoid).data["statement-refs"]) == 4
+
+
+@pytest.mark.django_db(transaction=True)
+def test_merge_serializers_use_two_queries(
+    django_assert_num_queries, repo, person, person_sameAs, source, factoid, factoid3
+):
+    add_factoids(repo, person, source, 3)
+    Factoid(
+        local_id="factoid_without_statements",
+        ipif_repo=repo,
+        person=person_sameAs,
+        source=source,
+        **created_modified,
+    ).save()
+
+    merge_person = MergePerson.objects.get(pk=person.merge_person.first().pk)
+    with django_assert_num_queries(2):
+        data = MergePersonSerializer(merge_person).data
+
+    refs = data["factoid-refs"]
+    assert len(refs) == 6
+    assert [r["person-ref"]["@id"] for r in refs] == sorted(
+        r["person-ref"]["@id"] for r in refs
+    )
+    assert {len(r["statement-refs"]) for r in refs} == {0, 1}
+    assert data["uris"] == sorted(data["uris"])
@@ -8,13 +8,15 @@ from django.contrib.sites.shortcuts import get_current_site
 from django.shortcuts import redirect, render
 from django.views import View
 from django_email_verification import send_email
-from jsonschema import ValidationError, validate
 from rest_framework import parsers as DRF_parsers
 from rest_framework import response as DRF_response
 from rest_framework import views as DRF_views
 
 from ipif_hub.forms import IpifRepoForm, UserForm
-from ipif_hub.management.utils.ingest_schemas import FLAT_LIST_SCHEMA
+from ipif_hub.management.utils.validation import (
+    SchemaValidationError,
+    validate_payload,
+)
 from ipif_hub.models import IngestionJob, IpifRepo
 from ipif_hub.tasks import ingest_json_data_task
 
@@ -132,13 +134,17 @@ def create_user(request):
 class IngestionJobView(DRF_views.APIView):
     def get(self, request, pk=None):
         job = IngestionJob.objects.get(id=uuid.UUID(pk))
+        try:
+            detail = json.loads(job.job_output)
+        except ValueError:  # Jobs from before the output was JSON
+            detail = job.job_output
         return DRF_response.Response(
             {
                 "@id": job.id,
                 "completed": job.is_complete,
                 "duration": job.job_duration,
                 "job_status": job.job_status,
-                "detail": job.job_output,
+                "detail": detail,
             },
             status=200,
         )
@@ -162,18 +168,19 @@ class BatchUpload(DRF_views.APIView):
 
         try:
             data = json.loads(file_contents)
-            validate(data, schema=FLAT_LIST_SCHEMA)
+            validate_payload("flat_list", data)
         except json.JSONDecodeError:
             return DRF_response.Response(
                 {"detail": "Uploaded file is not parseable as JSON"}, status=400
             )
-        except ValidationError as e:
-            return DRF_response.Response({"detail": e.message}, status=400)
+        except SchemaValidationError as e:
+            return DRF_response.Response({"detail": e.errors}, status=400)
 
         job = IngestionJob(ipif_repo=repo, job_type="file_batch_upload")
         job.save()
 
-        ingest_json_data_task.delay(pk, data, job.id)
+        # The flat list schema covers every item, so the ingest needn't validate again
+        ingest_json_data_task.delay(pk, data, job.id, validated=True)
 
         return DRF_response.Response(
             {